@@ -0,0 +1,182 @@
+"""
+Archiving of old completed tasks for CodePet.
+
+Completed top-level tasks (with their whole subtask trees) that were finished more than
+``user_profile.archive_after_days`` days ago are moved from ``tasks`` into the
+``tasks_archive`` cold table of a separate, attached archive database a small
+batch at a time, so every hot query stops paying for them. Each batch is
+followed by an incremental vacuum that hands the freed pages of the hot file
+back to the file system. Archived tasks keep their ids and can be listed,
+searched and restored. Moving tasks in and out of the archive is local to
+this file, so it is left out of the sync change log.
+
+Commits are atomic per database file only, so rows are copied and made
+durable first and deleted from their source afterwards. A crash in between
+leaves a duplicate that the next run skips over, never a lost task.
+"""
+
+import json
+from typing import Optional
+from database import Database
+from sync import untracked
+from task_store import MAX_TREE_DEPTH
+
+
+# Top-level tasks moved per archive batch
+DEFAULT_BATCH_SIZE = 200
+
+# Free pages released after each batch
+VACUUM_PAGES = 256
+
+# Columns shared by tasks and tasks_archive
+_COLUMNS = "id, title, description, completed, xp_value, parent_id, created_at, completed_at, uid"
+
+# Tasks archived before they had a sync uid get the uid the migration gives old tasks
+_ARCHIVE_COLUMNS = ", ".join(
+    f"a.{column}" for column in _COLUMNS.split(", ") if column != "uid"
+) + ", COALESCE(a.uid, printf('legacy-%d-%s', a.id, a.created_at))"
+
+
+def _tree_ids(table: str) -> str:
+    """Ids of the whole trees under the JSON array of root ids in ?1, with depth."""
+    return f"""
+        WITH RECURSIVE tree(id, depth) AS (
+            SELECT value, 0 FROM json_each(?1)
+            UNION ALL
+            SELECT c.id, tree.depth + 1
+            FROM tree JOIN {table} c ON c.parent_id = tree.id
+            WHERE tree.depth < {MAX_TREE_DEPTH}
+        )
+    """
+
+
+class TaskArchiver:
+    """Moves old completed task trees between tasks and tasks_archive."""
+
+    # Completed top-level tasks past the cutoff with no open task anywhere
+    # below them. Pinned to the partial index; the planner otherwise scans by
+    # parent.
+    ARCHIVABLE_QUERY = f"""
+        SELECT t.id FROM tasks t INDEXED BY idx_tasks_archivable
+        WHERE t.parent_id IS NULL AND t.completed = 1
+          AND t.completed_at < datetime('now', ?)
+          AND NOT EXISTS (
+              WITH RECURSIVE below(id, depth) AS (
+                  SELECT c.id, 1 FROM tasks c WHERE c.parent_id = t.id
+                  UNION ALL
+                  SELECT c.id, below.depth + 1
+                  FROM below JOIN tasks c ON c.parent_id = below.id
+                  WHERE below.depth < {MAX_TREE_DEPTH}
+              )
+              SELECT 1 FROM below JOIN tasks c ON c.id = below.id WHERE c.completed = 0
+          )
+        ORDER BY t.completed_at
+        LIMIT ?
+    """
+
+    # Top-level ancestor of an archived task
+    ARCHIVE_ROOT_QUERY = f"""
+        WITH RECURSIVE up(id, parent_id, depth) AS (
+            SELECT id, parent_id, 0 FROM archive.tasks_archive WHERE id = ?
+            UNION ALL
+            SELECT a.id, a.parent_id, up.depth + 1
+            FROM up JOIN archive.tasks_archive a ON a.id = up.parent_id
+            WHERE up.depth < {MAX_TREE_DEPTH}
+        )
+        SELECT id FROM up WHERE parent_id IS NULL
+    """
+
+    def __init__(self, db: Database, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.db = db
+        self.batch_size = batch_size
+        db.attach_archive()
+
+    def archive_after_days(self) -> Optional[int]:
+        """Days after completion before tasks are archived (None when disabled)."""
+        row = self.db.execute(
+            "SELECT archive_after_days FROM user_profile WHERE id = 1"
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_archive_after_days(self, days: Optional[int]) -> None:
+        """Change the archive age; None turns automatic archiving off."""
+        with self.db.transaction() as connection:
+            connection.execute(
+                "UPDATE user_profile SET archive_after_days = ? WHERE id = 1", (days,)
+            )
+
+    def archive_batch(self) -> int:
+        """Archive the next batch of old task trees and vacuum the freed pages.
+
+        Returns:
+            int: Number of top-level tasks archived (0 when nothing is due)
+        """
+        days = self.archive_after_days()
+        if days is None:
+            return 0
+
+        ids = [row[0] for row in self.db.execute(
+            self.ARCHIVABLE_QUERY, (f"-{int(days)} days", self.batch_size)
+        ).fetchall()]
+        if not ids:
+            return 0
+        batch = json.dumps(ids)
+
+        # Copy into the archive file and make it durable before deleting
+        with self.db.transaction() as connection:
+            connection.execute(f"""
+                {_tree_ids("tasks")}
+                INSERT OR IGNORE INTO archive.tasks_archive ({_COLUMNS})
+                SELECT {_COLUMNS} FROM tasks WHERE id IN (SELECT id FROM tree)
+            """, (batch,))
+        self.db.flush()
+
+        with self.db.transaction() as connection, untracked(connection):
+            # Deleting the roots cascades down through every subtask level
+            connection.execute(
+                "DELETE FROM tasks WHERE id IN (SELECT value FROM json_each(?))", (batch,)
+            )
+
+        self.db.incremental_vacuum(VACUUM_PAGES)
+        return len(ids)
+
+    def archive_all(self) -> int:
+        """Archive every due task tree, batch by batch, and return the count."""
+        total = 0
+        while True:
+            count = self.archive_batch()
+            total += count
+            if count < self.batch_size:
+                return total
+
+    def restore(self, task_id: int) -> bool:
+        """Move the archived tree containing a task back into tasks.
+
+        The whole tree is restored from its top-level task, whichever of its
+        tasks ``task_id`` names.
+
+        Returns:
+            bool: Whether the task was found in the archive
+        """
+        row = self.db.execute(self.ARCHIVE_ROOT_QUERY, (task_id,)).fetchone()
+        if row is None:
+            return False
+        root = json.dumps([row[0]])
+
+        with self.db.transaction() as connection, untracked(connection):
+            # Shallower levels go first so subtask foreign keys resolve
+            connection.execute(f"""
+                {_tree_ids("archive.tasks_archive")}
+                INSERT OR IGNORE INTO tasks ({_COLUMNS})
+                SELECT {_ARCHIVE_COLUMNS} FROM archive.tasks_archive a
+                JOIN tree ON tree.id = a.id
+                ORDER BY tree.depth
+            """, (root,))
+        self.db.flush()
+
+        with self.db.transaction() as connection:
+            connection.execute(f"""
+                {_tree_ids("archive.tasks_archive")}
+                DELETE FROM archive.tasks_archive WHERE id IN (SELECT id FROM tree)
+            """, (root,))
+        return True
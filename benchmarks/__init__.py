@@ -0,0 +1,6 @@
+"""
+Performance benchmarks for CodePet.
+
+Run a benchmark module from the repository root, for example:
+    python -m benchmarks.bench_transfer
+"""
@@ -0,0 +1,195 @@
+"""
+Scenario benchmarks against a generated database.
+
+Builds a synthetic database (see benchmarks.generate) and times the hot paths
+of the app: loading the task tree and its pages, searching, completing tasks,
+awarding large amounts of XP and rendering sprites. With --gui the app is
+also started on a copy of the database, under Xvfb when there is no display.
+
+Every scenario reports the median, 95th percentile and fastest run in
+milliseconds. Results are printed as JSON and optionally written to a file;
+--compare prints the change against an earlier results file.
+
+Usage: python -m benchmarks.bench_scenarios [--tasks 100000] [--fan-out 3]
+           [--completed 0.7] [--seed 1] [--runs 20] [--gui]
+           [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_startup import gui_startup_ms, virtual_display
+from benchmarks.generate import generate_database
+from database import Database
+from services import CodePetService
+from stats_store import StatsStore
+from task_store import SORT_ORDERS, TaskStore
+from xp_ledger import record_event
+
+
+def time_runs(fn, runs: int, warmup: int = 1) -> dict:
+    """Call ``fn`` repeatedly and summarize its wall time in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "runs": runs,
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[min(runs - 1, int(runs * 0.95))], 3),
+        "min_ms": round(timings[0], 3),
+    }
+
+
+def read_scenarios(db: Database, runs: int) -> dict:
+    """Scenarios that only read: tree loading, paging, search and statistics."""
+    store = TaskStore(db)
+    stats = StatsStore(db)
+    parents = [row[0] for row in db.execute(
+        "SELECT DISTINCT parent_id FROM tasks WHERE parent_id IS NOT NULL LIMIT 20"
+    )]
+
+    results = {
+        "tree_full": time_runs(lambda: store.load_tree(set(parents)), max(3, runs // 5)),
+        "tree_first_page": time_runs(
+            lambda: (store.load_page("newest", None, 100), store.load_subtasks(parents)), runs
+        ),
+        "search": time_runs(lambda: store.search("fix data", 50), runs),
+        "stats_panel": time_runs(lambda: (stats.daily(14), stats.weekly(2)), runs),
+    }
+    for sort in SORT_ORDERS:
+        # Ten pages deep, following the cursor like a scrolling user
+        def page_through(sort=sort):
+            cursor = None
+            for _ in range(10):
+                _, cursor = store.load_page(sort, cursor, 100)
+        results[f"pages_{sort}"] = time_runs(page_through, runs)
+    return results
+
+
+def write_scenarios(db: Database, runs: int, seed: int) -> dict:
+    """Scenarios that write: task completion and bulk XP awards."""
+    service = CodePetService(db)
+    open_ids = [row[0] for row in db.execute("SELECT id FROM tasks WHERE completed = 0")]
+    random.Random(seed).shuffle(open_ids)
+    pending = iter(open_ids)
+
+    def award_bulk_xp():
+        with db.transaction() as connection:
+            record_event(connection, 250_000, "bonus")
+            service._award_xp(connection, 250_000)
+
+    return {
+        "complete_task": time_runs(lambda: service.complete_task(next(pending)), runs),
+        "bulk_xp_award": time_runs(award_bulk_xp, runs),
+    }
+
+
+def sprite_scenarios(runs: int) -> dict:
+    """Render every evolution stage with Pillow (no display needed)."""
+    try:
+        from sprites import EVOLUTION_COLORS, render_sprite, sprite_palette
+    except ImportError as error:
+        return {"render_sprites": {"skipped": str(error)}}
+
+    def render_all():
+        for stage, color in EVOLUTION_COLORS.items():
+            render_sprite(stage, sprite_palette(color), 8, 160, 120)
+
+    return {"render_sprites": time_runs(render_all, runs)}
+
+
+def gui_scenarios(db_path: Path, runs: int) -> dict:
+    """Start the app on a copy of the database and time its startup phases."""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, XDG_DATA_HOME=tmp, HOME=tmp, LOCALAPPDATA=tmp)
+        data_dir = Path(subprocess.run(
+            [sys.executable, "-c",
+             "from platformdirs import user_data_dir; print(user_data_dir('CodePet', 'CodePet'))"],
+            env=env, check=True, capture_output=True, text=True
+        ).stdout.strip())
+        data_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copy(db_path, data_dir / "codepet.db")
+
+        with virtual_display(env) as gui_env:
+            if gui_env is None:
+                return {"gui_startup": {"skipped": "no display or Xvfb available"}}
+            return {"gui_startup": gui_startup_ms(runs, gui_env)}
+
+
+def compare(results: dict, baseline: dict) -> None:
+    """Print the median change of every scenario present in both result sets."""
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name, {})
+        if "median_ms" in current and previous.get("median_ms"):
+            change = (current["median_ms"] / previous["median_ms"] - 1) * 100
+            print(f"{name:<18} {previous['median_ms']:>10.3f} -> {current['median_ms']:>10.3f} ms"
+                  f"  {change:+6.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--fan-out", type=float, default=3)
+    parser.add_argument("--completed", type=float, default=0.7)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--gui", action="store_true", help="also time GUI startup")
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "bench.db"
+        shape = generate_database(source, args.tasks, args.fan_out, args.completed, seed=args.seed)
+
+        scenarios = {}
+        db = Database(source)
+        scenarios.update(read_scenarios(db, args.runs))
+        db.close()
+
+        # Writes go to a copy so the read scenarios of later runs are unaffected
+        scratch = Path(tmp) / "scratch.db"
+        shutil.copy(source, scratch)
+        db = Database(scratch)
+        scenarios.update(write_scenarios(db, args.runs, args.seed))
+        db.close()
+
+        scenarios.update(sprite_scenarios(args.runs))
+        if args.gui:
+            scenarios.update(gui_scenarios(source, max(1, args.runs // 5)))
+
+    results = {
+        "shape": shape,
+        "environment": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "scenarios": scenarios,
+    }
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    if args.compare:
+        compare(results, json.loads(Path(args.compare).read_text(encoding="utf-8")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Startup-time benchmark for the CLI and the GUI.
+
+Runs ``python cli.py stats`` repeatedly against a temporary data directory and
+reports the median wall time next to a bare ``python -c pass`` interpreter
+start. With --gui it also runs ``python main.py --measure-startup`` and
+reports the median import time, time to first paint and time until the task
+list is loaded (needs a display, or Xvfb to start a virtual one). Exits non-zero when a budget is exceeded or
+the CLI pulls in the GUI toolkit.
+
+Usage: python -m benchmarks.bench_startup [--runs 15] [--budget-ms 100]
+                                          [--gui] [--gui-budget-ms 1000]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Modules the headless entry point must never import
+GUI_MODULES = ("customtkinter", "tkinter", "PIL")
+
+
+def median_runtime_ms(command: list, runs: int, env: dict) -> float:
+    """Median wall time of a command in milliseconds."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=REPO_ROOT, env=env, check=True,
+                       stdout=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def has_display() -> bool:
+    """Whether a GUI can be opened (X11 needs DISPLAY; Windows/macOS always can)."""
+    return not sys.platform.startswith("linux") or bool(os.environ.get("DISPLAY"))
+
+
+@contextmanager
+def virtual_display(env: dict) -> Iterator[Optional[dict]]:
+    """Yield ``env`` with a usable display, starting Xvfb if needed.
+
+    Yields None when there is no display and Xvfb is not installed.
+    """
+    if has_display():
+        yield env
+        return
+    if shutil.which("Xvfb") is None:
+        yield None
+        return
+
+    # Xvfb picks a free display number and writes it to the given pipe
+    read_fd, write_fd = os.pipe()
+    server = subprocess.Popen(
+        ["Xvfb", "-displayfd", str(write_fd), "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+        pass_fds=(write_fd,), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    os.close(write_fd)
+    try:
+        with os.fdopen(read_fd) as pipe:
+            display = pipe.readline().strip()
+        yield dict(env, DISPLAY=f":{display}") if display else None
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def gui_startup_ms(runs: int, env: dict) -> dict:
+    """Median of each phase reported by ``main.py --measure-startup``."""
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "main.py", "--measure-startup"], cwd=REPO_ROOT, env=env,
+            check=True, capture_output=True, text=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {phase: round(statistics.median(s[phase] for s in samples), 1) for phase in samples[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=100.0,
+                        help="allowed median wall time for `cli.py stats`")
+    parser.add_argument("--gui", action="store_true", help="also measure GUI startup")
+    parser.add_argument("--gui-budget-ms", type=float, default=1000.0,
+                        help="allowed median time to first paint")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep the user's real database out of the measurement
+        env = dict(os.environ, XDG_DATA_HOME=tmp, HOME=tmp, LOCALAPPDATA=tmp)
+
+        # First run creates and migrates the database; do not time it
+        subprocess.run([sys.executable, "cli.py", "stats"], cwd=REPO_ROOT, env=env,
+                       check=True, stdout=subprocess.DEVNULL)
+
+        baseline = median_runtime_ms([sys.executable, "-c", "pass"], args.runs, env)
+        cli = median_runtime_ms([sys.executable, "cli.py", "stats"], args.runs, env)
+
+        probe = subprocess.run(
+            [sys.executable, "-c",
+             "import sys, cli; cli.main(['stats']); "
+             f"print('GUI:' + ','.join(m for m in {GUI_MODULES!r} if m in sys.modules))"],
+            cwd=REPO_ROOT, env=env, check=True, capture_output=True, text=True
+        )
+        gui_line = probe.stdout.strip().splitlines()[-1]
+        gui_imports = [m for m in gui_line[len("GUI:"):].split(",") if m]
+
+        gui = None
+        if args.gui:
+            with virtual_display(env) as gui_env:
+                if gui_env is not None:
+                    gui = gui_startup_ms(max(1, args.runs // 3), gui_env)
+                else:
+                    print("No display or Xvfb available; skipping GUI startup measurement",
+                          file=sys.stderr)
+
+    result = {
+        "interpreter_ms": round(baseline, 1),
+        "cli_stats_ms": round(cli, 1),
+        "cli_overhead_ms": round(cli - baseline, 1),
+        "budget_ms": args.budget_ms,
+        "gui_modules_imported": gui_imports,
+    }
+    if gui is not None:
+        result["gui"] = gui
+        result["gui_budget_ms"] = args.gui_budget_ms
+    print(json.dumps(result))
+
+    over_gui_budget = gui is not None and gui["first_paint_ms"] > args.gui_budget_ms
+    if gui_imports or cli > args.budget_ms or over_gui_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
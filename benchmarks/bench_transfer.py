@@ -0,0 +1,94 @@
+"""
+Throughput benchmark for streaming task import and export.
+
+Generates a task file with subtasks, imports it into a fresh database, exports
+it again and reports rows per second for each step. With --trace-memory the
+steps run under tracemalloc (much slower) to report peak Python memory.
+
+Usage: python -m benchmarks.bench_transfer [--rows 100000] [--format jsonl] [--trace-memory]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from database import Database
+from transfer import export_tasks, import_tasks
+
+
+def write_source_file(path: Path, rows: int, fmt: str, fan_out: int = 4) -> None:
+    """Write ``rows`` tasks where every (fan_out + 1)th task is a parent."""
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        if fmt == "csv":
+            handle.write("id,parent_id,title,completed,xp_value\n")
+        parent_id = None
+        for task_id in range(1, rows + 1):
+            is_parent = (task_id - 1) % (fan_out + 1) == 0
+            if is_parent:
+                parent_id = task_id
+            row = {
+                "id": task_id,
+                "parent_id": None if is_parent else parent_id,
+                "title": f"Task {task_id}",
+                "completed": task_id % 3 == 0,
+                "xp_value": 10 if is_parent else 5,
+            }
+            if fmt == "csv":
+                handle.write(f"{row['id']},{row['parent_id'] or ''},{row['title']},"
+                             f"{int(row['completed'])},{row['xp_value']}\n")
+            else:
+                handle.write(json.dumps(row) + "\n")
+
+
+def measure(label: str, rows: int, fn, trace_memory: bool = False) -> dict:
+    """Time ``fn``, optionally recording its peak traced memory."""
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    result = {
+        "step": label,
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": int(rows / elapsed) if elapsed else None,
+    }
+    line = f"{label:<8} {rows:>9} rows  {elapsed:7.2f}s  {result['rows_per_second']:>9} rows/s"
+    if trace_memory:
+        result["peak_memory_kb"] = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+        line += f"  peak {result['peak_memory_kb']} KiB"
+    print(line)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="jsonl")
+    parser.add_argument("--trace-memory", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        source = tmp / f"source.{args.format}"
+        exported = tmp / f"exported.{args.format}"
+        write_source_file(source, args.rows, args.format)
+
+        db = Database(tmp / "bench.db")
+        results = [
+            measure("import", args.rows, lambda: import_tasks(db, source), args.trace_memory),
+            measure("export", args.rows, lambda: export_tasks(db, exported), args.trace_memory),
+        ]
+
+        linked = db.execute("SELECT COUNT(*) FROM tasks WHERE parent_id IS NOT NULL").fetchone()[0]
+        db.close()
+
+    print(json.dumps({"format": args.format, "subtasks_linked": linked, "results": results}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Synthetic database generator for CodePet benchmarks.
+
+Builds a database of a configurable shape: total task count, average subtask
+fan-out (each parent gets between 0 and twice that many subtasks), share of
+completed tasks and the time span tasks were created over. The same seed
+always produces the same database, so benchmark runs can be compared.
+
+Usage: python -m benchmarks.generate OUT.db [--tasks 100000] [--fan-out 3]
+                                            [--completed 0.7] [--days 730] [--seed 1]
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+from pathlib import Path
+
+from database import Database
+from progression import level_progress, evolution_stage_for_level
+from services import SUBTASK_XP, TASK_XP
+from stats_store import backfill_daily_stats
+from sync import untracked
+
+# Rows inserted per transaction
+CHUNK_SIZE = 20_000
+
+# Words used to build searchable task titles
+WORDS = (
+    "fix", "refactor", "test", "deploy", "review", "document", "benchmark",
+    "parser", "database", "sprite", "cache", "login", "export", "import",
+    "layout", "search", "archive", "release", "bug", "feature",
+)
+
+
+def _task_rows(tasks: int, fan_out: float, completed: float, days: int, rng: random.Random):
+    """Yield (id, parent_id, title, completed, xp_value, created_at, completed_at) rows."""
+    start = datetime(2024, 1, 1)
+    span = days * 86400
+    task_id = 0
+    while task_id < tasks:
+        task_id += 1
+        parent_id = task_id
+        created = start + timedelta(seconds=rng.randrange(span))
+        children = min(rng.randint(0, int(2 * fan_out)), tasks - task_id)
+
+        rows = [(task_id, None, TASK_XP)]
+        for _ in range(children):
+            task_id += 1
+            rows.append((task_id, parent_id, SUBTASK_XP))
+
+        for row_id, row_parent, xp_value in rows:
+            done = rng.random() < completed
+            title = " ".join(rng.choice(WORDS) for _ in range(3)) + f" #{row_id}"
+            completed_at = created + timedelta(hours=rng.randrange(1, 24 * 14)) if done else None
+            yield (
+                row_id, row_parent, title, int(done), xp_value,
+                created.strftime("%Y-%m-%d %H:%M:%S"),
+                completed_at.strftime("%Y-%m-%d %H:%M:%S") if completed_at else None,
+            )
+
+
+def generate_database(path, tasks: int = 100_000, fan_out: float = 3, completed: float = 0.7,
+                      days: int = 730, seed: int = 1) -> dict:
+    """Create a database at ``path`` with the requested shape.
+
+    The pet is given the XP its completed tasks are worth, and the daily
+    statistics rollup is filled in from them.
+
+    Returns:
+        dict: Shape summary (tasks, top_level, completed, total_xp, seconds)
+    """
+    path = Path(path)
+    if path.exists():
+        raise FileExistsError(f"{path} already exists")
+
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    db = Database(path)
+    rows = _task_rows(tasks, fan_out, completed, days, rng)
+    while True:
+        chunk = list(islice(rows, CHUNK_SIZE))
+        if not chunk:
+            break
+        # Generated history is not logged for sync; uids follow the ids so the
+        # same seed still gives the same file
+        with db.transaction() as connection, untracked(connection):
+            connection.executemany(
+                "INSERT INTO tasks (id, parent_id, title, completed, xp_value, created_at, completed_at, uid) "
+                "VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, printf('gen-%d', ?1))",
+                chunk
+            )
+
+    summary = dict(db.execute("""
+        SELECT COUNT(*) AS tasks,
+               COALESCE(SUM(parent_id IS NULL), 0) AS top_level,
+               COALESCE(SUM(completed), 0) AS completed,
+               COALESCE(SUM(CASE WHEN completed THEN xp_value END), 0) AS total_xp
+        FROM tasks
+    """).fetchone())
+
+    level, current_xp, _ = level_progress(summary["total_xp"])
+    with db.transaction() as connection:
+        connection.execute(
+            "UPDATE pet_state SET total_xp = ?, current_xp = ?, level = ?, evolution_stage = ? "
+            "WHERE id = 1",
+            (summary["total_xp"], current_xp, level, evolution_stage_for_level(level))
+        )
+        # Generated history predates the XP ledger, so it is its starting snapshot
+        connection.execute(
+            "UPDATE xp_snapshots SET total_xp = ? WHERE event_id = 0", (summary["total_xp"],)
+        )
+        backfill_daily_stats(connection.cursor())
+        connection.execute("ANALYZE")
+    db.close()
+
+    summary["seconds"] = round(time.perf_counter() - started, 2)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("output", help="path of the database file to create")
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--fan-out", type=float, default=3, help="average subtasks per parent")
+    parser.add_argument("--completed", type=float, default=0.7, help="share of completed tasks")
+    parser.add_argument("--days", type=int, default=730, help="days tasks were created over")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(generate_database(args.output, args.tasks, args.fan_out, args.completed,
+                            args.days, args.seed))
+
+
+if __name__ == "__main__":
+    main()
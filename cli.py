@@ -0,0 +1,253 @@
+"""
+CodePet command-line interface.
+
+A headless entry point for scripts and git hooks. It shares the task and XP
+logic of the app through CodePetService but never imports the GUI toolkit,
+so it starts in a few tens of milliseconds and needs no display.
+
+Usage:
+    python cli.py add "Write tests" [--parent ID]
+    python cli.py complete ID
+    python cli.py list [--all]
+    python cli.py stats [--rebuild] [--as-of DATE]
+    python cli.py import FILE / python cli.py export FILE
+    python cli.py archive [--after-days DAYS]
+    python cli.py profiles [--create NAME] [--leaderboard]
+    python cli.py sync FOLDER
+
+Every command takes --profile NAME to work on another profile's database.
+"""
+
+import argparse
+import sqlite3
+import sys
+from database import get_database
+from progression import level_progress
+from services import CodePetService
+from task_store import TaskStore
+
+
+def _cmd_add(service: CodePetService, args) -> int:
+    """Add a task or subtask."""
+    if args.parent is None:
+        task_id = service.add_task(args.title)
+    else:
+        try:
+            task_id = service.add_subtask(args.parent, args.title)
+        except sqlite3.IntegrityError:
+            # The only constraint a subtask can break is its parent reference
+            print(f"No task {args.parent}", file=sys.stderr)
+            return 1
+    print(f"Added task {task_id}: {args.title}")
+    return 0
+
+
+def _cmd_complete(service: CodePetService, args) -> int:
+    """Complete a task and report XP, level-ups and evolution."""
+    result = service.complete_task(args.task_id)
+    if not result.completed_count:
+        print(f"Task {args.task_id} is already completed or does not exist.")
+        return 1
+
+    subtasks = result.completed_count - 1
+    extra = f" and {subtasks} open subtask{'s' if subtasks != 1 else ''}" if subtasks else ""
+    print(f"Completed task {args.task_id}{extra}: +{result.xp_awarded} XP")
+    if result.leveled_up:
+        print(f"LEVEL UP! Level {result.old_level} → Level {result.new_level}")
+    if result.evolved:
+        print(f"EVOLUTION! {result.old_stage.capitalize()} → {result.new_stage.capitalize()}")
+    return 0
+
+
+def _cmd_list(service: CodePetService, args) -> int:
+    """Print the task tree (open tasks only unless --all)."""
+    store = TaskStore(service.db)
+    tasks, _ = store.load_tree(())
+    # Whole trees, every level, in one query
+    subtasks = store.load_subtasks([task["id"] for task in tasks if task["child_count"]], None)
+
+    def show(task, depth):
+        if task["completed"] and not args.all:
+            return
+        print(f"{'    ' * depth}[{'x' if task['completed'] else ' '}] {task['id']:>5}  {task['title']}")
+        for subtask in subtasks.get(task["id"], []):
+            show(subtask, depth + 1)
+
+    for task in tasks:
+        show(task, 0)
+    return 0
+
+
+def _cmd_stats(service: CodePetService, args) -> int:
+    """Print pet, task and weekly statistics."""
+    from stats_store import StatsStore
+    from xp_ledger import XpLedger
+    store = StatsStore(service.db)
+    ledger = XpLedger(service.db)
+    if args.as_of:
+        try:
+            state = ledger.state_as_of(args.as_of)
+        except ValueError as error:
+            print(f"stats --as-of: {error} (use YYYY-MM-DD)", file=sys.stderr)
+            return 2
+        if state is None:
+            print(f"No XP history before {args.as_of}.")
+            return 1
+        print(f"As of {args.as_of}: Level {state['level']} ({state['evolution_stage'].capitalize()}), "
+              f"total {state['total_xp']} XP")
+        return 0
+    if args.rebuild:
+        store.rebuild()
+        service.restore_pet_xp(ledger.current_state())
+
+    pet = service.load_pet()
+    level, current_xp, xp_needed = level_progress(pet["total_xp"])
+    open_count, done_count = service.db.execute(
+        "SELECT COUNT(*) - COALESCE(SUM(completed), 0), COALESCE(SUM(completed), 0) FROM tasks"
+    ).fetchone()
+
+    print(f"{pet['name']} - Level {level} ({pet['evolution_stage'].capitalize()})")
+    print(f"XP: {current_xp}/{xp_needed} (total {pet['total_xp']})")
+    print(f"Tasks: {open_count} open, {done_count} completed")
+    last_week, this_week = store.weekly(2)
+    print(f"This week: {this_week['tasks_completed']} tasks, {this_week['xp_earned']} XP "
+          f"(last week: {last_week['tasks_completed']} tasks, {last_week['xp_earned']} XP)")
+    return 0
+
+
+def _cmd_import(service: CodePetService, args) -> int:
+    """Import tasks from a CSV or JSONL file."""
+    from transfer import import_tasks
+    count = import_tasks(service.db, args.file, args.format)
+    print(f"Imported {count} tasks from {args.file}")
+    return 0
+
+
+def _cmd_export(service: CodePetService, args) -> int:
+    """Export all tasks to a CSV or JSONL file."""
+    from transfer import export_tasks
+    count = export_tasks(service.db, args.file, args.format)
+    print(f"Exported {count} tasks to {args.file}")
+    return 0
+
+
+def _cmd_archive(service: CodePetService, args) -> int:
+    """Archive every completed task older than the configured age."""
+    from archive import TaskArchiver
+    archiver = TaskArchiver(service.db)
+    if args.after_days is not None:
+        archiver.set_archive_after_days(args.after_days or None)
+
+    days = archiver.archive_after_days()
+    if days is None:
+        print("Archiving is turned off (use --after-days to turn it on).")
+        return 0
+    count = archiver.archive_all()
+    print(f"Archived {count} tasks completed more than {days} days ago")
+    return 0
+
+
+def _cmd_sync(service: CodePetService, args) -> int:
+    """Exchange changes with other machines through a shared folder."""
+    from sync import SyncFolder
+    result = SyncFolder(service.db, args.folder).sync()
+    print(f"Sent {result['exported']} changes, received {result['imported']} "
+          f"({result['applied']} applied)")
+    return 0
+
+
+def _cmd_profiles(service: CodePetService, args) -> int:
+    """List profiles, create one, or rank every profile by XP."""
+    from profiles import get_profile_manager
+    manager = get_profile_manager()
+    if args.create:
+        try:
+            manager.create(args.create)
+        except ValueError as error:
+            print(error, file=sys.stderr)
+            return 1
+        print(f"Created profile {args.create}")
+        return 0
+
+    if args.leaderboard:
+        for rank, row in enumerate(manager.leaderboard(), start=1):
+            print(f"{rank:>3}. {row['profile']:<20} Level {row['level']:>3} "
+                  f"{row['total_xp']:>8} XP  {row['week_tasks']:>4} tasks this week  "
+                  f"({row['pet']}, {row['evolution_stage']})")
+        return 0
+
+    for name in manager.profiles():
+        print(f"{'*' if name == args.profile else ' '} {name}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser for all subcommands."""
+    parser = argparse.ArgumentParser(prog="codepet", description="Headless CodePet task tracker")
+    parser.add_argument("--profile", default="default", help="profile to work on (default: default)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="add a task")
+    add.add_argument("title")
+    add.add_argument("--parent", type=int, help="add as a subtask of this task id")
+    add.set_defaults(handler=_cmd_add)
+
+    complete = commands.add_parser("complete", help="complete a task and earn XP")
+    complete.add_argument("task_id", type=int)
+    complete.set_defaults(handler=_cmd_complete)
+
+    listing = commands.add_parser("list", help="list open tasks")
+    listing.add_argument("--all", action="store_true", help="include completed tasks")
+    listing.set_defaults(handler=_cmd_list)
+
+    stats = commands.add_parser("stats", help="show pet and task statistics")
+    stats.add_argument("--rebuild", action="store_true",
+                       help="recompute the daily rollup and the pet's XP from task and XP history")
+    stats.add_argument("--as-of", metavar="DATE",
+                       help="show the pet's level and XP at the end of DATE (YYYY-MM-DD)")
+    stats.set_defaults(handler=_cmd_stats)
+
+    for name, handler, help_text in (
+        ("import", _cmd_import, "import tasks from a CSV or JSONL file"),
+        ("export", _cmd_export, "export tasks to a CSV or JSONL file"),
+    ):
+        transfer = commands.add_parser(name, help=help_text)
+        transfer.add_argument("file")
+        transfer.add_argument("--format", choices=["csv", "jsonl"], help="defaults to the file suffix")
+        transfer.set_defaults(handler=handler)
+
+    archive = commands.add_parser("archive", help="archive old completed tasks")
+    archive.add_argument("--after-days", type=int,
+                         help="set the archive age in days (0 turns automatic archiving off)")
+    archive.set_defaults(handler=_cmd_archive)
+
+    profiles = commands.add_parser("profiles", help="list, create or rank profiles")
+    profiles.add_argument("--create", metavar="NAME", help="create a new profile")
+    profiles.add_argument("--leaderboard", action="store_true",
+                          help="rank every profile by total XP")
+    profiles.set_defaults(handler=_cmd_profiles)
+
+    sync = commands.add_parser("sync", help="exchange changes with other machines")
+    sync.add_argument("folder", help="folder shared between the machines (one per profile)")
+    sync.set_defaults(handler=_cmd_sync)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    """Entry point for the command-line interface."""
+    args = build_parser().parse_args(argv)
+    from profiles import get_profile_manager
+    try:
+        db = get_database(args.profile)
+    except KeyError as error:
+        print(f"{error.args[0]} (create it with: profiles --create NAME)", file=sys.stderr)
+        return 1
+    try:
+        return args.handler(CodePetService(db), args)
+    finally:
+        get_profile_manager().close_all()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,39 +1,542 @@
 """
 Database module for CodePet.
 
-Provides SQLite database access with singleton pattern for persistent storage
-of tasks, user profile, and pet state.
+Provides SQLite database access for persistent storage of tasks, user
+profile, and pet state. Each profile has its own database file; profiles.py
+decides which file an app or tool works on.
 """
 
+import atexit
+import queue
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
-from platformdirs import user_data_dir
+from typing import TYPE_CHECKING, Callable, Iterator, Optional
+from progression import total_xp_for_level
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+
+def _migration_base_schema(cursor: sqlite3.Cursor) -> None:
+    """Create the original tasks, user_profile and pet_state tables."""
+    # Tasks table with parent_id for subtasks
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT DEFAULT '',
+            completed INTEGER DEFAULT 0,
+            xp_value INTEGER DEFAULT 10,
+            parent_id INTEGER DEFAULT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            completed_at TIMESTAMP DEFAULT NULL,
+            FOREIGN KEY (parent_id) REFERENCES tasks(id) ON DELETE CASCADE
+        )
+    """)
+
+    # User profile table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user_profile (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            username TEXT DEFAULT 'User',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Pet state table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS pet_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            name TEXT DEFAULT 'Pet',
+            level INTEGER DEFAULT 1,
+            current_xp INTEGER DEFAULT 0,
+            evolution_stage TEXT DEFAULT 'egg',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def _migration_task_indexes(cursor: sqlite3.Cursor) -> None:
+    """Index tasks by parent in the order the task list displays them."""
+    # Serves "WHERE parent_id IS NULL ORDER BY completed, created_at DESC" and
+    # "WHERE parent_id = ?" without a scan or sort, and covers child counts
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tasks_parent_order
+        ON tasks (parent_id, completed, created_at DESC, id DESC)
+    """)
+
+
+def _migration_pet_total_xp(cursor: sqlite3.Cursor) -> None:
+    """Store total lifetime XP on the pet, backfilled from level and current XP."""
+    cursor.execute("ALTER TABLE pet_state ADD COLUMN total_xp INTEGER DEFAULT 0")
+    for row in cursor.execute("SELECT id, level, current_xp FROM pet_state").fetchall():
+        total_xp = total_xp_for_level(row[1]) + row[2]
+        cursor.execute("UPDATE pet_state SET total_xp = ? WHERE id = ?", (total_xp, row[0]))
+
+
+def _migration_task_search(cursor: sqlite3.Cursor) -> None:
+    """Add an FTS5 index over task titles and descriptions, kept in sync by triggers."""
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+            title, description,
+            content='tasks', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+            INSERT INTO tasks_fts (rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END
+    """)
+    # Completion toggles do not touch the text columns, so they skip the index
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO tasks_fts (rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+    """)
+    # Index the tasks that existed before this migration
+    cursor.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+
+
+def _migration_task_sort_indexes(cursor: sqlite3.Cursor) -> None:
+    """Index top-level tasks for the highest-XP sort order."""
+    # Oldest-first pages scan idx_tasks_parent_order backwards within one
+    # completed state, so only the XP order needs an index of its own
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tasks_parent_xp
+        ON tasks (parent_id, completed, xp_value DESC, created_at DESC, id DESC)
+    """)
+
+
+def _migration_task_archive(cursor: sqlite3.Cursor) -> None:
+    """Index archivable tasks and add the archive age setting."""
+    # Old completed top-level tasks, oldest completion first
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tasks_archivable
+        ON tasks (completed_at) WHERE parent_id IS NULL AND completed = 1
+    """)
+
+    # Days after completion before a task is archived; NULL turns archiving off
+    cursor.execute("ALTER TABLE user_profile ADD COLUMN archive_after_days INTEGER DEFAULT 90")
+
+
+def _create_archive_schema(cursor: sqlite3.Cursor) -> None:
+    """Create the tasks_archive table and its search index in the archive file."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS archive.tasks_archive (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL,
+            description TEXT DEFAULT '',
+            completed INTEGER DEFAULT 0,
+            xp_value INTEGER DEFAULT 10,
+            parent_id INTEGER DEFAULT NULL,
+            created_at TIMESTAMP,
+            completed_at TIMESTAMP,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            uid TEXT
+        )
+    """)
+    # Archive files created before tasks had a sync uid
+    columns = [row[1] for row in cursor.execute("PRAGMA archive.table_info(tasks_archive)")]
+    if "uid" not in columns:
+        cursor.execute("ALTER TABLE archive.tasks_archive ADD COLUMN uid TEXT")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS archive.idx_tasks_archive_parent_order
+        ON tasks_archive (parent_id, archived_at DESC, id DESC)
+    """)
+
+    # Archived rows are only ever inserted and deleted, never updated
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS archive.tasks_archive_fts USING fts5(
+            title, description,
+            content='tasks_archive', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS archive.tasks_archive_fts_insert AFTER INSERT ON tasks_archive BEGIN
+            INSERT INTO tasks_archive_fts (rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS archive.tasks_archive_fts_delete AFTER DELETE ON tasks_archive BEGIN
+            INSERT INTO tasks_archive_fts (tasks_archive_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END
+    """)
+
+
+def _migration_daily_stats(cursor: sqlite3.Cursor) -> None:
+    """Add the per-day completion rollup, backfilled from completed tasks."""
+    # One row per local calendar day; kept current by CodePetService
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS daily_stats (
+            day TEXT PRIMARY KEY,
+            tasks_completed INTEGER NOT NULL DEFAULT 0,
+            xp_earned INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+    # Archived tasks live in another file; StatsStore.rebuild() counts them
+    cursor.execute("""
+        INSERT OR REPLACE INTO daily_stats (day, tasks_completed, xp_earned)
+        SELECT date(completed_at, 'localtime'), COUNT(*), SUM(xp_value) FROM tasks
+        WHERE completed = 1 AND completed_at IS NOT NULL
+        GROUP BY 1
+    """)
+
+
+def _migration_xp_ledger(cursor: sqlite3.Cursor) -> None:
+    """Add the append-only XP ledger and its snapshots, starting from the current pet XP."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS xp_events (
+            id INTEGER PRIMARY KEY,
+            task_id INTEGER,
+            amount INTEGER NOT NULL,
+            reason TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    # Covers the net XP of one task when it is reopened
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_xp_events_task
+        ON xp_events (task_id, amount) WHERE task_id IS NOT NULL
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS xp_snapshots (
+            event_id INTEGER PRIMARY KEY,
+            total_xp INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    # XP earned before the ledger existed becomes the first snapshot
+    cursor.execute("""
+        INSERT OR IGNORE INTO xp_snapshots (event_id, total_xp)
+        SELECT 0, COALESCE((SELECT total_xp FROM pet_state WHERE id = 1), 0)
+    """)
+
+
+# Task columns carried by a sync change entry, keyed by uid instead of id
+_TASK_CHANGE_DATA = """
+    json_object(
+        'parent', (SELECT uid FROM tasks WHERE id = t.parent_id),
+        'title', t.title, 'description', t.description, 'completed', t.completed,
+        'xp_value', t.xp_value, 'created_at', t.created_at, 'completed_at', t.completed_at
+    )
+"""
+
+
+# Nesting depth at which tree queries stop (guards against parent cycles in
+# corrupt data)
+MAX_TREE_DEPTH = 64
+
+
+def log_task_upserts(cursor, first_id: int, last_id: int) -> int:
+    """Log one sync upsert per task with an id in a range, parents before subtasks.
+
+    For writes made with the change log paused, such as bulk imports, so
+    their tasks are logged in one statement instead of per-row triggers.
+
+    Returns:
+        int: Number of changes logged
+    """
+    cursor.execute(f"""
+        WITH RECURSIVE ranged(id, depth) AS (
+            SELECT id, 0 FROM tasks
+            WHERE id BETWEEN ?1 AND ?2
+              AND (parent_id IS NULL OR parent_id NOT BETWEEN ?1 AND ?2)
+            UNION ALL
+            SELECT c.id, r.depth + 1
+            FROM ranged r JOIN tasks c ON c.parent_id = r.id
+            WHERE r.depth < {MAX_TREE_DEPTH}
+        )
+        INSERT INTO changes (clock, entity, entity_id, op, data)
+        SELECT (SELECT clock FROM sync_state) + ROW_NUMBER() OVER (ORDER BY r.depth, t.id),
+               'task', t.uid, 'upsert', {_TASK_CHANGE_DATA}
+        FROM ranged r JOIN tasks t ON t.id = r.id
+    """, (first_id, last_id))
+    # rowcount is -1 for statements starting with WITH
+    logged = cursor.execute("SELECT changes()").fetchone()[0]
+    cursor.execute("UPDATE sync_state SET clock = clock + ?", (logged,))
+    return logged
+
+
+def _migration_sync_log(cursor: sqlite3.Cursor) -> None:
+    """Add the change log, Lamport clock and global task ids used by sync."""
+    # Ids are per file, so synced tasks are matched by uid. Existing tasks get
+    # a uid derived from their id and creation time, so two copies of one
+    # database file agree on them.
+    cursor.execute("ALTER TABLE tasks ADD COLUMN uid TEXT")
+    cursor.execute("UPDATE tasks SET uid = printf('legacy-%d-%s', id, created_at)")
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_uid ON tasks (uid)")
+
+    # Lamport clock of this file; paused is set while changes must not be logged
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sync_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            clock INTEGER NOT NULL DEFAULT 0,
+            paused INTEGER NOT NULL DEFAULT 0,
+            exported_clock INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO sync_state (id) VALUES (1)")
+
+    # device is NULL until a local change is first exported
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS changes (
+            seq INTEGER PRIMARY KEY,
+            device TEXT,
+            clock INTEGER NOT NULL,
+            entity TEXT NOT NULL,
+            entity_id TEXT NOT NULL,
+            op TEXT NOT NULL,
+            data TEXT
+        )
+    """)
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_changes_origin ON changes (device, clock)")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_changes_entity ON changes (entity_id, clock DESC, device DESC)
+    """)
+
+    # Newest clock imported from each other device
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sync_peers (
+            device TEXT PRIMARY KEY,
+            last_clock INTEGER NOT NULL
+        )
+    """)
+
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS tasks_sync_insert AFTER INSERT ON tasks
+        WHEN (SELECT paused FROM sync_state) = 0
+        BEGIN
+            UPDATE tasks SET uid = lower(hex(randomblob(16))) WHERE id = new.id AND uid IS NULL;
+            UPDATE sync_state SET clock = clock + 1;
+            INSERT INTO changes (clock, entity, entity_id, op, data)
+            SELECT s.clock, 'task', t.uid, 'upsert', {_TASK_CHANGE_DATA}
+            FROM sync_state s, tasks t WHERE t.id = new.id;
+        END
+    """)
+    # Setting the uid above is not a change of its own
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS tasks_sync_update
+        AFTER UPDATE OF title, description, completed, xp_value, parent_id, completed_at ON tasks
+        WHEN (SELECT paused FROM sync_state) = 0
+        BEGIN
+            UPDATE sync_state SET clock = clock + 1;
+            INSERT INTO changes (clock, entity, entity_id, op, data)
+            SELECT s.clock, 'task', t.uid, 'upsert', {_TASK_CHANGE_DATA}
+            FROM sync_state s, tasks t WHERE t.id = new.id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS tasks_sync_delete AFTER DELETE ON tasks
+        WHEN (SELECT paused FROM sync_state) = 0
+        BEGIN
+            UPDATE sync_state SET clock = clock + 1;
+            INSERT INTO changes (clock, entity, entity_id, op)
+            SELECT clock, 'task', old.uid, 'delete' FROM sync_state;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS xp_events_sync_insert AFTER INSERT ON xp_events
+        WHEN (SELECT paused FROM sync_state) = 0
+        BEGIN
+            UPDATE sync_state SET clock = clock + 1;
+            INSERT INTO changes (clock, entity, entity_id, op, data)
+            SELECT clock, 'xp', printf('xp-%d', new.id), 'insert', json_object(
+                'task', (SELECT uid FROM tasks WHERE id = new.task_id),
+                'amount', new.amount, 'reason', new.reason, 'created_at', new.created_at
+            ) FROM sync_state;
+        END
+    """)
+
+    # Existing tasks are sent on the first sync; earlier XP stays local
+    log_task_upserts(cursor, 1, (1 << 62))
+
+
+def _migration_sync_pending(cursor: sqlite3.Cursor) -> None:
+    """Keep synced subtasks whose parent has not arrived yet until it does.
+
+    Change files now chain per device, and the exporting device's own
+    sync_peers row holds the last clock it wrote; sync_state.exported_clock
+    is no longer read.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sync_pending (
+            uid TEXT PRIMARY KEY,
+            parent TEXT NOT NULL
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sync_pending_parent ON sync_pending (parent)")
+
+
+# Ordered schema migrations; PRAGMA user_version records how many have run.
+# Only ever append to this list - never reorder or edit shipped entries.
+MIGRATIONS = [
+    _migration_base_schema,
+    _migration_task_indexes,
+    _migration_pet_total_xp,
+    _migration_task_search,
+    _migration_task_sort_indexes,
+    _migration_task_archive,
+    _migration_daily_stats,
+    _migration_xp_ledger,
+    _migration_sync_log,
+    _migration_sync_pending,
+]
+
+
+def migrate(connection: sqlite3.Connection) -> int:
+    """Apply pending migrations in place and return the resulting schema version."""
+    version = connection.execute("PRAGMA user_version").fetchone()[0]
+
+    for index in range(version, len(MIGRATIONS)):
+        cursor = connection.cursor()
+        try:
+            cursor.execute("BEGIN")
+            MIGRATIONS[index](cursor)
+            # PRAGMA does not accept bound parameters; the value is an int
+            cursor.execute(f"PRAGMA user_version = {index + 1}")
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+
+    return len(MIGRATIONS)
+
+
+# Queue marker that asks the writer thread to flush and exit
+_STOP = object()
+
+
+class WriteBehindWriter:
+    """Writer thread that batches queued mutations into group commits.
+
+    Work items queued within ``window`` seconds of each other (up to
+    ``max_batch`` items) are applied in one transaction and made durable by a
+    single COMMIT, so many small writes share one fsync.
+    """
+
+    def __init__(self, connection: sqlite3.Connection, lock: threading.RLock,
+                 window: float = 0.05, max_batch: int = 100):
+        self._connection = connection
+        self._lock = lock
+        self._window = window
+        self._max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="codepet-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, work: Optional[Callable[[sqlite3.Connection], object]]) -> 'Future':
+        """Queue ``work(connection)`` (or a bare commit if None); resolves when durable."""
+        from concurrent.futures import Future
+        future = Future()
+        self._queue.put((work, future))
+        return future
+
+    def stop(self) -> None:
+        """Flush everything still queued and stop the writer thread."""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self) -> None:
+        """Collect batches from the queue and group-commit them."""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self._window
+            while len(batch) < self._max_batch and batch[-1] is not _STOP:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            stopping = batch[-1] is _STOP
+            self._apply([item for item in batch if item is not _STOP])
+            if stopping:
+                return
+
+    def _apply(self, batch: list) -> None:
+        """Run a batch of work items and commit them together."""
+        done = []
+        with self._lock:
+            # One transaction for the whole batch; without it each savepoint
+            # below would start and commit a transaction of its own
+            if not self._connection.in_transaction:
+                self._connection.execute("BEGIN")
+            for work, future in batch:
+                if work is None:
+                    done.append((future, None))
+                    continue
+                # A savepoint per item keeps one failure from poisoning the batch
+                self._connection.execute("SAVEPOINT codepet_write")
+                try:
+                    result = work(self._connection)
+                except Exception as error:
+                    self._connection.execute("ROLLBACK TO codepet_write")
+                    self._connection.execute("RELEASE codepet_write")
+                    future.set_exception(error)
+                    continue
+                self._connection.execute("RELEASE codepet_write")
+                done.append((future, result))
+
+            try:
+                self._connection.commit()
+            except Exception as error:
+                # A failed COMMIT can leave the transaction open; later batches start clean
+                self._connection.rollback()
+                for future, _ in done:
+                    future.set_exception(error)
+                return
+
+        for future, result in done:
+            future.set_result(result)
 
 
 class Database:
-    """Singleton database manager for CodePet."""
+    """Database manager for one CodePet database file.
 
-    _instance: Optional['Database'] = None
-    _connection: Optional[sqlite3.Connection] = None
+    Without an explicit ``db_path`` the default profile's file in the user
+    data directory is used. Use get_database() or profiles.ProfileManager to
+    share open databases instead of constructing them directly.
+    """
 
-    def __new__(cls) -> 'Database':
-        """Ensure only one instance of Database exists."""
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
+    _connection: Optional[sqlite3.Connection] = None
+    _writer: Optional[WriteBehindWriter] = None
+    _archive_attached = False
+    _profiler = None
+    _commit_error_handler = None
 
-    def __init__(self):
-        """Initialize database connection if not already connected."""
-        if self._connection is None:
-            self._connect()
-            self._create_tables()
+    def __init__(self, db_path: Optional[Path] = None):
+        """Open (creating or migrating if needed) the database file."""
+        self._db_path = Path(db_path) if db_path is not None else None
+        # Serializes use of the shared connection with the writer thread
+        self._lock = threading.RLock()
+        self._connect()
+        self._create_tables()
 
     def _get_db_path(self) -> Path:
-        """Get the database file path in user data directory."""
-        data_dir = Path(user_data_dir("CodePet", "CodePet"))
-        data_dir.mkdir(parents=True, exist_ok=True)
-        return data_dir / "codepet.db"
+        """Get the database file path (default profile unless overridden)."""
+        if self._db_path is not None:
+            return self._db_path
+        return data_dir() / "codepet.db"
 
     def _connect(self) -> None:
         """Establish database connection with WAL mode."""
@@ -46,51 +549,23 @@ class Database:
         self._connection.execute("PRAGMA foreign_keys=ON")
 
     def _create_tables(self) -> None:
-        """Create database tables if they don't exist."""
-        cursor = self._connection.cursor()
-
-        # Tasks table with parent_id for subtasks
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS tasks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                description TEXT DEFAULT '',
-                completed INTEGER DEFAULT 0,
-                xp_value INTEGER DEFAULT 10,
-                parent_id INTEGER DEFAULT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                completed_at TIMESTAMP DEFAULT NULL,
-                FOREIGN KEY (parent_id) REFERENCES tasks(id) ON DELETE CASCADE
-            )
-        """)
-
-        # User profile table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS user_profile (
-                id INTEGER PRIMARY KEY CHECK (id = 1),
-                username TEXT DEFAULT 'User',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        # Pet state table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS pet_state (
-                id INTEGER PRIMARY KEY CHECK (id = 1),
-                name TEXT DEFAULT 'Pet',
-                level INTEGER DEFAULT 1,
-                current_xp INTEGER DEFAULT 0,
-                evolution_stage TEXT DEFAULT 'egg',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        self._connection.commit()
+        """Create or upgrade database tables by applying pending migrations."""
+        self._enable_incremental_vacuum()
+        migrate(self._connection)
 
         # Initialize default records if they don't exist
         self._initialize_defaults()
 
+    def _enable_incremental_vacuum(self) -> None:
+        """Switch the file to incremental auto-vacuum so archiving can shrink it."""
+        if self._connection.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return
+        self._connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
+        # New files switch immediately; existing ones need a one-time VACUUM
+        if self._connection.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            self._connection.execute("VACUUM")
+
     def _initialize_defaults(self) -> None:
         """Create default user profile and pet state if they don't exist."""
         cursor = self._connection.cursor()
@@ -117,20 +592,291 @@ class Database:
 
     def execute(self, query: str, params: tuple = ()) -> sqlite3.Cursor:
         """Execute a query and return the cursor."""
-        return self._connection.execute(query, params)
+        with self._lock:
+            if self._profiler is None:
+                return self._connection.execute(query, params)
+            start = time.perf_counter()
+            cursor = self._connection.execute(query, params)
+            self._profiler.record_query(query, time.perf_counter() - start)
+            return cursor
 
-    def commit(self) -> None:
-        """Commit the current transaction."""
-        self._connection.commit()
+    def set_profiler(self, profiler) -> None:
+        """Report statements and query timings to ``profiler`` (None to stop).
+
+        The profiler needs ``record_statement(sql)``, called for every
+        statement SQLite runs, and ``record_query(query, seconds)``, called
+        after each ``execute``. Times cover executing the statement up to
+        its first row, not fetching the rest.
+        """
+        with self._lock:
+            self._profiler = profiler
+            self._connection.set_trace_callback(
+                profiler.record_statement if profiler is not None else None
+            )
+
+    @property
+    def write_behind(self) -> bool:
+        """Whether commits are deferred to the writer thread."""
+        return self._writer is not None
+
+    def start_write_behind(self, window: float = 0.05, max_batch: int = 100) -> None:
+        """Switch to write-behind mode.
+
+        Commits are handed to a dedicated writer thread that coalesces them
+        into group commits, so callers on the UI thread never wait for fsync.
+        Pending writes are flushed by close() and at interpreter exit.
+        """
+        if self._writer is None:
+            self._writer = WriteBehindWriter(self._connection, self._lock, window, max_batch)
+            atexit.register(self.close)
+
+    def submit(self, work: Callable[[sqlite3.Connection], object],
+               callback: Optional[Callable[['Future'], None]] = None) -> 'Future':
+        """Queue a mutation ``work(connection)`` and return a future for its result.
+
+        The future resolves once the write is durable. In write-behind mode the
+        work runs on the writer thread (as does ``callback``); otherwise it is
+        applied and committed immediately.
+        """
+        if self._writer is not None:
+            future = self._writer.submit(work)
+        else:
+            from concurrent.futures import Future
+            future = Future()
+            with self._lock:
+                try:
+                    with self._connection:
+                        future.set_result(work(self._connection))
+                except Exception as error:
+                    future.set_exception(error)
+        if callback is not None:
+            future.add_done_callback(callback)
+        return future
+
+    def commit(self) -> 'Future':
+        """Commit the current transaction.
+
+        Returns a future that resolves when the commit is durable. In
+        write-behind mode the commit is queued for the next group commit.
+        """
+        if self._writer is not None:
+            future = self._writer.submit(None)
+            future.add_done_callback(self._check_commit)
+            return future
+
+        # Imported lazily; it pulls in logging, which headless startup avoids
+        from concurrent.futures import Future
+        future = Future()
+        with self._lock:
+            self._connection.commit()
+        future.set_result(None)
+        return future
+
+    def set_commit_error_handler(self, handler: Optional[Callable[[Exception], None]]) -> None:
+        """Call ``handler(error)`` when a write-behind group commit fails (None to stop).
+
+        The handler runs on the writer thread. Without one, a failed commit
+        is only seen by whoever waits on its future.
+        """
+        self._commit_error_handler = handler
+
+    def _check_commit(self, future: 'Future') -> None:
+        """Pass the error of a failed commit to the commit error handler."""
+        error = future.exception()
+        if error is not None and self._commit_error_handler is not None:
+            self._commit_error_handler(error)
+
+    def flush(self) -> None:
+        """Block until every queued write is durable."""
+        if self._writer is not None:
+            self._writer.submit(None).result()
+
+    def archive_path(self) -> Path:
+        """Path of the archive database file kept next to the main one."""
+        db_path = self._get_db_path()
+        return db_path.with_name(f"{db_path.stem}-archive{db_path.suffix}")
+
+    def attach_archive(self) -> None:
+        """Attach the archive database as schema ``archive`` on first use."""
+        if self._archive_attached:
+            return
+
+        # ATTACH cannot run inside the transaction write-behind keeps open
+        self.flush()
+        with self._lock:
+            # Another thread may have attached it while this one flushed
+            if self._archive_attached:
+                return
+            if self._connection.in_transaction:
+                self._connection.commit()
+            self._connection.execute("ATTACH DATABASE ? AS archive", (str(self.archive_path()),))
+            with self._connection:
+                _create_archive_schema(self._connection.cursor())
+            self._archive_attached = True
+
+    def incremental_vacuum(self, max_pages: int) -> int:
+        """Return up to ``max_pages`` free pages to the file system.
+
+        Returns:
+            int: Number of pages released
+        """
+        self.flush()
+        with self._lock:
+            before = self._connection.execute("PRAGMA freelist_count").fetchone()[0]
+            # executescript steps the pragma to completion; execute frees one page
+            self._connection.executescript(f"PRAGMA incremental_vacuum({int(max_pages)})")
+            after = self._connection.execute("PRAGMA freelist_count").fetchone()[0]
+        return before - after
+
+    @contextmanager
+    def transaction(self, on_durable: Optional[Callable[['Future'], None]] = None
+                    ) -> Iterator[sqlite3.Connection]:
+        """Run a block of statements atomically with a single commit.
+
+        Takes the write lock up front (BEGIN IMMEDIATE) so read-modify-write
+        sequences inside the block cannot interleave with other writers. If a
+        transaction is already open (write-behind mode keeps one open until
+        the next group commit) the block runs in a savepoint instead.
+        ``on_durable`` is called with the commit future once it is durable.
+        """
+        with self._lock:
+            nested = self._connection.in_transaction
+            if nested:
+                self._connection.execute("SAVEPOINT codepet_txn")
+            else:
+                self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._connection
+            except BaseException:
+                if nested:
+                    self._connection.execute("ROLLBACK TO codepet_txn")
+                    self._connection.execute("RELEASE codepet_txn")
+                else:
+                    self._connection.rollback()
+                raise
+            if nested:
+                self._connection.execute("RELEASE codepet_txn")
+            future = self.commit()
+
+        if on_durable is not None:
+            future.add_done_callback(on_durable)
 
     def close(self) -> None:
-        """Close the database connection."""
+        """Flush pending writes and close the database connection."""
+        if self._writer is not None:
+            self._writer.stop()
+            self._writer = None
+            atexit.unregister(self.close)
         if self._connection:
             self._connection.close()
-            Database._connection = None
-            Database._instance = None
+            self._connection = None
+            self._archive_attached = False
+
+
+class ReadConnection:
+    """Read-only connection for background loads.
+
+    Offers the read side of Database (``execute`` and ``attach_archive``), so
+    TaskStore queries run on it unchanged. Each connection is used by one
+    thread at a time and sees the last committed state of the WAL database.
+    """
+
+    def __init__(self, db: Database):
+        self._db = db
+        self.connection = sqlite3.connect(
+            f"{db._get_db_path().resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False
+        )
+        self.connection.row_factory = sqlite3.Row
+        self._archive_attached = False
+        self._profiler = db._profiler
+        if self._profiler is not None:
+            self.connection.set_trace_callback(self._profiler.record_statement)
+
+    def execute(self, query: str, params: tuple = ()) -> sqlite3.Cursor:
+        """Execute a read query and return the cursor."""
+        if self._profiler is None:
+            return self.connection.execute(query, params)
+        start = time.perf_counter()
+        cursor = self.connection.execute(query, params)
+        self._profiler.record_query(query, time.perf_counter() - start)
+        return cursor
+
+    def attach_archive(self) -> None:
+        """Attach the archive database read-only as schema ``archive``."""
+        if self._archive_attached:
+            return
+        # The main connection creates the archive file and schema if needed
+        self._db.attach_archive()
+        self.connection.execute(
+            "ATTACH DATABASE ? AS archive",
+            (f"{self._db.archive_path().resolve().as_uri()}?mode=ro",)
+        )
+        self._archive_attached = True
+
+    def interrupt(self) -> None:
+        """Abort the query running on this connection (callable from any thread)."""
+        self.connection.interrupt()
+
+    def close(self) -> None:
+        """Close the connection."""
+        self.connection.close()
+
+
+class ReadConnectionPool:
+    """A small pool of read-only connections shared by worker threads."""
+
+    def __init__(self, db: Database, size: int = 2):
+        self.db = db
+        self._size = size
+        self._created = 0
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> ReadConnection:
+        """Take an idle connection, opening one if the pool is not full yet."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self._size:
+                self._created += 1
+                return ReadConnection(self.db)
+        return self._idle.get()
+
+    def release(self, reader: ReadConnection) -> None:
+        """Return a connection to the pool."""
+        self._idle.put(reader)
+
+    @contextmanager
+    def connection(self) -> Iterator[ReadConnection]:
+        """Borrow a connection for the duration of a block."""
+        reader = self.acquire()
+        try:
+            yield reader
+        finally:
+            self.release(reader)
+
+    def close(self) -> None:
+        """Close every idle connection (call once all workers are done)."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def data_dir() -> Path:
+    """The user data directory that holds every profile's database."""
+    # Imported here so code that opens databases by explicit path (benchmarks,
+    # tests) never loads it; the app and the CLI pay for it on their first open
+    from platformdirs import user_data_dir
+    path = Path(user_data_dir("CodePet", "CodePet"))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
 
 
-def get_database() -> Database:
-    """Get the database singleton instance."""
-    return Database()
+def get_database(profile: Optional[str] = None) -> Database:
+    """Get the shared open database of a profile (the default one if None)."""
+    from profiles import get_profile_manager
+    return get_profile_manager().open(profile)
@@ -0,0 +1,199 @@
+"""
+Opt-in performance instrumentation for CodePet.
+
+Records where time goes while the app runs:
+
+* SQL: every statement SQLite runs (via the connection's trace callback,
+  including statements run by triggers and the writer thread), plus the
+  execution time of each query issued through ``Database.execute``.
+* Phases: wall time of named UI phases such as refreshing the task list.
+* Event-loop lag: how late a periodic ``after`` heartbeat fires, which is
+  how long the Tk event loop was blocked.
+
+Instrumentation is off unless the app starts with ``--instrument``. A
+disabled instance records nothing and its phase timer is a no-op. Results
+can be shown in an on-screen overlay and written to a JSON file.
+"""
+
+import json
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+# Recent traced statements, phase runs and lag samples kept in memory
+HISTORY_SIZE = 500
+
+# Interval of the event-loop heartbeat
+HEARTBEAT_MS = 100
+
+# How often the overlay text is refreshed while it is shown
+OVERLAY_REFRESH_MS = 500
+
+# Collapses whitespace so multi-line queries aggregate under one key
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _summary(values) -> dict:
+    """Count, mean, 95th percentile and maximum of a list of milliseconds."""
+    values = sorted(values)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values), 3),
+        "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))], 3),
+        "max_ms": round(values[-1], 3),
+    }
+
+
+class Instrumentation:
+    """Collects SQL, phase and event-loop timings when enabled."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.started_at = time.perf_counter()
+        # The writer thread traces statements too
+        self._lock = threading.Lock()
+        self.queries = {}
+        self.statement_count = 0
+        self.recent_statements = deque(maxlen=HISTORY_SIZE)
+        self.phases = {}
+        self.lag_samples = deque(maxlen=HISTORY_SIZE)
+        self._heartbeat_due = None
+        self._overlay = None
+        self._overlay_after_id = None
+
+    # SQL
+
+    def attach_database(self, db) -> None:
+        """Trace every statement on ``db`` and time its ``execute`` calls."""
+        if self.enabled:
+            db.set_profiler(self)
+
+    def record_statement(self, statement: str) -> None:
+        """Trace callback: count a statement SQLite is about to run."""
+        with self._lock:
+            self.statement_count += 1
+            self.recent_statements.append(statement)
+
+    def record_query(self, query: str, seconds: float) -> None:
+        """Add the execution time of one ``Database.execute`` call."""
+        key = _WHITESPACE.sub(" ", query).strip()
+        elapsed_ms = seconds * 1000
+        with self._lock:
+            stats = self.queries.setdefault(key, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            stats["count"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+    # Phases
+
+    def phase(self, name: str):
+        """Context manager timing one run of a named phase."""
+        if not self.enabled:
+            return nullcontext()
+        return self._timed_phase(name)
+
+    @contextmanager
+    def _timed_phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            # Phases also run on loader threads
+            with self._lock:
+                self.phases.setdefault(name, deque(maxlen=HISTORY_SIZE)).append(elapsed_ms)
+
+    # Event loop
+
+    def start_heartbeat(self, widget) -> None:
+        """Measure event-loop lag with a periodic ``after`` callback on ``widget``."""
+        if not self.enabled:
+            return
+        self._heartbeat_due = time.perf_counter() + HEARTBEAT_MS / 1000
+        widget.after(HEARTBEAT_MS, lambda: self._heartbeat(widget))
+
+    def _heartbeat(self, widget) -> None:
+        now = time.perf_counter()
+        self.lag_samples.append(max(0.0, (now - self._heartbeat_due) * 1000))
+        self._heartbeat_due = now + HEARTBEAT_MS / 1000
+        widget.after(HEARTBEAT_MS, lambda: self._heartbeat(widget))
+
+    # Reporting
+
+    def snapshot(self) -> dict:
+        """All collected measurements as JSON-serializable data."""
+        with self._lock:
+            queries = {
+                query: {
+                    "count": stats["count"],
+                    "total_ms": round(stats["total_ms"], 3),
+                    "mean_ms": round(stats["total_ms"] / stats["count"], 3),
+                    "max_ms": round(stats["max_ms"], 3),
+                }
+                for query, stats in self.queries.items()
+            }
+            statement_count = self.statement_count
+            recent = list(self.recent_statements)
+            phases = {name: list(runs) for name, runs in self.phases.items()}
+
+        return {
+            "uptime_s": round(time.perf_counter() - self.started_at, 1),
+            "statements_traced": statement_count,
+            "recent_statements": recent,
+            "queries": dict(sorted(queries.items(), key=lambda item: -item[1]["total_ms"])),
+            "phases": {name: _summary(runs) for name, runs in phases.items()},
+            "event_loop_lag": _summary(self.lag_samples),
+        }
+
+    def dump(self, path) -> None:
+        """Write ``snapshot()`` to a JSON file."""
+        Path(path).write_text(json.dumps(self.snapshot(), indent=2) + "\n", encoding="utf-8")
+
+    def summary_text(self) -> str:
+        """Short multi-line summary shown by the overlay."""
+        data = self.snapshot()
+        lines = [f"SQL: {data['statements_traced']} statements"]
+        for query, stats in list(data["queries"].items())[:3]:
+            lines.append(f"  {stats['total_ms']:8.1f} ms  x{stats['count']:<5} {query[:40]}")
+        for name, stats in data["phases"].items():
+            if stats["count"]:
+                lines.append(f"{name}: {stats['mean_ms']:.1f} ms avg, {stats['max_ms']:.1f} max")
+        lag = data["event_loop_lag"]
+        if lag["count"]:
+            lines.append(f"Loop lag: p95 {lag['p95_ms']:.1f} ms, max {lag['max_ms']:.1f} ms")
+        return "\n".join(lines)
+
+    def toggle_overlay(self, master) -> None:
+        """Show or hide the on-screen summary in the top-right corner of ``master``."""
+        if not self.enabled:
+            return
+        if self._overlay is not None:
+            self._overlay.after_cancel(self._overlay_after_id)
+            self._overlay.destroy()
+            self._overlay = None
+            return
+
+        import customtkinter as ctk
+        self._overlay = ctk.CTkLabel(
+            master,
+            text="",
+            font=ctk.CTkFont(family="Courier", size=11),
+            justify="left",
+            anchor="nw",
+            fg_color=("gray80", "gray10"),
+            corner_radius=6,
+            padx=8,
+            pady=6
+        )
+        self._overlay.place(relx=1.0, x=-10, y=10, anchor="ne")
+        self._refresh_overlay()
+
+    def _refresh_overlay(self) -> None:
+        self._overlay.configure(text=self.summary_text())
+        self._overlay.lift()
+        self._overlay_after_id = self._overlay.after(OVERLAY_REFRESH_MS, self._refresh_overlay)
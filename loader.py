@@ -0,0 +1,158 @@
+"""
+Background data loading for CodePet.
+
+Reads run on worker threads, each borrowing a read-only connection from a
+ReadConnectionPool, so a slow query never blocks the Tk event loop. Tk is not
+thread-safe, so workers only put results on a queue; the Tk thread picks them
+up with a short ``after`` poll that only runs while loads are in flight.
+
+Jobs that write, such as archive passes, run on the same workers through
+``run`` so that waiting for their commits to become durable never blocks Tk.
+
+Loads are grouped by key. Starting a load supersedes any earlier load with
+the same key: a queued one is skipped, a running one has its SQLite query
+interrupted, and a late result is dropped instead of being shown.
+"""
+
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from database import ReadConnectionPool
+
+# How often the Tk thread checks for finished loads
+POLL_MS = 15
+
+
+class BackgroundLoader:
+    """Runs read queries on worker threads and delivers results to Tk."""
+
+    def __init__(self, widget, pool: ReadConnectionPool, workers: int = 2):
+        """``widget`` is the Tk root; callbacks and errors are delivered on its thread."""
+        self._widget = widget
+        self._pool = pool
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="codepet-loader")
+        self._results = queue.Queue()
+        self._lock = threading.Lock()
+        self._generations = {}
+        self._running = {}
+        self._outstanding = {}
+        self._in_flight = 0
+        self._polling = False
+
+    def load(self, key: str, query, callback) -> None:
+        """Run ``query(reader)`` on a worker and call ``callback(result)`` on Tk.
+
+        ``query`` receives a ReadConnection and must not touch widgets. Errors
+        raised by ``query`` are reported on the Tk thread like callback errors.
+        """
+        self._start(key, query, callback, True)
+
+    def run(self, key: str, work, callback) -> None:
+        """Run ``work()`` on a worker and call ``callback(result)`` on Tk.
+
+        For jobs that use the Database itself rather than a read-only
+        connection. A running job is not interrupted when superseded, but its
+        result is dropped like a load's.
+        """
+        self._start(key, work, callback, False)
+
+    def _start(self, key: str, job, callback, reads: bool) -> None:
+        """Queue a load (``reads``) or a job, superseding earlier ones with ``key``."""
+        with self._lock:
+            generation = self._generations.get(key, 0) + 1
+            self._generations[key] = generation
+            running = self._running.get(key)
+        if running is not None:
+            running.interrupt()
+
+        self._outstanding[key] = generation
+        self._in_flight += 1
+        runner = self._run if reads else self._run_job
+        self._executor.submit(runner, key, generation, job, callback)
+        if not self._polling:
+            self._polling = True
+            self._widget.after(POLL_MS, self._poll)
+
+    def pending(self, key: str) -> bool:
+        """Whether the latest load with ``key`` has not been delivered yet."""
+        return key in self._outstanding
+
+    def _is_current(self, key: str, generation: int) -> bool:
+        """Whether ``generation`` is still the latest load for ``key``."""
+        with self._lock:
+            return self._generations.get(key) == generation
+
+    def _run(self, key: str, generation: int, query, callback) -> None:
+        """Worker: run one load unless it was superseded while queued."""
+        result = error = None
+        if self._is_current(key, generation):
+            # Writes committed by the writer thread must be visible to the read
+            self._pool.db.flush()
+            with self._pool.connection() as reader:
+                with self._lock:
+                    current = self._generations.get(key) == generation
+                    if current:
+                        self._running[key] = reader
+                try:
+                    if current:
+                        result = query(reader)
+                except sqlite3.OperationalError as exc:
+                    # An interrupted (superseded) query is expected; others are not
+                    if self._is_current(key, generation):
+                        error = exc
+                except Exception as exc:
+                    error = exc
+                finally:
+                    with self._lock:
+                        if self._running.get(key) is reader:
+                            del self._running[key]
+        self._results.put((key, generation, result, error, callback))
+
+    def _run_job(self, key: str, generation: int, work, callback) -> None:
+        """Worker: run one job unless it was superseded while queued."""
+        result = error = None
+        if self._is_current(key, generation):
+            try:
+                result = work()
+            except Exception as exc:
+                error = exc
+        self._results.put((key, generation, result, error, callback))
+
+    def _poll(self) -> None:
+        """Tk thread: deliver finished loads that are still current."""
+        ready = []
+        while True:
+            try:
+                key, generation, result, error, callback = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._in_flight -= 1
+            if self._is_current(key, generation):
+                del self._outstanding[key]
+                ready.append((result, error, callback))
+
+        if self._in_flight:
+            self._widget.after(POLL_MS, self._poll)
+        else:
+            self._polling = False
+
+        for result, error, callback in ready:
+            try:
+                if error is not None:
+                    raise error
+                callback(result)
+            except Exception as exc:
+                # Report like any other Tk callback error without stopping delivery
+                self._widget.report_callback_exception(type(exc), exc, exc.__traceback__)
+
+    def close(self) -> None:
+        """Cancel outstanding loads, wait for the workers and close the pool."""
+        with self._lock:
+            for key in self._generations:
+                self._generations[key] += 1
+            running = list(self._running.values())
+        for reader in running:
+            reader.interrupt()
+        self._executor.shutdown(wait=True)
+        self._pool.close()
@@ -2,112 +2,122 @@
 CodePet - A gamified task tracker with an evolving pixel pet companion.
 
 Launch the application by running: python main.py
+Print startup timings as JSON and exit with: python main.py --measure-startup
+Record SQL, UI phase and event-loop timings with: python main.py --instrument
+(F12 toggles the overlay; --instrument-dump FILE writes JSON on exit)
+Open another profile with: python main.py --profile NAME
 """
 
-import customtkinter as ctk
-import tkinter as tk
-from database import get_database
+import time
 
+# Recorded before the heavy imports so startup measurement includes them
+_START_TIME = time.perf_counter()
 
-# Evolution stage colors for placeholder sprites
-EVOLUTION_COLORS = {
-    "egg": "#FFE4B5",      # Moccasin (pale yellow)
-    "baby": "#98FB98",     # Pale green
-    "child": "#87CEEB",    # Sky blue
-    "teen": "#DDA0DD",     # Plum (purple)
-    "adult": "#FFD700",    # Gold
-}
-
-# Evolution level thresholds: stage -> minimum level required
-EVOLUTION_LEVELS = {
-    "egg": 1,      # Starting stage
-    "baby": 2,     # Level 2
-    "child": 5,    # Level 5
-    "teen": 10,    # Level 10
-    "adult": 20,   # Level 20
-}
-
-# Ordered list of evolution stages
-EVOLUTION_ORDER = ["egg", "baby", "child", "teen", "adult"]
-
-# Evolution stage sprite patterns (simple pixel patterns)
-# Each pattern is a list of (x, y, color_key) where coordinates are relative to center
-EVOLUTION_SPRITES = {
-    "egg": [
-        # Simple oval egg shape
-        (0, -2, "outline"), (1, -2, "outline"), (-1, -2, "outline"),
-        (-2, -1, "outline"), (2, -1, "outline"),
-        (-2, 0, "outline"), (2, 0, "outline"),
-        (-2, 1, "outline"), (2, 1, "outline"),
-        (-1, 2, "outline"), (0, 2, "outline"), (1, 2, "outline"),
-        # Fill
-        (0, -1, "fill"), (1, -1, "fill"), (-1, -1, "fill"),
-        (0, 0, "fill"), (1, 0, "fill"), (-1, 0, "fill"),
-        (0, 1, "fill"), (1, 1, "fill"), (-1, 1, "fill"),
-    ],
-    "baby": [
-        # Small round creature
-        (0, -2, "fill"), (-1, -1, "fill"), (0, -1, "fill"), (1, -1, "fill"),
-        (-1, 0, "fill"), (0, 0, "fill"), (1, 0, "fill"),
-        (0, 1, "fill"),
-        # Eyes
-        (-1, -1, "eye"), (1, -1, "eye"),
-    ],
-    "child": [
-        # Slightly larger creature with ears
-        (0, -3, "fill"), (-1, -3, "fill"), (1, -3, "fill"),
-        (-2, -2, "fill"), (-1, -2, "fill"), (0, -2, "fill"), (1, -2, "fill"), (2, -2, "fill"),
-        (-2, -1, "fill"), (-1, -1, "fill"), (0, -1, "fill"), (1, -1, "fill"), (2, -1, "fill"),
-        (-1, 0, "fill"), (0, 0, "fill"), (1, 0, "fill"),
-        (-1, 1, "fill"), (1, 1, "fill"),
-        # Eyes
-        (-1, -1, "eye"), (1, -1, "eye"),
-    ],
-    "teen": [
-        # Taller creature with limbs
-        (0, -4, "fill"), (-1, -4, "fill"), (1, -4, "fill"),
-        (-2, -3, "fill"), (-1, -3, "fill"), (0, -3, "fill"), (1, -3, "fill"), (2, -3, "fill"),
-        (-2, -2, "fill"), (-1, -2, "fill"), (0, -2, "fill"), (1, -2, "fill"), (2, -2, "fill"),
-        (-1, -1, "fill"), (0, -1, "fill"), (1, -1, "fill"),
-        (-1, 0, "fill"), (0, 0, "fill"), (1, 0, "fill"),
-        (-2, 1, "fill"), (2, 1, "fill"),  # Arms
-        (-1, 2, "fill"), (1, 2, "fill"),  # Legs
-        # Eyes
-        (-1, -2, "eye"), (1, -2, "eye"),
-    ],
-    "adult": [
-        # Full-sized creature with wings/crown
-        (-2, -5, "accent"), (2, -5, "accent"),  # Crown/horns
-        (-1, -4, "fill"), (0, -4, "fill"), (1, -4, "fill"),
-        (-2, -3, "fill"), (-1, -3, "fill"), (0, -3, "fill"), (1, -3, "fill"), (2, -3, "fill"),
-        (-3, -2, "accent"), (-2, -2, "fill"), (-1, -2, "fill"), (0, -2, "fill"), (1, -2, "fill"), (2, -2, "fill"), (3, -2, "accent"),
-        (-3, -1, "accent"), (-2, -1, "fill"), (-1, -1, "fill"), (0, -1, "fill"), (1, -1, "fill"), (2, -1, "fill"), (3, -1, "accent"),
-        (-2, 0, "fill"), (-1, 0, "fill"), (0, 0, "fill"), (1, 0, "fill"), (2, 0, "fill"),
-        (-2, 1, "fill"), (-1, 1, "fill"), (0, 1, "fill"), (1, 1, "fill"), (2, 1, "fill"),
-        (-2, 2, "fill"), (2, 2, "fill"),  # Legs
-        # Eyes
-        (-1, -2, "eye"), (1, -2, "eye"),
-    ],
+import argparse
+import json
+import queue
+import customtkinter as ctk
+import tkinter as tk
+from tkinter import messagebox
+from database import ReadConnectionPool
+from loader import BackgroundLoader
+from task_list import VirtualTaskList
+from task_store import TaskStore
+from stats_store import StatsStore
+from progression import level_progress
+from services import CodePetService
+from pet_model import PetState
+from archive import TaskArchiver
+from instrumentation import Instrumentation
+from notifications import NotificationManager
+from profiles import DEFAULT_PROFILE, get_profile_manager
+
+_IMPORT_DONE_TIME = time.perf_counter()
+
+
+# Pet canvas size and sprite pixel size
+PET_CANVAS_WIDTH = 160
+PET_CANVAS_HEIGHT = 120
+PET_PIXEL_SIZE = 8
+
+# Shown when there are no tasks at all
+EMPTY_TASKS_TEXT = "No tasks yet.\nAdd a task to get started!"
+
+# Delay after the last keystroke before a search runs
+SEARCH_DEBOUNCE_MS = 250
+
+# Search results fetched per page
+SEARCH_PAGE_SIZE = 50
+
+# Top-level tasks fetched per page
+TASK_PAGE_SIZE = 100
+
+# Shown in the archive view when nothing has been archived
+EMPTY_ARCHIVE_TEXT = "No archived tasks."
+
+# First archive pass after startup, pause between full batches, and the
+# interval between checks once everything due has been archived
+ARCHIVE_START_MS = 5000
+ARCHIVE_BATCH_DELAY_MS = 250
+ARCHIVE_INTERVAL_MS = 10 * 60 * 1000
+
+# How often the Tk thread checks for failed write-behind commits
+COMMIT_ERROR_POLL_MS = 500
+
+# Days shown in the activity chart, and its size
+STATS_DAYS = 14
+STATS_CHART_WIDTH = 170
+STATS_CHART_HEIGHT = 60
+
+# Last entry of the profile menu, which creates a profile
+NEW_PROFILE_LABEL = "New profile..."
+
+# Sort menu labels mapped to TaskStore sort orders
+SORT_LABELS = {
+    "Newest": "newest",
+    "Oldest": "oldest",
+    "Highest XP": "xp",
 }
 
 
 class CodePetApp(ctk.CTk):
     """Main application window for CodePet."""
 
-    def __init__(self):
+    def __init__(self, measure_startup: bool = False, instrumentation: Instrumentation = None,
+                 instrumentation_dump=None, profile: str = DEFAULT_PROFILE):
         super().__init__()
 
-        # Initialize database
-        self.db = get_database()
+        # Opt-in timing of SQL, UI phases and event-loop lag (disabled by default)
+        self.instrumentation = instrumentation or Instrumentation()
+        self._instrumentation_dump = instrumentation_dump
+
+        # Startup phase timings (ms since process start), see _on_first_map
+        self.startup_timings = {"import_ms": (_IMPORT_DONE_TIME - _START_TIME) * 1000}
+        self._measure_startup = measure_startup
+        self._first_paint_done = False
+
+        # Failed group commits, reported by the writer thread (see _check_commit_errors)
+        self._commit_errors = queue.Queue()
+
+        # Each profile has its own database; recently used ones stay open.
+        # Resolving the data directory imports platformdirs before the first
+        # paint (about 3 ms once the toolkit is loaded); the pet state shown
+        # in the first frame needs the database
+        self.profiles = get_profile_manager()
+        self.profile = profile
+        self._open_profile_database()
 
-        # Load pet state from database
-        self.pet_state = self._load_pet_state()
+        # In-memory pet state; loaded once, then updated from service results
+        self.pet_state = PetState(self.service)
 
         # Window configuration
         self.title("CodePet")
         self.geometry("900x700")
         self.minsize(600, 400)
 
+        # Flush pending writes before the window goes away
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
         # Configure grid for responsive layout
         # Row 0 takes all vertical space
         self.grid_rowconfigure(0, weight=1)
@@ -115,36 +125,71 @@ class CodePetApp(ctk.CTk):
         self.grid_columnconfigure(0, weight=0, minsize=200)
         self.grid_columnconfigure(1, weight=1)
 
-        # Create main layout components
+        # Create main layout components; the sprite and task rows are filled in
+        # after the window has painted (see _on_first_map)
         self._create_sidebar()
         self._create_content_area()
-
-    def _load_pet_state(self) -> dict:
-        """Load pet state from database."""
-        cursor = self.db.execute("SELECT * FROM pet_state WHERE id = 1")
-        row = cursor.fetchone()
-        return dict(row) if row else {
-            "name": "Pet",
-            "level": 1,
-            "current_xp": 0,
-            "evolution_stage": "egg"
-        }
-
-    def _calculate_xp_for_level(self, level: int) -> int:
-        """Calculate XP needed to reach a given level (polynomial curve)."""
-        # XP = 50 * level^1.5 (rounded)
-        return int(50 * (level ** 1.5))
-
-    def _get_evolution_stage_for_level(self, level: int) -> str:
-        """Get the appropriate evolution stage for a given level."""
-        # Find the highest stage the pet qualifies for based on level
-        current_stage = "egg"
-        for stage in EVOLUTION_ORDER:
-            if level >= EVOLUTION_LEVELS[stage]:
-                current_stage = stage
-            else:
+        self.notifications = NotificationManager(self.content_area)
+        self.bind("<Map>", self._on_first_map, add="+")
+
+    def _on_first_map(self, event):
+        """Paint the window, then load the non-essential parts when idle."""
+        if event.widget is not self or self._first_paint_done:
+            return
+        self._first_paint_done = True
+
+        # Flush pending geometry and redraw work so the first frame is on screen
+        self.update_idletasks()
+        self.startup_timings["first_paint_ms"] = (time.perf_counter() - _START_TIME) * 1000
+        self.after_idle(self._finish_startup)
+
+    def _finish_startup(self):
+        """Second startup stage: draw the sprite and load the task list."""
+        self._draw_pet_sprite()
+        # Rows appear when the background load arrives (see _on_tasks_shown)
+        self._refresh_task_list()
+        self._refresh_stats()
+        self._schedule_archive_batch(ARCHIVE_START_MS)
+        self.after(COMMIT_ERROR_POLL_MS, self._check_commit_errors)
+
+        if self.instrumentation.enabled:
+            self.instrumentation.start_heartbeat(self)
+            self.bind("<F12>", lambda e: self.instrumentation.toggle_overlay(self))
+
+    def _report_startup(self):
+        """Print startup timings as JSON and close the window."""
+        self.startup_timings["idle_ms"] = (time.perf_counter() - _START_TIME) * 1000
+        print(json.dumps({name: round(value, 1) for name, value in self.startup_timings.items()}))
+        self._on_close()
+
+    def _open_profile_database(self):
+        """Open the current profile's database and the services built on it."""
+        # Commits are group-committed off the UI thread
+        self.db = self.profiles.open(self.profile)
+        self.db.start_write_behind()
+        self.db.set_commit_error_handler(self._commit_errors.put)
+        self.instrumentation.attach_database(self.db)
+        # Task list reads run on worker threads with read-only connections
+        self.loader = BackgroundLoader(self, ReadConnectionPool(self.db))
+        self.service = CodePetService(self.db)
+
+    def _check_commit_errors(self):
+        """Report write-behind commits that failed since the last check."""
+        while True:
+            try:
+                error = self._commit_errors.get_nowait()
+            except queue.Empty:
                 break
-        return current_stage
+            self.report_callback_exception(type(error), error, error.__traceback__)
+        self.after(COMMIT_ERROR_POLL_MS, self._check_commit_errors)
+
+    def _on_close(self):
+        """Stop background loads, flush writes, close the databases and destroy the window."""
+        self.loader.close()
+        self.profiles.close_all()
+        if self._instrumentation_dump:
+            self.instrumentation.dump(self._instrumentation_dump)
+        self.destroy()
 
     def _create_sidebar(self):
         """Create the left sidebar for pet display and stats."""
@@ -183,15 +228,19 @@ class CodePetApp(ctk.CTk):
         # Canvas for pet sprite
         self.pet_canvas = tk.Canvas(
             self.pet_frame,
-            width=160,
-            height=120,
+            width=PET_CANVAS_WIDTH,
+            height=PET_CANVAS_HEIGHT,
             bg="#333333",
             highlightthickness=0
         )
         self.pet_canvas.grid(row=0, column=0, padx=10, pady=10)
 
-        # Draw initial pet sprite
-        self._draw_pet_sprite()
+        # Sprite image item; the image is drawn once the window has painted
+        self.sprite_cache = None
+        self._sprite_image = None
+        self._sprite_item = self.pet_canvas.create_image(
+            PET_CANVAS_WIDTH // 2, PET_CANVAS_HEIGHT // 2
+        )
 
         # Pet name label
         self.pet_name_label = ctk.CTkLabel(
@@ -226,24 +275,21 @@ class CodePetApp(ctk.CTk):
         self.xp_frame.grid_columnconfigure(0, weight=1)
 
         # XP label
-        xp_needed = self._calculate_xp_for_level(self.pet_state["level"] + 1)
-        current_xp = self.pet_state["current_xp"]
         self.xp_label = ctk.CTkLabel(
             self.xp_frame,
-            text=f"XP: {current_xp}/{xp_needed}",
+            text="",
             font=ctk.CTkFont(size=11)
         )
         self.xp_label.grid(row=0, column=0, sticky="w")
 
         # XP progress bar
-        xp_progress = current_xp / xp_needed if xp_needed > 0 else 0
         self.xp_bar = ctk.CTkProgressBar(
             self.stats_frame,
             width=160,
             height=15
         )
-        self.xp_bar.set(xp_progress)
         self.xp_bar.grid(row=2, column=0, padx=10, pady=(0, 10))
+        self._update_xp_display()
 
         # Evolution stage label
         self.evolution_label = ctk.CTkLabel(
@@ -254,93 +300,193 @@ class CodePetApp(ctk.CTk):
         )
         self.evolution_label.grid(row=3, column=0, padx=10, pady=(0, 10))
 
+        # Each widget redraws only when the field it shows changes
+        self.pet_state.subscribe(
+            "name", lambda name, _: self.pet_name_label.configure(text=name)
+        )
+        self.pet_state.subscribe(
+            "level", lambda level, _: self.level_label.configure(text=f"Level {level}")
+        )
+        self.pet_state.subscribe("total_xp", lambda *_: self._update_xp_display())
+        self.pet_state.subscribe("evolution_stage", lambda *_: self._update_stage_display())
+
+        self._create_stats_panel()
+        self._create_profile_panel()
+
+    def _create_profile_panel(self):
+        """Create the profile switcher and leaderboard button."""
+        self.profile_frame = ctk.CTkFrame(self.sidebar, fg_color="transparent")
+        self.profile_frame.grid(row=5, column=0, padx=10, pady=(0, 10), sticky="ew")
+        self.profile_frame.grid_columnconfigure(0, weight=1)
+
+        self.profile_menu = ctk.CTkOptionMenu(
+            self.profile_frame,
+            values=self.profiles.profiles() + [NEW_PROFILE_LABEL],
+            command=self._on_profile_chosen
+        )
+        self.profile_menu.set(self.profile)
+        self.profile_menu.grid(row=0, column=0, sticky="ew")
+
+        self.leaderboard_btn = ctk.CTkButton(
+            self.profile_frame,
+            text="Leaderboard",
+            command=self._show_leaderboard
+        )
+        self.leaderboard_btn.grid(row=1, column=0, pady=(6, 0), sticky="ew")
+
+    def _on_profile_chosen(self, choice: str):
+        """Switch to the chosen profile, or create a new one."""
+        if choice == NEW_PROFILE_LABEL:
+            dialog = ctk.CTkInputDialog(
+                text="Profile name (lowercase letters, digits, - and _):",
+                title="New Profile"
+            )
+            name = (dialog.get_input() or "").strip().lower()
+            if not name:
+                self.profile_menu.set(self.profile)
+                return
+            try:
+                self.profiles.create(name)
+            except ValueError as error:
+                messagebox.showerror("New Profile", str(error), parent=self)
+                self.profile_menu.set(self.profile)
+                return
+            self.profile_menu.configure(values=self.profiles.profiles() + [NEW_PROFILE_LABEL])
+            self.profile_menu.set(name)
+            choice = name
+        if choice != self.profile:
+            self._switch_profile(choice)
+
+    def _switch_profile(self, name: str):
+        """Show another profile: its database, pet, tasks and activity."""
+        # Pending writes stay queued on the old database, which stays open in the LRU
+        self.loader.close()
+        self.profile = name
+        self._open_profile_database()
+        self.archiver = None
+        # The old profile's pending archive pass was dropped with its loader
+        self._schedule_archive_batch(ARCHIVE_START_MS)
+
+        self.pet_state.rebind(self.service)
+        self.expanded_tasks.clear()
+        self.top_tasks = []
+        self.subtasks = {}
+        self.search_results = []
+        self._clear_selection()
+        self._refresh_task_list()
+        self._refresh_stats()
+
+    def _show_leaderboard(self):
+        """Rank every profile by total XP in a small window."""
+        lines = [
+            f"{rank:>2}. {row['profile']:<16} Lv {row['level']:>3}  {row['total_xp']:>8} XP"
+            f"  {row['week_tasks']:>4} this week"
+            for rank, row in enumerate(self.profiles.leaderboard(), start=1)
+        ]
+        window = ctk.CTkToplevel(self)
+        window.title("Leaderboard")
+        window.transient(self)
+        ctk.CTkLabel(
+            window,
+            text="\n".join(lines),
+            font=ctk.CTkFont(family="Courier", size=13),
+            justify="left"
+        ).pack(padx=20, pady=20)
+
+    def _create_stats_panel(self):
+        """Create the activity panel: a daily bar chart and weekly totals."""
+        self.activity_frame = ctk.CTkFrame(
+            self.sidebar,
+            fg_color=("gray85", "gray20")
+        )
+        self.activity_frame.grid(row=4, column=0, padx=10, pady=(0, 10), sticky="ew")
+        self.activity_frame.grid_columnconfigure(0, weight=1)
+
+        self.activity_title = ctk.CTkLabel(
+            self.activity_frame,
+            text=f"Last {STATS_DAYS} days",
+            font=ctk.CTkFont(size=12, weight="bold")
+        )
+        self.activity_title.grid(row=0, column=0, padx=10, pady=(8, 2))
+
+        # One bar item per day, created once and only resized afterwards
+        self.activity_chart = tk.Canvas(
+            self.activity_frame,
+            width=STATS_CHART_WIDTH,
+            height=STATS_CHART_HEIGHT,
+            bg="#333333",
+            highlightthickness=0
+        )
+        self.activity_chart.grid(row=1, column=0, padx=10, pady=2)
+        slot = STATS_CHART_WIDTH / STATS_DAYS
+        self._activity_bars = [
+            self.activity_chart.create_rectangle(
+                i * slot + 1, STATS_CHART_HEIGHT, (i + 1) * slot - 1, STATS_CHART_HEIGHT,
+                fill="#4CAF50", width=0
+            )
+            for i in range(STATS_DAYS)
+        ]
+
+        self.week_label = ctk.CTkLabel(
+            self.activity_frame,
+            text="",
+            font=ctk.CTkFont(size=11),
+            justify="left",
+            text_color=("gray40", "gray70")
+        )
+        self.week_label.grid(row=2, column=0, padx=10, pady=(2, 8))
+
+    def _refresh_stats(self):
+        """Reload the activity panel from the daily rollup in the background."""
+        def query(reader):
+            store = StatsStore(reader)
+            return store.daily(STATS_DAYS), store.weekly(2)
+
+        self.loader.load("stats", query, lambda result: self._show_stats(*result))
+
+    def _show_stats(self, days: list, weeks: list):
+        """Resize the chart bars and update the weekly totals."""
+        peak = max((day["tasks_completed"] for day in days), default=0) or 1
+        slot = STATS_CHART_WIDTH / STATS_DAYS
+        for i, (bar, day) in enumerate(zip(self._activity_bars, days)):
+            top = STATS_CHART_HEIGHT - (STATS_CHART_HEIGHT - 4) * day["tasks_completed"] / peak
+            self.activity_chart.coords(bar, i * slot + 1, top, (i + 1) * slot - 1, STATS_CHART_HEIGHT)
+
+        last_week, this_week = weeks
+        self.week_label.configure(text=(
+            f"This week: {this_week['tasks_completed']} tasks, {this_week['xp_earned']} XP\n"
+            f"Last week: {last_week['tasks_completed']} tasks, {last_week['xp_earned']} XP"
+        ))
+
+    def _update_xp_display(self):
+        """Update the XP label and progress bar from total lifetime XP."""
+        _, current_xp, xp_needed = level_progress(self.pet_state["total_xp"])
+        self.xp_label.configure(text=f"XP: {current_xp}/{xp_needed}")
+        self.xp_bar.set(current_xp / xp_needed if xp_needed > 0 else 0)
+
     def _draw_pet_sprite(self):
-        """Draw the pet sprite on the canvas based on evolution stage."""
-        self.pet_canvas.delete("all")
+        """Show the cached sprite image for the current evolution stage."""
+        # Pillow is only needed from here on, so it stays out of the first paint
+        from sprites import EVOLUTION_COLORS, SpriteCache
+
+        if self.sprite_cache is None:
+            # Sprites are rasterized once per stage and reused on every redraw
+            self.sprite_cache = SpriteCache(self.pet_canvas, PET_CANVAS_WIDTH, PET_CANVAS_HEIGHT)
 
         stage = self.pet_state["evolution_stage"]
         base_color = EVOLUTION_COLORS.get(stage, "#FFFFFF")
-        sprite = EVOLUTION_SPRITES.get(stage, EVOLUTION_SPRITES["egg"])
-
-        # Calculate center of canvas
-        canvas_width = 160
-        canvas_height = 120
-        center_x = canvas_width // 2
-        center_y = canvas_height // 2
-
-        # Pixel size
-        pixel_size = 8
-
-        # Draw each pixel
-        for px, py, color_type in sprite:
-            x1 = center_x + px * pixel_size
-            y1 = center_y + py * pixel_size
-            x2 = x1 + pixel_size
-            y2 = y1 + pixel_size
-
-            if color_type == "fill":
-                color = base_color
-            elif color_type == "outline":
-                color = self._darken_color(base_color, 0.3)
-            elif color_type == "eye":
-                color = "#000000"
-            elif color_type == "accent":
-                color = self._lighten_color(base_color, 0.3)
-            else:
-                color = base_color
-
-            self.pet_canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline="")
-
-    def _darken_color(self, hex_color: str, factor: float) -> str:
-        """Darken a hex color by a factor (0-1)."""
-        hex_color = hex_color.lstrip('#')
-        r = int(hex_color[0:2], 16)
-        g = int(hex_color[2:4], 16)
-        b = int(hex_color[4:6], 16)
-
-        r = int(r * (1 - factor))
-        g = int(g * (1 - factor))
-        b = int(b * (1 - factor))
-
-        return f"#{r:02x}{g:02x}{b:02x}"
-
-    def _lighten_color(self, hex_color: str, factor: float) -> str:
-        """Lighten a hex color by a factor (0-1)."""
-        hex_color = hex_color.lstrip('#')
-        r = int(hex_color[0:2], 16)
-        g = int(hex_color[2:4], 16)
-        b = int(hex_color[4:6], 16)
-
-        r = min(255, int(r + (255 - r) * factor))
-        g = min(255, int(g + (255 - g) * factor))
-        b = min(255, int(b + (255 - b) * factor))
-
-        return f"#{r:02x}{g:02x}{b:02x}"
-
-    def update_pet_display(self):
-        """Update the pet display with current state."""
-        # Reload pet state from database
-        self.pet_state = self._load_pet_state()
-
-        # Update pet name
-        self.pet_name_label.configure(text=self.pet_state["name"])
-
-        # Update level
-        self.level_label.configure(text=f"Level {self.pet_state['level']}")
-
-        # Update XP bar
-        xp_needed = self._calculate_xp_for_level(self.pet_state["level"] + 1)
-        current_xp = self.pet_state["current_xp"]
-        self.xp_label.configure(text=f"XP: {current_xp}/{xp_needed}")
-        xp_progress = current_xp / xp_needed if xp_needed > 0 else 0
-        self.xp_bar.set(xp_progress)
+        image = self.sprite_cache.get(stage, base_color, PET_PIXEL_SIZE)
 
-        # Update evolution stage
+        # Single image swap; no per-pixel canvas items
+        if image is not self._sprite_image:
+            self.pet_canvas.itemconfigure(self._sprite_item, image=image)
+            self._sprite_image = image
+
+    def _update_stage_display(self):
+        """Update the evolution stage label and sprite."""
         self.evolution_label.configure(
             text=f"Stage: {self.pet_state['evolution_stage'].capitalize()}"
         )
-
-        # Redraw sprite
         self._draw_pet_sprite()
 
     def _create_content_area(self):
@@ -373,6 +519,39 @@ class CodePetApp(ctk.CTk):
         )
         self.content_header.grid(row=0, column=0, sticky="w")
 
+        # Search box; queries run once typing pauses
+        self.search_entry = ctk.CTkEntry(
+            self.header_frame,
+            placeholder_text="Search tasks",
+            width=200
+        )
+        self.search_entry.grid(row=0, column=1, padx=(10, 0))
+        self.search_entry.bind("<KeyRelease>", self._on_search_changed)
+        self._search_after_id = None
+        self.search_text = ""
+        self.search_results = []
+        self._search_exhausted = False
+
+        # Sort order for top-level tasks
+        self.sort_order = "newest"
+        self.sort_menu = ctk.CTkOptionMenu(
+            self.header_frame,
+            values=list(SORT_LABELS),
+            width=110,
+            command=self._on_sort_changed
+        )
+        self.sort_menu.grid(row=0, column=2, padx=(10, 0))
+
+        # Switch between live tasks and the archive
+        self.show_archive = False
+        self.archive_switch = ctk.CTkSwitch(
+            self.header_frame,
+            text="Archive",
+            width=80,
+            command=self._on_archive_toggled
+        )
+        self.archive_switch.grid(row=0, column=3, padx=(10, 0))
+
         # Add task button
         self.add_task_btn = ctk.CTkButton(
             self.header_frame,
@@ -380,7 +559,7 @@ class CodePetApp(ctk.CTk):
             width=100,
             command=self._show_add_task_dialog
         )
-        self.add_task_btn.grid(row=0, column=1, padx=(10, 0))
+        self.add_task_btn.grid(row=0, column=4, padx=(10, 0))
 
         # Task list container
         self.task_container = ctk.CTkFrame(
@@ -391,184 +570,330 @@ class CodePetApp(ctk.CTk):
         self.task_container.grid_rowconfigure(0, weight=1)
         self.task_container.grid_columnconfigure(0, weight=1)
 
-        # Scrollable frame for tasks
-        self.task_scrollable = ctk.CTkScrollableFrame(
+        # Virtualized list that keeps a fixed pool of row widgets
+        self.task_list = VirtualTaskList(
             self.task_container,
-            fg_color="transparent"
+            on_toggle_completion=self._toggle_task_completion,
+            on_toggle_expand=self._toggle_task_expand,
+            on_add_subtask=self._show_add_subtask_dialog,
+            empty_text=EMPTY_TASKS_TEXT,
+            on_near_end=self._load_more_tasks,
+            on_select=self._on_task_selected
         )
-        self.task_scrollable.grid(row=0, column=0, sticky="nsew")
-        self.task_scrollable.grid_columnconfigure(0, weight=1)
+        self.task_list.grid(row=0, column=0, sticky="nsew")
 
-        # Empty state label (shown when no tasks)
-        self.empty_state = ctk.CTkLabel(
-            self.task_scrollable,
-            text="No tasks yet.\nAdd a task to get started!",
-            font=ctk.CTkFont(size=14),
-            text_color=("gray50", "gray60")
-        )
+        # Selected task ids and the last clicked one (Shift-click extends from it)
+        self.selected_tasks = set()
+        self._selection_anchor = None
 
-        # Dictionary to store task item widgets
-        self.task_widgets = {}
+        # Bulk action bar, shown while tasks are selected
+        self.bulk_bar = ctk.CTkFrame(
+            self.content_area,
+            fg_color=("gray85", "gray20")
+        )
+        self.bulk_bar.grid(row=2, column=0, padx=20, pady=(0, 20), sticky="ew")
+        self.bulk_bar.grid_columnconfigure(0, weight=1)
+        self.selection_label = ctk.CTkLabel(self.bulk_bar, text="", anchor="w")
+        self.selection_label.grid(row=0, column=0, padx=10, pady=8, sticky="w")
+        for column, (text, command) in enumerate((
+            ("Complete", self._complete_selected),
+            ("Reopen", self._reopen_selected),
+            ("Delete", self._delete_selected),
+            ("Clear", self._clear_selection),
+        ), start=1):
+            ctk.CTkButton(self.bulk_bar, text=text, width=80, command=command).grid(
+                row=0, column=column, padx=(0, 10), pady=8
+            )
+        self.bulk_bar.grid_remove()
 
         # Set to track expanded tasks (task IDs)
         self.expanded_tasks = set()
 
-        # Initial load of tasks
+        # Loaded top-level task pages and the keyset cursor for the next one
+        self.top_tasks = []
+        self.subtasks = {}
+        self._task_cursor = None
+
+        # Created on the first idle archive pass (it attaches the archive file)
+        self.archiver = None
+        self._archive_after_id = None
+
+    def _on_search_changed(self, event=None):
+        """Restart the debounce timer whenever the search text changes."""
+        text = self.search_entry.get().strip()
+        if text == self.search_text:
+            return
+        if self._search_after_id is not None:
+            self.after_cancel(self._search_after_id)
+        self._search_after_id = self.after(SEARCH_DEBOUNCE_MS, self._run_search)
+
+    def _run_search(self):
+        """Start a new search with the current text (empty text shows all tasks)."""
+        self._search_after_id = None
+        self.search_text = self.search_entry.get().strip()
+        self.search_results = []
         self._refresh_task_list()
 
-    def _load_tasks(self) -> list:
-        """Load all top-level tasks from database (parent_id is NULL)."""
-        cursor = self.db.execute(
-            "SELECT * FROM tasks WHERE parent_id IS NULL ORDER BY completed ASC, created_at DESC"
-        )
-        return [dict(row) for row in cursor.fetchall()]
-
-    def _load_subtasks(self, parent_id: int) -> list:
-        """Load subtasks for a given parent task."""
-        cursor = self.db.execute(
-            "SELECT * FROM tasks WHERE parent_id = ? ORDER BY completed ASC, created_at DESC",
-            (parent_id,)
-        )
-        return [dict(row) for row in cursor.fetchall()]
-
-    def _has_subtasks(self, task_id: int) -> bool:
-        """Check if a task has any subtasks."""
-        cursor = self.db.execute(
-            "SELECT COUNT(*) FROM tasks WHERE parent_id = ?",
-            (task_id,)
-        )
-        return cursor.fetchone()[0] > 0
+    def _show_search_results(self):
+        """Show search results as a flat list, best match first."""
+        self.task_list.empty_state.configure(text=f"No tasks match \"{self.search_text}\".")
+        self.task_list.set_items([
+            {
+                "task": task,
+                "depth": 0 if task["parent_id"] is None else 1,
+                "has_children": False,
+                "is_expanded": False,
+                "is_selected": task["id"] in self.selected_tasks,
+            }
+            for task in self.search_results
+        ])
 
     def _refresh_task_list(self):
-        """Refresh the task list display."""
-        # Clear existing task widgets
-        for widget in self.task_widgets.values():
-            widget.destroy()
-        self.task_widgets.clear()
-
-        # Load tasks from database
-        tasks = self._load_tasks()
-
-        if not tasks:
-            # Show empty state
-            self.empty_state.grid(row=0, column=0, pady=50)
+        """Reload the shown tasks or search results in the background."""
+        self._load_tasks(append=False)
+
+    def _load_more_tasks(self):
+        """Append the next page of tasks or search results near the list end."""
+        # A reload in flight already covers the rows a new page would add
+        if self.loader.pending("tasks"):
+            return
+        if self._search_exhausted if self.search_text else self._task_cursor is None:
+            return
+        self._load_tasks(append=True)
+
+    def _load_tasks(self, append: bool):
+        """Fetch tasks for the current view on a loader thread.
+
+        The view (search text, archive switch, sort order and expanded tasks)
+        is captured here so the worker never reads widget state. Starting a
+        load cancels the previous one, so quick view changes never show stale
+        rows.
+        """
+        search_text = self.search_text
+        archived = self.show_archive
+        sort_order = self.sort_order
+        expanded = set(self.expanded_tasks)
+        instrumentation = self.instrumentation
+
+        if search_text:
+            offset = len(self.search_results) if append else 0
+            # A reload fetches as many results as were already shown
+            limit = SEARCH_PAGE_SIZE if append else max(len(self.search_results), SEARCH_PAGE_SIZE)
+
+            def query(reader):
+                with instrumentation.phase("load_tasks"):
+                    return TaskStore(reader).search(search_text, limit, offset, archived)
+
+            self.loader.load("tasks", query,
+                             lambda results: self._on_search_loaded(results, limit, append))
+            return
+
+        cursor = self._task_cursor if append else None
+        limit = TASK_PAGE_SIZE if append else max(len(self.top_tasks), TASK_PAGE_SIZE)
+
+        def query(reader):
+            with instrumentation.phase("load_tasks"):
+                store = TaskStore(reader)
+                if archived:
+                    tasks, next_cursor = store.load_archive_page(cursor, limit)
+                else:
+                    tasks, next_cursor = store.load_page(sort_order, cursor, limit)
+                expanded_ids = [task["id"] for task in tasks if task["id"] in expanded]
+                # Nested subtrees are followed only through expanded tasks
+                if archived:
+                    subtasks = store.load_archive_subtasks(expanded_ids, expanded)
+                else:
+                    subtasks = store.load_subtasks(expanded_ids, expanded)
+                return tasks, next_cursor, subtasks
+
+        self.loader.load("tasks", query, lambda result: self._on_tree_loaded(*result, append))
+
+    def _on_search_loaded(self, results: list, limit: int, append: bool):
+        """Show loaded search results (a reload or one more page)."""
+        self._search_exhausted = len(results) < limit
+        self.search_results = self.search_results + results if append else results
+        with self.instrumentation.phase("refresh_task_list"):
+            self._show_search_results()
+        self._on_tasks_shown()
+
+    def _on_tree_loaded(self, tasks: list, cursor, subtasks: dict, append: bool):
+        """Show loaded top-level tasks (a reload or one more page)."""
+        if append:
+            self.top_tasks.extend(tasks)
+            self.subtasks.update(subtasks)
+        else:
+            self.top_tasks, self.subtasks = tasks, subtasks
+        self._task_cursor = cursor
+
+        self.task_list.empty_state.configure(
+            text=EMPTY_ARCHIVE_TEXT if self.show_archive else EMPTY_TASKS_TEXT
+        )
+        with self.instrumentation.phase("refresh_task_list"):
+            self._show_task_tree()
+        self._on_tasks_shown()
+
+    def _on_tasks_shown(self):
+        """Record when the first task list load reached the screen."""
+        if "tasks_loaded_ms" in self.startup_timings:
+            return
+        self.startup_timings["tasks_loaded_ms"] = (time.perf_counter() - _START_TIME) * 1000
+        if self._measure_startup:
+            # Let the pooled rows finish filling in before reporting
+            self.after_idle(self._report_startup)
+
+    def _show_task_tree(self):
+        """Show the loaded top-level tasks with the subtrees of expanded ones."""
+        items = []
+
+        def add(task, depth):
+            is_expanded = task["id"] in self.expanded_tasks
+            items.append({
+                "task": task,
+                "depth": depth,
+                "has_children": task["child_count"] > 0,
+                "is_expanded": is_expanded,
+                "is_selected": task["id"] in self.selected_tasks,
+            })
+
+            # If task is expanded, show its subtasks (and theirs, if expanded)
+            if is_expanded:
+                for subtask in self.subtasks.get(task["id"], []):
+                    add(subtask, depth + 1)
+
+        for task in self.top_tasks:
+            add(task, 0)
+
+        self.task_list.set_items(items)
+
+    def _show_tasks(self):
+        """Redraw the loaded tasks or search results without reloading them."""
+        if self.search_text:
+            self._show_search_results()
         else:
-            # Hide empty state
-            self.empty_state.grid_forget()
-
-            # Create task items with subtask support
-            row_idx = 0
-            for task in tasks:
-                task_widget = self._create_task_item(task, row_idx)
-                self.task_widgets[task["id"]] = task_widget
-                row_idx += 1
-
-                # If task is expanded, show its subtasks
-                if task["id"] in self.expanded_tasks:
-                    subtasks = self._load_subtasks(task["id"])
-                    for subtask in subtasks:
-                        subtask_widget = self._create_task_item(subtask, row_idx, is_subtask=True)
-                        self.task_widgets[subtask["id"]] = subtask_widget
-                        row_idx += 1
-
-    def _create_task_item(self, task: dict, row: int, is_subtask: bool = False) -> ctk.CTkFrame:
-        """Create a task item widget."""
-        is_completed = bool(task["completed"])
+            self._show_task_tree()
+
+    def _on_task_selected(self, task: dict, extend: bool):
+        """Toggle a task's selection; Shift-click selects the range from the last click."""
+        if self.show_archive:
+            return
         task_id = task["id"]
-        parent_id = task.get("parent_id")
-
-        # Determine indentation for subtasks
-        left_padding = 30 if is_subtask else 0
-
-        # Task item frame
-        task_frame = ctk.CTkFrame(
-            self.task_scrollable,
-            fg_color=("gray85", "gray20") if not is_completed else ("gray80", "gray25"),
-            corner_radius=8
-        )
-        task_frame.grid(row=row, column=0, pady=5, padx=(left_padding, 0), sticky="ew")
-        task_frame.grid_columnconfigure(2, weight=1)  # Title column expands
-
-        # Column index tracker
-        col = 0
-
-        # Expand/collapse button for parent tasks with subtasks
-        if not is_subtask:
-            has_children = self._has_subtasks(task_id)
-            if has_children:
-                is_expanded = task_id in self.expanded_tasks
-                expand_text = "▼" if is_expanded else "▶"
-                expand_btn = ctk.CTkButton(
-                    task_frame,
-                    text=expand_text,
-                    font=ctk.CTkFont(size=12),
-                    text_color=("gray50", "gray60"),
-                    fg_color="transparent",
-                    hover_color=("gray75", "gray30"),
-                    width=25,
-                    height=25,
-                    command=lambda t_id=task_id: self._toggle_task_expand(t_id)
-                )
-                expand_btn.grid(row=0, column=col, padx=(5, 0), pady=10)
-            else:
-                # Spacer for alignment
-                spacer = ctk.CTkLabel(task_frame, text="", width=25)
-                spacer.grid(row=0, column=col, padx=(5, 0), pady=10)
-            col += 1
-
-        # Completion toggle button (clickable to toggle completion)
-        status_color = "#4CAF50" if is_completed else ("gray60", "gray50")
-        status_text = "✓" if is_completed else "○"
-        status_btn = ctk.CTkButton(
-            task_frame,
-            text=status_text,
-            font=ctk.CTkFont(size=16),
-            text_color=status_color,
-            fg_color="transparent",
-            hover_color=("gray75", "gray30"),
-            width=30,
-            height=30,
-            command=lambda t=task: self._toggle_task_completion(t)
-        )
-        status_btn.grid(row=0, column=col, padx=(5, 5), pady=10)
-        col += 1
-
-        # Task title - strikethrough effect for completed tasks
-        title_text = task["title"]
-        title_font = ctk.CTkFont(size=14)
-        title_color = ("gray40", "gray70") if is_completed else ("gray10", "gray90")
-
-        title_label = ctk.CTkLabel(
-            task_frame,
-            text=title_text,
-            font=title_font,
-            text_color=title_color,
-            anchor="w"
-        )
-        title_label.grid(row=0, column=col, padx=(0, 10), pady=10, sticky="w")
-
-        # Apply strikethrough styling for completed tasks using overstrike font
-        if is_completed:
-            # Create font with overstrike for strikethrough effect
-            title_label.configure(font=ctk.CTkFont(size=14, overstrike=True))
-        col += 1
-
-        # Add subtask button (only for parent tasks, not for subtasks)
-        if not is_subtask:
-            add_subtask_btn = ctk.CTkButton(
-                task_frame,
-                text="+",
-                font=ctk.CTkFont(size=14),
-                text_color=("gray50", "gray60"),
-                fg_color="transparent",
-                hover_color=("gray75", "gray30"),
-                width=25,
-                height=25,
-                command=lambda t_id=task_id: self._show_add_subtask_dialog(t_id)
-            )
-            add_subtask_btn.grid(row=0, column=col, padx=(5, 10), pady=10)
+        if extend and self._selection_anchor is not None:
+            shown = [item["task"]["id"] for item in self.task_list.items]
+            if self._selection_anchor in shown and task_id in shown:
+                start, end = sorted((shown.index(self._selection_anchor), shown.index(task_id)))
+                self.selected_tasks.update(shown[start:end + 1])
+        elif task_id in self.selected_tasks:
+            self.selected_tasks.discard(task_id)
+        else:
+            self.selected_tasks.add(task_id)
+        self._selection_anchor = task_id
+        self._on_selection_changed()
+
+    def _on_selection_changed(self):
+        """Show or hide the bulk action bar and redraw the selection highlight."""
+        if self.selected_tasks:
+            count = len(self.selected_tasks)
+            self.selection_label.configure(text=f"{count} task{'s' if count != 1 else ''} selected")
+            self.bulk_bar.grid()
+        else:
+            self.bulk_bar.grid_remove()
+        self._show_tasks()
+
+    def _clear_selection(self):
+        """Deselect every task."""
+        self.selected_tasks.clear()
+        self._selection_anchor = None
+        self._on_selection_changed()
+
+    def _complete_selected(self):
+        """Complete every selected task (and open subtasks) in one transaction."""
+        result = self.service.complete_tasks(list(self.selected_tasks))
+        self._apply_bulk_result(result)
+        if result.xp_awarded:
+            self.notifications.xp(result.xp_awarded, result.completed_count)
+        if result.leveled_up:
+            self.notifications.level_up(result.old_level, result.new_level)
+        if result.evolved:
+            self.notifications.evolution(result.old_stage, result.new_stage)
+
+    def _reopen_selected(self):
+        """Reopen every selected task in one transaction."""
+        self._apply_bulk_result(self.service.reopen_tasks(list(self.selected_tasks)))
+
+    def _delete_selected(self):
+        """Delete every selected task with its subtasks after confirmation."""
+        count = len(self.selected_tasks)
+        summary = TaskStore(self.db).subtree_summary(self.selected_tasks)
+        message = f"Delete {count} task{'s' if count != 1 else ''}"
+        descendants = summary["descendants"]
+        if descendants:
+            message += f" and {descendants} subtask{'s' if descendants != 1 else ''}"
+        if summary["open_tasks"]:
+            message += f" ({summary['open_tasks']} still open)"
+        if not messagebox.askyesno("Delete Tasks", message + "?", parent=self):
+            return
+        self.service.delete_tasks(list(self.selected_tasks))
+        self._apply_bulk_result(None)
+
+    def _apply_bulk_result(self, result):
+        """Refresh the pet, list and activity panel once after a bulk action."""
+        if result is not None:
+            with self.instrumentation.phase("update_pet_display"):
+                self.pet_state.apply(result.pet)
+        self.selected_tasks.clear()
+        self._selection_anchor = None
+        self.bulk_bar.grid_remove()
+        self._refresh_task_list()
+        self._refresh_stats()
+
+    def _on_sort_changed(self, label: str):
+        """Reload the task list from its first page in the chosen order."""
+        self.sort_order = SORT_LABELS[label]
+        self.top_tasks = []
+        self._refresh_task_list()
+
+    def _on_archive_toggled(self):
+        """Switch the list between live tasks and the archive."""
+        self.show_archive = bool(self.archive_switch.get())
+        state = "disabled" if self.show_archive else "normal"
+        self.sort_menu.configure(state=state)
+        self.add_task_btn.configure(state=state)
+        # Bulk actions apply to live tasks only
+        self.selected_tasks.clear()
+        self._selection_anchor = None
+        self.bulk_bar.grid_remove()
+
+        self.top_tasks = []
+        self.search_results = []
+        self._refresh_task_list()
+
+    def _schedule_archive_batch(self, delay_ms: int):
+        """Run the next archive batch once ``delay_ms`` passed and the UI is idle."""
+        if self._archive_after_id is not None:
+            self.after_cancel(self._archive_after_id)
+        self._archive_after_id = self.after(delay_ms, lambda: self.after_idle(self._archive_batch))
+
+    def _archiver(self) -> TaskArchiver:
+        """The current profile's archiver; created on a worker (it attaches the archive file)."""
+        if self.archiver is None:
+            self.archiver = TaskArchiver(self.db)
+        return self.archiver
+
+    def _archive_batch(self):
+        """Archive one batch of old completed tasks on a worker, then schedule the next pass."""
+        self._archive_after_id = None
+        # Copying, waiting for durability and vacuuming all stay off the Tk thread
+        self.loader.run("archive", lambda: self._archiver().archive_batch(), self._on_archived)
+
+    def _on_archived(self, count: int):
+        """Show the result of an archive batch and schedule the next pass."""
+        if count:
+            self._refresh_task_list()
 
-        return task_frame
+        # Keep going in small steps while there is a backlog
+        self._schedule_archive_batch(
+            ARCHIVE_BATCH_DELAY_MS if count >= self.archiver.batch_size else ARCHIVE_INTERVAL_MS
+        )
 
     def _show_add_task_dialog(self):
         """Show dialog for adding a new task."""
@@ -583,11 +908,7 @@ class CodePetApp(ctk.CTk):
 
     def _add_task(self, title: str):
         """Add a new task to the database and refresh the list."""
-        self.db.execute(
-            "INSERT INTO tasks (title) VALUES (?)",
-            (title,)
-        )
-        self.db.commit()
+        self.service.add_task(title)
         self._refresh_task_list()
 
     def _toggle_task_expand(self, task_id: int):
@@ -600,6 +921,10 @@ class CodePetApp(ctk.CTk):
 
     def _show_add_subtask_dialog(self, parent_id: int):
         """Show dialog for adding a subtask to a parent task."""
+        # Archived tasks are read-only until restored
+        if self.show_archive:
+            return
+
         dialog = ctk.CTkInputDialog(
             text="Enter subtask title:",
             title="Add Subtask"
@@ -612,11 +937,7 @@ class CodePetApp(ctk.CTk):
     def _add_subtask(self, parent_id: int, title: str):
         """Add a subtask to a parent task and refresh the list."""
         # Subtasks have half the XP value (5 instead of 10)
-        self.db.execute(
-            "INSERT INTO tasks (title, parent_id, xp_value) VALUES (?, ?, ?)",
-            (title, parent_id, 5)
-        )
-        self.db.commit()
+        self.service.add_subtask(parent_id, title)
 
         # Auto-expand the parent task to show the new subtask
         self.expanded_tasks.add(parent_id)
@@ -624,191 +945,36 @@ class CodePetApp(ctk.CTk):
 
     def _toggle_task_completion(self, task: dict):
         """Toggle task completion status and award XP if completing."""
-        is_completed = bool(task["completed"])
-        task_id = task["id"]
-        xp_value = task.get("xp_value", 10)
-
-        if not is_completed:
-            # Mark task as complete and award XP
-            self.db.execute(
-                "UPDATE tasks SET completed = 1, completed_at = CURRENT_TIMESTAMP WHERE id = ?",
-                (task_id,)
-            )
-            self.db.commit()
-
-            # Award XP to pet
-            self._award_xp(xp_value)
-
-            # Show XP earned notification
-            self._show_xp_notification(xp_value)
+        if self.show_archive:
+            # Archived tasks are restored (as whole trees) instead of reopened;
+            # the restore waits for durability on a worker
+            self.loader.run("restore", lambda: self._archiver().restore(task["id"]),
+                            lambda restored: self._refresh_task_list())
+            return
+
+        if not task["completed"]:
+            # Task, XP, level and evolution are committed together
+            result = self.service.complete_task(task["id"])
+            with self.instrumentation.phase("update_pet_display"):
+                self.pet_state.apply(result.pet)
+
+            # XP toasts merge; level-up and evolution are shown in turn
+            if result.xp_awarded:
+                self.notifications.xp(result.xp_awarded, result.completed_count)
+            if result.leveled_up:
+                self.notifications.level_up(result.old_level, result.new_level)
+            if result.evolved:
+                self.notifications.evolution(result.old_stage, result.new_stage)
         else:
-            # Uncomplete the task (no XP penalty)
-            self.db.execute(
-                "UPDATE tasks SET completed = 0, completed_at = NULL WHERE id = ?",
-                (task_id,)
-            )
-            self.db.commit()
+            # Reopening takes back the XP the task earned
+            result = self.service.reopen_task(task["id"])
+            with self.instrumentation.phase("update_pet_display"):
+                self.pet_state.apply(result.pet)
 
-        # Refresh task list and pet display
+        # Pet widgets were updated by their subscriptions; the list and the
+        # activity panel reload
         self._refresh_task_list()
-        self.update_pet_display()
-
-    def _award_xp(self, xp_amount: int):
-        """Award XP to the pet, check for level-up, and save to database."""
-        # Get current pet state
-        cursor = self.db.execute("SELECT * FROM pet_state WHERE id = 1")
-        pet = dict(cursor.fetchone())
-
-        current_level = pet["level"]
-        new_xp = pet["current_xp"] + xp_amount
-        new_level = current_level
-
-        # Check for level-up(s) - loop in case of multiple level-ups
-        xp_needed = self._calculate_xp_for_level(new_level + 1)
-        while new_xp >= xp_needed:
-            new_xp -= xp_needed
-            new_level += 1
-            xp_needed = self._calculate_xp_for_level(new_level + 1)
-
-        # Update pet state in database
-        self.db.execute(
-            "UPDATE pet_state SET current_xp = ?, level = ?, updated_at = CURRENT_TIMESTAMP WHERE id = 1",
-            (new_xp, new_level)
-        )
-        self.db.commit()
-
-        # Show level-up celebration if level increased
-        if new_level > current_level:
-            self._show_level_up_notification(current_level, new_level)
-
-            # Check for evolution after level-up
-            evolved, old_stage, new_stage = self._check_evolution(new_level)
-            if evolved:
-                # Delay evolution notification to appear after level-up notification
-                self.after(2600, lambda: self._show_evolution_notification(old_stage, new_stage))
-
-    def _show_xp_notification(self, xp_amount: int):
-        """Show a temporary notification for XP earned."""
-        # Create notification label
-        notification = ctk.CTkLabel(
-            self.content_area,
-            text=f"+{xp_amount} XP!",
-            font=ctk.CTkFont(size=18, weight="bold"),
-            text_color="#4CAF50",
-            fg_color=("gray85", "gray20"),
-            corner_radius=8,
-            padx=15,
-            pady=8
-        )
-        notification.place(relx=0.5, rely=0.1, anchor="center")
-
-        # Schedule notification removal after 1.5 seconds
-        self.after(1500, notification.destroy)
-
-    def _show_level_up_notification(self, old_level: int, new_level: int):
-        """Show a celebration notification for leveling up."""
-        # Create celebration frame with multiple elements
-        celebration_frame = ctk.CTkFrame(
-            self.content_area,
-            fg_color=("#FFD700", "#B8860B"),  # Gold colors
-            corner_radius=12
-        )
-        celebration_frame.place(relx=0.5, rely=0.3, anchor="center")
-
-        # Level up header
-        header_label = ctk.CTkLabel(
-            celebration_frame,
-            text="🎉 LEVEL UP! 🎉",
-            font=ctk.CTkFont(size=24, weight="bold"),
-            text_color=("#1a1a1a", "#1a1a1a")
-        )
-        header_label.grid(row=0, column=0, padx=30, pady=(20, 5))
-
-        # Level display
-        level_text = f"Level {old_level} → Level {new_level}"
-        level_label = ctk.CTkLabel(
-            celebration_frame,
-            text=level_text,
-            font=ctk.CTkFont(size=18),
-            text_color=("#333333", "#333333")
-        )
-        level_label.grid(row=1, column=0, padx=30, pady=(5, 20))
-
-        # Schedule celebration removal after 2.5 seconds
-        self.after(2500, celebration_frame.destroy)
-
-    def _check_evolution(self, new_level: int) -> tuple:
-        """Check if pet should evolve based on new level.
-
-        Returns:
-            tuple: (should_evolve: bool, old_stage: str, new_stage: str)
-        """
-        # Get current evolution stage from database
-        cursor = self.db.execute("SELECT evolution_stage FROM pet_state WHERE id = 1")
-        current_stage = cursor.fetchone()[0]
-
-        # Get the stage the pet should be at for this level
-        target_stage = self._get_evolution_stage_for_level(new_level)
-
-        # Check if evolution should occur
-        if target_stage != current_stage:
-            # Update evolution stage in database
-            self.db.execute(
-                "UPDATE pet_state SET evolution_stage = ?, updated_at = CURRENT_TIMESTAMP WHERE id = 1",
-                (target_stage,)
-            )
-            self.db.commit()
-            return (True, current_stage, target_stage)
-
-        return (False, current_stage, current_stage)
-
-    def _show_evolution_notification(self, old_stage: str, new_stage: str):
-        """Show a celebration notification for evolution."""
-        # Create evolution celebration frame
-        evolution_frame = ctk.CTkFrame(
-            self.content_area,
-            fg_color=("#9370DB", "#6A5ACD"),  # Purple colors for evolution
-            corner_radius=12
-        )
-        evolution_frame.place(relx=0.5, rely=0.5, anchor="center")
-
-        # Evolution header
-        header_label = ctk.CTkLabel(
-            evolution_frame,
-            text="✨ EVOLUTION! ✨",
-            font=ctk.CTkFont(size=28, weight="bold"),
-            text_color=("#FFFFFF", "#FFFFFF")
-        )
-        header_label.grid(row=0, column=0, padx=40, pady=(25, 10))
-
-        # Stage transition display
-        stage_text = f"{old_stage.capitalize()} → {new_stage.capitalize()}"
-        stage_label = ctk.CTkLabel(
-            evolution_frame,
-            text=stage_text,
-            font=ctk.CTkFont(size=20),
-            text_color=("#E0E0E0", "#E0E0E0")
-        )
-        stage_label.grid(row=1, column=0, padx=40, pady=(5, 10))
-
-        # Flavor text based on new stage
-        flavor_texts = {
-            "baby": "Your pet has hatched!",
-            "child": "Your pet is growing up!",
-            "teen": "Your pet is maturing!",
-            "adult": "Your pet is fully evolved!"
-        }
-        flavor_text = flavor_texts.get(new_stage, "Your pet evolved!")
-        flavor_label = ctk.CTkLabel(
-            evolution_frame,
-            text=flavor_text,
-            font=ctk.CTkFont(size=14),
-            text_color=("#D0D0D0", "#D0D0D0")
-        )
-        flavor_label.grid(row=2, column=0, padx=40, pady=(0, 25))
-
-        # Schedule evolution notification removal after 3 seconds
-        self.after(3000, evolution_frame.destroy)
+        self._refresh_stats()
 
 
 def main():
@@ -817,8 +983,25 @@ def main():
     ctk.set_appearance_mode("Dark")
     ctk.set_default_color_theme("blue")
     
+    parser = argparse.ArgumentParser(description="CodePet task tracker")
+    parser.add_argument("--measure-startup", action="store_true",
+                        help="print startup timings as JSON and exit")
+    parser.add_argument("--instrument", action="store_true",
+                        help="record SQL, UI phase and event-loop timings (F12 shows them)")
+    parser.add_argument("--instrument-dump", metavar="FILE",
+                        help="write the recorded timings to FILE on exit (implies --instrument)")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, help="profile to open")
+    args = parser.parse_args()
+    if not get_profile_manager().exists(args.profile):
+        parser.error(f"no profile named {args.profile!r} (create it from the sidebar menu)")
+
     # Create and run the application
-    app = CodePetApp()
+    app = CodePetApp(
+        measure_startup=args.measure_startup,
+        instrumentation=Instrumentation(enabled=args.instrument or bool(args.instrument_dump)),
+        instrumentation_dump=args.instrument_dump,
+        profile=args.profile,
+    )
     app.mainloop()
 
 
@@ -0,0 +1,179 @@
+"""
+On-screen notifications for CodePet.
+
+Toasts are built once per kind and reused: showing one only changes its text
+and places it, hiding it only unplaces it, so bursts of events never create or
+destroy widgets.
+
+XP awards that arrive while the XP toast is up are merged into it ("+120 XP
+from 12 tasks") and keep it up a little longer. Level-ups and evolutions are
+queued and shown one after another, each as soon as the previous one has
+finished; back-to-back events of the same kind collapse into one
+("Level 3 → Level 7").
+"""
+
+from collections import deque
+import customtkinter as ctk
+
+
+# How long each kind of notification stays on screen
+XP_TOAST_MS = 1500
+LEVEL_UP_MS = 2500
+EVOLUTION_MS = 3000
+
+# Flavor text shown under an evolution, by new stage
+EVOLUTION_FLAVOR = {
+    "baby": "Your pet has hatched!",
+    "child": "Your pet is growing up!",
+    "teen": "Your pet is maturing!",
+    "adult": "Your pet is fully evolved!",
+}
+
+
+class NotificationManager:
+    """Shows XP toasts and level-up/evolution celebrations over ``master``."""
+
+    def __init__(self, master):
+        self._master = master
+
+        # XP burst currently on screen: total XP and number of tasks
+        self._xp_total = 0
+        self._xp_tasks = 0
+        self._xp_toast = None
+        self._xp_after_id = None
+
+        # Pending celebrations as [kind, old, new]; the head is on screen
+        self._celebrations = deque()
+        self._level_widget = None
+        self._evolution_widget = None
+
+    # XP toasts
+
+    def xp(self, amount: int, tasks: int = 1) -> None:
+        """Show XP earned, merged into the toast already on screen."""
+        self._xp_total += amount
+        self._xp_tasks += tasks
+        if self._xp_toast is None:
+            self._xp_toast = ctk.CTkLabel(
+                self._master,
+                font=ctk.CTkFont(size=18, weight="bold"),
+                text_color="#4CAF50",
+                fg_color=("gray85", "gray20"),
+                corner_radius=8,
+                padx=15,
+                pady=8
+            )
+
+        text = f"+{self._xp_total} XP!"
+        if self._xp_tasks > 1:
+            text = f"+{self._xp_total} XP from {self._xp_tasks} tasks!"
+        self._xp_toast.configure(text=text)
+
+        if self._xp_after_id is None:
+            self._xp_toast.place(relx=0.5, rely=0.1, anchor="center")
+            self._xp_toast.lift()
+        else:
+            self._master.after_cancel(self._xp_after_id)
+        self._xp_after_id = self._master.after(XP_TOAST_MS, self._hide_xp)
+
+    def _hide_xp(self) -> None:
+        """End the current XP burst."""
+        self._xp_after_id = None
+        self._xp_total = self._xp_tasks = 0
+        self._xp_toast.place_forget()
+
+    # Celebrations
+
+    def level_up(self, old_level: int, new_level: int) -> None:
+        """Queue a level-up celebration."""
+        self._queue_celebration("level_up", old_level, new_level)
+
+    def evolution(self, old_stage: str, new_stage: str) -> None:
+        """Queue an evolution celebration (shown after earlier level-ups)."""
+        self._queue_celebration("evolution", old_stage, new_stage)
+
+    def _queue_celebration(self, kind: str, old, new) -> None:
+        """Append a celebration, collapsing it into a waiting one of the same kind."""
+        # The head is already on screen, so only waiting entries are merged
+        if len(self._celebrations) > 1 and self._celebrations[-1][0] == kind:
+            self._celebrations[-1][2] = new
+            return
+        self._celebrations.append([kind, old, new])
+        if len(self._celebrations) == 1:
+            self._show_celebration()
+
+    def _show_celebration(self) -> None:
+        """Put the head of the queue on screen and schedule the next one."""
+        kind, old, new = self._celebrations[0]
+        if kind == "level_up":
+            frame = self._level_up_frame()
+            frame.detail.configure(text=f"Level {old} → Level {new}")
+            frame.place(relx=0.5, rely=0.3, anchor="center")
+            duration = LEVEL_UP_MS
+        else:
+            frame = self._evolution_frame()
+            frame.detail.configure(text=f"{old.capitalize()} → {new.capitalize()}")
+            frame.flavor.configure(text=EVOLUTION_FLAVOR.get(new, "Your pet evolved!"))
+            frame.place(relx=0.5, rely=0.5, anchor="center")
+            duration = EVOLUTION_MS
+        frame.lift()
+        self._master.after(duration, lambda: self._finish_celebration(frame))
+
+    def _finish_celebration(self, frame) -> None:
+        """Hide the finished celebration and show the next queued one."""
+        frame.place_forget()
+        self._celebrations.popleft()
+        if self._celebrations:
+            self._show_celebration()
+
+    def _level_up_frame(self):
+        """The reusable level-up frame, built on first use."""
+        if self._level_widget is None:
+            frame = ctk.CTkFrame(
+                self._master,
+                fg_color=("#FFD700", "#B8860B"),  # Gold colors
+                corner_radius=12
+            )
+            ctk.CTkLabel(
+                frame,
+                text="🎉 LEVEL UP! 🎉",
+                font=ctk.CTkFont(size=24, weight="bold"),
+                text_color=("#1a1a1a", "#1a1a1a")
+            ).grid(row=0, column=0, padx=30, pady=(20, 5))
+            frame.detail = ctk.CTkLabel(
+                frame,
+                font=ctk.CTkFont(size=18),
+                text_color=("#333333", "#333333")
+            )
+            frame.detail.grid(row=1, column=0, padx=30, pady=(5, 20))
+            self._level_widget = frame
+        return self._level_widget
+
+    def _evolution_frame(self):
+        """The reusable evolution frame, built on first use."""
+        if self._evolution_widget is None:
+            frame = ctk.CTkFrame(
+                self._master,
+                fg_color=("#9370DB", "#6A5ACD"),  # Purple colors for evolution
+                corner_radius=12
+            )
+            ctk.CTkLabel(
+                frame,
+                text="✨ EVOLUTION! ✨",
+                font=ctk.CTkFont(size=28, weight="bold"),
+                text_color=("#FFFFFF", "#FFFFFF")
+            ).grid(row=0, column=0, padx=40, pady=(25, 10))
+            frame.detail = ctk.CTkLabel(
+                frame,
+                font=ctk.CTkFont(size=20),
+                text_color=("#E0E0E0", "#E0E0E0")
+            )
+            frame.detail.grid(row=1, column=0, padx=40, pady=(5, 10))
+            frame.flavor = ctk.CTkLabel(
+                frame,
+                font=ctk.CTkFont(size=14),
+                text_color=("#D0D0D0", "#D0D0D0")
+            )
+            frame.flavor.grid(row=2, column=0, padx=40, pady=(0, 25))
+            self._evolution_widget = frame
+        return self._evolution_widget
@@ -0,0 +1,50 @@
+"""
+In-memory pet state model for CodePet.
+
+PetState is the authoritative copy of the pet_state row while the app runs.
+It is loaded once from the database, updated from the results returned by
+CodePetService, and notifies subscribers per field so each widget only
+redraws when the value it shows actually changed.
+"""
+
+from services import CodePetService
+
+
+class PetState:
+    """Pet state with field-level change notifications."""
+
+    def __init__(self, service: CodePetService):
+        self._service = service
+        self._values = service.load_pet()
+        self._subscribers = {}
+
+    def __getitem__(self, field: str):
+        """Get the current value of a field."""
+        return self._values[field]
+
+    def subscribe(self, field: str, callback) -> None:
+        """Call ``callback(new_value, old_value)`` whenever ``field`` changes."""
+        self._subscribers.setdefault(field, []).append(callback)
+
+    def apply(self, values: dict) -> set:
+        """Merge new values, notify subscribers of changed fields and return them."""
+        changed = {
+            field for field, value in values.items()
+            if self._values.get(field) != value
+        }
+        old_values = self._values
+        self._values = {**old_values, **values}
+
+        for field in changed:
+            for callback in self._subscribers.get(field, ()):
+                callback(self._values[field], old_values.get(field))
+        return changed
+
+    def rebind(self, service: CodePetService) -> set:
+        """Follow another profile's service and show its pet."""
+        self._service = service
+        return self.reload()
+
+    def reload(self) -> set:
+        """Re-read the pet_state row (e.g. after another process changed it)."""
+        return self.apply(self._service.load_pet())
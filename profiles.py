@@ -0,0 +1,193 @@
+"""
+Profiles for CodePet.
+
+Every profile has its own tasks and pet in its own SQLite file (plus its own
+archive file next to it). The "default" profile is the original
+``codepet.db``; other profiles live in a ``profiles`` directory beside it.
+
+ProfileManager opens profile databases on demand and keeps the most recently
+used ones open in a small LRU, so switching back and forth between profiles
+does not reopen, re-migrate or re-warm a file each time. The least recently
+used database is flushed and closed when the LRU is full.
+
+Leaderboards read every profile file through ATTACH on a scratch connection,
+a few files at a time, so only one summary row per profile reaches Python.
+"""
+
+import re
+import sqlite3
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+from database import MIGRATIONS, Database, data_dir
+
+
+# Name of the profile stored in the original codepet.db
+DEFAULT_PROFILE = "default"
+
+# Profile databases kept open at once
+MAX_OPEN_PROFILES = 4
+
+# Profile files attached per leaderboard query (SQLite allows 10 by default)
+ATTACH_BATCH = 8
+
+# Profile names double as file names
+_PROFILE_NAME = re.compile(r"^[a-z0-9][a-z0-9_-]{0,39}$")
+
+# Suffix of the archive file kept next to each profile's database
+_ARCHIVE_SUFFIX = "-archive"
+
+# One summary row for the profile attached as schema {schema}
+_LEADERBOARD_ROW = """
+    SELECT ? AS profile, p.name AS pet, p.level, p.total_xp, p.evolution_stage,
+           (SELECT COALESCE(SUM(tasks_completed), 0) FROM {schema}.daily_stats
+            WHERE day >= date('now', 'localtime', '-6 days')) AS week_tasks,
+           (SELECT COALESCE(SUM(tasks_completed), 0) FROM {schema}.daily_stats) AS total_tasks
+    FROM {schema}.pet_state p WHERE p.id = 1
+"""
+
+
+class ProfileManager:
+    """Opens profile databases on demand and keeps an LRU of open ones."""
+
+    def __init__(self, root: Optional[Path] = None, max_open: int = MAX_OPEN_PROFILES):
+        self.root = Path(root) if root is not None else data_dir()
+        self.max_open = max_open
+        self._open = OrderedDict()
+
+    def path(self, name: str) -> Path:
+        """Database file of a profile (the profile need not exist yet)."""
+        if name == DEFAULT_PROFILE:
+            return self.root / "codepet.db"
+        return self.root / "profiles" / f"{name}.db"
+
+    def profiles(self) -> list:
+        """Names of every existing profile, the default one first."""
+        names = sorted(
+            path.stem for path in (self.root / "profiles").glob("*.db")
+            if not path.stem.endswith(_ARCHIVE_SUFFIX)
+        )
+        return [DEFAULT_PROFILE] + [name for name in names if name != DEFAULT_PROFILE]
+
+    def exists(self, name: str) -> bool:
+        """Whether a profile has a database file (the default one always exists)."""
+        return name == DEFAULT_PROFILE or self.path(name).exists()
+
+    def create(self, name: str) -> Database:
+        """Create a new profile and return its database.
+
+        The profile's username and pet name start out as the profile name.
+        """
+        if not _PROFILE_NAME.match(name):
+            raise ValueError(
+                f"Invalid profile name {name!r}: use up to 40 lowercase letters, digits, - and _"
+            )
+        if name.endswith(_ARCHIVE_SUFFIX):
+            # <name>-archive.db is the archive file of profile <name>
+            raise ValueError(f"Profile names cannot end in {_ARCHIVE_SUFFIX!r}")
+        if self.exists(name):
+            raise ValueError(f"Profile {name!r} already exists")
+        self.path(name).parent.mkdir(parents=True, exist_ok=True)
+        db = self._remember(name, Database(self.path(name)))
+        with db.transaction() as connection:
+            connection.execute("UPDATE user_profile SET username = ? WHERE id = 1", (name,))
+            connection.execute("UPDATE pet_state SET name = ? WHERE id = 1", (name.capitalize(),))
+        return db
+
+    def open(self, name: Optional[str] = None) -> Database:
+        """Return the open database of a profile, opening it if needed."""
+        name = name or DEFAULT_PROFILE
+        db = self._open.get(name)
+        if db is not None:
+            self._open.move_to_end(name)
+            return db
+        if not self.exists(name):
+            raise KeyError(f"No profile named {name!r}")
+        return self._remember(name, Database(self.path(name)))
+
+    def _remember(self, name: str, db: Database) -> Database:
+        """Add a newly opened database to the LRU, closing the least recently used."""
+        self._open[name] = db
+        # Evicted databases flush their pending writes as they close
+        while len(self._open) > self.max_open:
+            _, evicted = self._open.popitem(last=False)
+            evicted.close()
+        return db
+
+    def close(self, name: str) -> None:
+        """Flush and close one profile's database if it is open."""
+        db = self._open.pop(name, None)
+        if db is not None:
+            db.close()
+
+    def close_all(self) -> None:
+        """Flush and close every open profile database."""
+        while self._open:
+            _, db = self._open.popitem(last=False)
+            db.close()
+
+    def leaderboard(self) -> list:
+        """Rank every profile by total XP.
+
+        Returns:
+            list: Dicts with profile, pet, level, total_xp, evolution_stage,
+                  week_tasks (last 7 days) and total_tasks, best first
+        """
+        # Attached files only see committed data
+        for db in self._open.values():
+            db.flush()
+
+        # Files last opened by an older version need their migrations first;
+        # they are opened outside the LRU so no open profile gets evicted
+        names = self.profiles()
+        for name in names:
+            if name in self._open:
+                continue
+            if not self.path(name).exists() or self._schema_version(name) < len(MIGRATIONS):
+                Database(self.path(name)).close()
+
+        rows = []
+        scratch = sqlite3.connect(":memory:", uri=True)
+        scratch.row_factory = sqlite3.Row
+        try:
+            for start in range(0, len(names), ATTACH_BATCH):
+                batch = names[start:start + ATTACH_BATCH]
+                for index, name in enumerate(batch):
+                    scratch.execute(
+                        f"ATTACH DATABASE ? AS p{index}", (self._read_only_uri(name),)
+                    )
+                query = " UNION ALL ".join(
+                    _LEADERBOARD_ROW.format(schema=f"p{index}") for index in range(len(batch))
+                )
+                rows.extend(dict(row) for row in scratch.execute(query, batch))
+                for index in range(len(batch)):
+                    scratch.execute(f"DETACH DATABASE p{index}")
+        finally:
+            scratch.close()
+
+        rows.sort(key=lambda row: (-row["total_xp"], row["profile"]))
+        return rows
+
+    def _read_only_uri(self, name: str) -> str:
+        """SQLite URI that opens a profile file read-only."""
+        return f"{self.path(name).resolve().as_uri()}?mode=ro"
+
+    def _schema_version(self, name: str) -> int:
+        """Migration version of a profile file, read without opening it for writing."""
+        connection = sqlite3.connect(self._read_only_uri(name), uri=True)
+        try:
+            return connection.execute("PRAGMA user_version").fetchone()[0]
+        finally:
+            connection.close()
+
+
+# Manager behind get_database(); created on first use
+_manager: Optional[ProfileManager] = None
+
+
+def get_profile_manager() -> ProfileManager:
+    """The process-wide profile manager."""
+    global _manager
+    if _manager is None:
+        _manager = ProfileManager()
+    return _manager
@@ -0,0 +1,80 @@
+"""
+XP, level and evolution progression for CodePet.
+
+The pet stores its total lifetime XP. Level and in-level progress are derived
+from a precomputed table of cumulative level thresholds with a binary search,
+so the cost does not depend on how many levels are gained at once.
+"""
+
+from bisect import bisect_right
+
+
+# Evolution level thresholds: stage -> minimum level required
+EVOLUTION_LEVELS = {
+    "egg": 1,      # Starting stage
+    "baby": 2,     # Level 2
+    "child": 5,    # Level 5
+    "teen": 10,    # Level 10
+    "adult": 20,   # Level 20
+}
+
+# Ordered list of evolution stages
+EVOLUTION_ORDER = ["egg", "baby", "child", "teen", "adult"]
+
+# Levels covered by the initial threshold table; it grows on demand
+_INITIAL_TABLE_LEVELS = 256
+
+# _thresholds[i] is the total XP needed to reach level i + 1
+_thresholds = [0]
+
+
+def xp_to_next_level(level: int) -> int:
+    """XP needed to go from ``level`` to ``level + 1`` (polynomial curve)."""
+    # XP = 50 * (level + 1)^1.5 (rounded down)
+    return int(50 * ((level + 1) ** 1.5))
+
+
+def _extend_table(max_level: int) -> None:
+    """Extend the cumulative threshold table to cover ``max_level``."""
+    while len(_thresholds) < max_level:
+        level = len(_thresholds)
+        _thresholds.append(_thresholds[-1] + xp_to_next_level(level))
+
+
+def total_xp_for_level(level: int) -> int:
+    """Total lifetime XP needed to reach a level."""
+    _extend_table(level)
+    return _thresholds[level - 1]
+
+
+def level_for_total_xp(total_xp: int) -> int:
+    """Level reached with a given total lifetime XP."""
+    while _thresholds[-1] <= total_xp:
+        _extend_table(len(_thresholds) * 2)
+    return bisect_right(_thresholds, total_xp)
+
+
+def level_progress(total_xp: int) -> tuple:
+    """Split total lifetime XP into level and in-level progress.
+
+    Returns:
+        tuple: (level: int, current_xp: int, xp_needed: int) where
+               ``current_xp`` is the XP earned towards the next level
+    """
+    level = level_for_total_xp(total_xp)
+    return level, total_xp - _thresholds[level - 1], xp_to_next_level(level)
+
+
+def evolution_stage_for_level(level: int) -> str:
+    """Get the appropriate evolution stage for a given level."""
+    # Find the highest stage the pet qualifies for based on level
+    current_stage = "egg"
+    for stage in EVOLUTION_ORDER:
+        if level >= EVOLUTION_LEVELS[stage]:
+            current_stage = stage
+        else:
+            break
+    return current_stage
+
+
+_extend_table(_INITIAL_TABLE_LEVELS)
@@ -0,0 +1,262 @@
+"""
+Task and pet services for CodePet.
+
+Applies user actions on top of Database as single transactions. Completing a
+task updates the task row, XP, level and evolution stage atomically with one
+commit, and returns the resulting pet state so callers never re-query it.
+Every XP change is also appended to the XP ledger (see xp_ledger) in that
+same commit.
+"""
+
+import json
+from typing import NamedTuple
+from database import Database
+from progression import evolution_stage_for_level, level_progress
+from stats_store import RECORD_COMPLETIONS, backfill_daily_stats
+from task_store import MAX_TREE_DEPTH
+from xp_ledger import record_task_awards, reverse_task_awards, snapshot_if_due
+
+
+# XP awarded for top-level tasks and subtasks
+TASK_XP = 10
+SUBTASK_XP = 5
+
+# Pet state used when the pet_state row is missing
+DEFAULT_PET_STATE = {
+    "name": "Pet",
+    "level": 1,
+    "current_xp": 0,
+    "total_xp": 0,
+    "evolution_stage": "egg",
+}
+
+
+# Open tasks in the subtrees rooted at a JSON array of task ids (roots included)
+OPEN_SUBTREE = f"""
+    WITH RECURSIVE subtree(id, depth) AS (
+        SELECT value, 0 FROM json_each(?1)
+        UNION ALL
+        SELECT c.id, s.depth + 1
+        FROM subtree s
+        JOIN tasks c ON c.parent_id = s.id
+        WHERE s.depth < {MAX_TREE_DEPTH}
+    )
+    SELECT t.id FROM subtree s JOIN tasks t ON t.id = s.id WHERE t.completed = 0
+"""
+
+# Completed tasks among a JSON array of task ids
+COMPLETED_SELECTION = """
+    SELECT id FROM tasks WHERE id IN (SELECT value FROM json_each(?1)) AND completed = 1
+"""
+
+
+class CompletionResult(NamedTuple):
+    """Outcome of completing (or reopening) a task."""
+
+    task_id: int
+    xp_awarded: int
+    pet: dict
+    old_level: int
+    new_level: int
+    old_stage: str
+    new_stage: str
+    completed_count: int = 0
+
+    @property
+    def leveled_up(self) -> bool:
+        """Whether the completion raised the pet's level."""
+        return self.new_level > self.old_level
+
+    @property
+    def evolved(self) -> bool:
+        """Whether the completion moved the pet to a new evolution stage."""
+        return self.new_stage != self.old_stage
+
+
+class CodePetService:
+    """Transactional task and XP operations shared by every front end."""
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    def load_pet(self) -> dict:
+        """Load pet state from database."""
+        row = self.db.execute("SELECT * FROM pet_state WHERE id = 1").fetchone()
+        return dict(row) if row else dict(DEFAULT_PET_STATE)
+
+    def add_task(self, title: str) -> int:
+        """Add a new top-level task and return its id."""
+        with self.db.transaction() as connection:
+            cursor = connection.execute(
+                "INSERT INTO tasks (title, xp_value) VALUES (?, ?)",
+                (title, TASK_XP)
+            )
+        return cursor.lastrowid
+
+    def add_subtask(self, parent_id: int, title: str) -> int:
+        """Add a subtask (worth partial XP) to a parent task and return its id."""
+        with self.db.transaction() as connection:
+            cursor = connection.execute(
+                "INSERT INTO tasks (title, parent_id, xp_value) VALUES (?, ?, ?)",
+                (title, parent_id, SUBTASK_XP)
+            )
+        return cursor.lastrowid
+
+    def complete_task(self, task_id: int) -> CompletionResult:
+        """Complete a task and all of its open descendants in one transaction.
+
+        The XP of every task completed is rolled up into one award. Completing
+        an already completed task with no open descendants (or a missing
+        task) awards nothing.
+        """
+        return self.complete_tasks([task_id])._replace(task_id=task_id)
+
+    def complete_tasks(self, task_ids: list) -> CompletionResult:
+        """Complete several tasks and all of their open descendants in one transaction.
+
+        Every statement is set-based over the whole selection, and the combined
+        XP is awarded once. ``task_id`` of the result is None.
+        """
+        selection = (json.dumps(list(task_ids)),)
+        with self.db.transaction() as connection:
+            # Roll up the XP, then complete the same set in one statement
+            completed_count, xp_value = connection.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(xp_value), 0) FROM tasks "
+                f"WHERE id IN ({OPEN_SUBTREE})",
+                selection
+            ).fetchone()
+            if completed_count:
+                # One ledger event per task, so each award can be reversed
+                record_task_awards(connection, OPEN_SUBTREE, selection)
+                connection.execute(
+                    f"UPDATE tasks SET completed = 1, completed_at = CURRENT_TIMESTAMP "
+                    f"WHERE id IN ({OPEN_SUBTREE})",
+                    selection
+                )
+                # Today's rollup row changes in the same commit
+                connection.execute(
+                    RECORD_COMPLETIONS,
+                    (self._today(connection), completed_count, xp_value)
+                )
+
+            old_pet, new_pet = self._award_xp(connection, xp_value)
+
+        return self._result(None, xp_value, old_pet, new_pet, completed_count)
+
+    def reopen_task(self, task_id: int) -> CompletionResult:
+        """Mark a completed task as not completed and take back the XP it earned.
+
+        The XP is reversed with a negative ledger event, so the pet can lose
+        levels. Tasks completed before the XP ledger existed are reopened
+        without an XP change. The task is also taken out of the daily rollup
+        of the day it was completed.
+        """
+        return self.reopen_tasks([task_id])._replace(task_id=task_id)
+
+    def reopen_tasks(self, task_ids: list) -> CompletionResult:
+        """Reopen several completed tasks in one transaction (see reopen_task).
+
+        Subtasks are not reopened with their parents. ``completed_count`` of
+        the result is the number of tasks reopened and ``xp_awarded`` is
+        negative (or 0).
+        """
+        selection = (json.dumps(list(task_ids)),)
+        with self.db.transaction() as connection:
+            reopened = connection.execute(
+                f"SELECT COUNT(*) FROM ({COMPLETED_SELECTION})", selection
+            ).fetchone()[0]
+            xp_value = 0
+            if reopened:
+                backfill_daily_stats(
+                    connection.cursor(), where=f"id IN ({COMPLETED_SELECTION})",
+                    params=selection, sign=-1
+                )
+                xp_value = -reverse_task_awards(connection, COMPLETED_SELECTION, selection)
+                connection.execute(
+                    f"UPDATE tasks SET completed = 0, completed_at = NULL "
+                    f"WHERE id IN ({COMPLETED_SELECTION})",
+                    selection
+                )
+
+            old_pet, new_pet = self._award_xp(connection, xp_value)
+
+        return self._result(None, xp_value, old_pet, new_pet, reopened)
+
+    def delete_tasks(self, task_ids: list) -> int:
+        """Delete several tasks with their subtrees in one transaction.
+
+        XP already earned is kept, as is the task history in the ledger and
+        the daily rollup.
+
+        Returns:
+            int: Number of selected tasks deleted (subtasks not counted)
+        """
+        with self.db.transaction() as connection:
+            # Subtasks go with their parents through ON DELETE CASCADE
+            cursor = connection.execute(
+                "DELETE FROM tasks WHERE id IN (SELECT value FROM json_each(?))",
+                (json.dumps(list(task_ids)),)
+            )
+        return cursor.rowcount
+
+    @staticmethod
+    def _result(task_id, xp_value: int, old_pet: dict, new_pet: dict,
+                count: int) -> CompletionResult:
+        """Build a CompletionResult from the pet before and after an award."""
+        return CompletionResult(
+            task_id=task_id,
+            xp_awarded=xp_value,
+            pet=new_pet,
+            old_level=old_pet["level"],
+            new_level=new_pet["level"],
+            old_stage=old_pet["evolution_stage"],
+            new_stage=new_pet["evolution_stage"],
+            completed_count=count,
+        )
+
+    def restore_pet_xp(self, values: dict) -> dict:
+        """Overwrite the pet's XP, level and stage (e.g. with state replayed from the ledger)."""
+        with self.db.transaction() as connection:
+            connection.execute(
+                "UPDATE pet_state SET total_xp = ?, current_xp = ?, level = ?, "
+                "evolution_stage = ?, updated_at = CURRENT_TIMESTAMP WHERE id = 1",
+                (values["total_xp"], values["current_xp"], values["level"],
+                 values["evolution_stage"])
+            )
+        return self.load_pet()
+
+    @staticmethod
+    def _today(connection) -> str:
+        """Local calendar day of CURRENT_TIMESTAMP, as the rollup keys it."""
+        return connection.execute("SELECT date('now', 'localtime')").fetchone()[0]
+
+    def _award_xp(self, connection, xp_amount: int) -> tuple:
+        """Add (or, if negative, remove) XP and apply level and evolution changes.
+
+        Must run inside an open transaction, after the matching ledger events
+        were appended; a ledger snapshot is taken here when one is due.
+
+        Returns:
+            tuple: (old_pet: dict, new_pet: dict)
+        """
+        row = connection.execute("SELECT * FROM pet_state WHERE id = 1").fetchone()
+        old_pet = dict(row) if row else dict(DEFAULT_PET_STATE)
+        if xp_amount == 0:
+            return old_pet, old_pet
+
+        new_pet = dict(old_pet)
+        new_pet["total_xp"] = old_pet["total_xp"] + xp_amount
+        new_pet["level"], new_pet["current_xp"], _ = level_progress(new_pet["total_xp"])
+
+        # Evolution is only checked when the level changes
+        if new_pet["level"] != old_pet["level"]:
+            new_pet["evolution_stage"] = evolution_stage_for_level(new_pet["level"])
+
+        connection.execute(
+            "UPDATE pet_state SET total_xp = ?, current_xp = ?, level = ?, "
+            "evolution_stage = ?, updated_at = CURRENT_TIMESTAMP WHERE id = 1",
+            (new_pet["total_xp"], new_pet["current_xp"], new_pet["level"],
+             new_pet["evolution_stage"])
+        )
+        snapshot_if_due(connection, new_pet["total_xp"])
+        return old_pet, new_pet
@@ -0,0 +1,162 @@
+"""
+Pet sprite rendering for CodePet.
+
+Each evolution stage is rasterized once into a Pillow image and cached as a
+PhotoImage keyed by stage, palette and scale, so redrawing the pet is a single
+image swap instead of one canvas rectangle per sprite pixel.
+"""
+
+from PIL import Image, ImageDraw, ImageTk
+
+
+# Evolution stage colors for placeholder sprites
+EVOLUTION_COLORS = {
+    "egg": "#FFE4B5",      # Moccasin (pale yellow)
+    "baby": "#98FB98",     # Pale green
+    "child": "#87CEEB",    # Sky blue
+    "teen": "#DDA0DD",     # Plum (purple)
+    "adult": "#FFD700",    # Gold
+}
+
+# Evolution stage sprite patterns (simple pixel patterns)
+# Each pattern is a list of (x, y, color_key) where coordinates are relative to center
+EVOLUTION_SPRITES = {
+    "egg": [
+        # Simple oval egg shape
+        (0, -2, "outline"), (1, -2, "outline"), (-1, -2, "outline"),
+        (-2, -1, "outline"), (2, -1, "outline"),
+        (-2, 0, "outline"), (2, 0, "outline"),
+        (-2, 1, "outline"), (2, 1, "outline"),
+        (-1, 2, "outline"), (0, 2, "outline"), (1, 2, "outline"),
+        # Fill
+        (0, -1, "fill"), (1, -1, "fill"), (-1, -1, "fill"),
+        (0, 0, "fill"), (1, 0, "fill"), (-1, 0, "fill"),
+        (0, 1, "fill"), (1, 1, "fill"), (-1, 1, "fill"),
+    ],
+    "baby": [
+        # Small round creature
+        (0, -2, "fill"), (-1, -1, "fill"), (0, -1, "fill"), (1, -1, "fill"),
+        (-1, 0, "fill"), (0, 0, "fill"), (1, 0, "fill"),
+        (0, 1, "fill"),
+        # Eyes
+        (-1, -1, "eye"), (1, -1, "eye"),
+    ],
+    "child": [
+        # Slightly larger creature with ears
+        (0, -3, "fill"), (-1, -3, "fill"), (1, -3, "fill"),
+        (-2, -2, "fill"), (-1, -2, "fill"), (0, -2, "fill"), (1, -2, "fill"), (2, -2, "fill"),
+        (-2, -1, "fill"), (-1, -1, "fill"), (0, -1, "fill"), (1, -1, "fill"), (2, -1, "fill"),
+        (-1, 0, "fill"), (0, 0, "fill"), (1, 0, "fill"),
+        (-1, 1, "fill"), (1, 1, "fill"),
+        # Eyes
+        (-1, -1, "eye"), (1, -1, "eye"),
+    ],
+    "teen": [
+        # Taller creature with limbs
+        (0, -4, "fill"), (-1, -4, "fill"), (1, -4, "fill"),
+        (-2, -3, "fill"), (-1, -3, "fill"), (0, -3, "fill"), (1, -3, "fill"), (2, -3, "fill"),
+        (-2, -2, "fill"), (-1, -2, "fill"), (0, -2, "fill"), (1, -2, "fill"), (2, -2, "fill"),
+        (-1, -1, "fill"), (0, -1, "fill"), (1, -1, "fill"),
+        (-1, 0, "fill"), (0, 0, "fill"), (1, 0, "fill"),
+        (-2, 1, "fill"), (2, 1, "fill"),  # Arms
+        (-1, 2, "fill"), (1, 2, "fill"),  # Legs
+        # Eyes
+        (-1, -2, "eye"), (1, -2, "eye"),
+    ],
+    "adult": [
+        # Full-sized creature with wings/crown
+        (-2, -5, "accent"), (2, -5, "accent"),  # Crown/horns
+        (-1, -4, "fill"), (0, -4, "fill"), (1, -4, "fill"),
+        (-2, -3, "fill"), (-1, -3, "fill"), (0, -3, "fill"), (1, -3, "fill"), (2, -3, "fill"),
+        (-3, -2, "accent"), (-2, -2, "fill"), (-1, -2, "fill"), (0, -2, "fill"), (1, -2, "fill"), (2, -2, "fill"), (3, -2, "accent"),
+        (-3, -1, "accent"), (-2, -1, "fill"), (-1, -1, "fill"), (0, -1, "fill"), (1, -1, "fill"), (2, -1, "fill"), (3, -1, "accent"),
+        (-2, 0, "fill"), (-1, 0, "fill"), (0, 0, "fill"), (1, 0, "fill"), (2, 0, "fill"),
+        (-2, 1, "fill"), (-1, 1, "fill"), (0, 1, "fill"), (1, 1, "fill"), (2, 1, "fill"),
+        (-2, 2, "fill"), (2, 2, "fill"),  # Legs
+        # Eyes
+        (-1, -2, "eye"), (1, -2, "eye"),
+    ],
+}
+
+
+def darken_color(hex_color: str, factor: float) -> str:
+    """Darken a hex color by a factor (0-1)."""
+    hex_color = hex_color.lstrip('#')
+    r = int(hex_color[0:2], 16)
+    g = int(hex_color[2:4], 16)
+    b = int(hex_color[4:6], 16)
+
+    r = int(r * (1 - factor))
+    g = int(g * (1 - factor))
+    b = int(b * (1 - factor))
+
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def lighten_color(hex_color: str, factor: float) -> str:
+    """Lighten a hex color by a factor (0-1)."""
+    hex_color = hex_color.lstrip('#')
+    r = int(hex_color[0:2], 16)
+    g = int(hex_color[2:4], 16)
+    b = int(hex_color[4:6], 16)
+
+    r = min(255, int(r + (255 - r) * factor))
+    g = min(255, int(g + (255 - g) * factor))
+    b = min(255, int(b + (255 - b) * factor))
+
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def sprite_palette(base_color: str) -> dict:
+    """Map each sprite color key to a concrete hex color."""
+    return {
+        "fill": base_color,
+        "outline": darken_color(base_color, 0.3),
+        "eye": "#000000",
+        "accent": lighten_color(base_color, 0.3),
+    }
+
+
+def render_sprite(stage: str, palette: dict, pixel_size: int, width: int, height: int) -> Image.Image:
+    """Rasterize a stage's pixel pattern onto a transparent image."""
+    image = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    sprite = EVOLUTION_SPRITES.get(stage, EVOLUTION_SPRITES["egg"])
+
+    center_x = width // 2
+    center_y = height // 2
+    for px, py, color_type in sprite:
+        x1 = center_x + px * pixel_size
+        y1 = center_y + py * pixel_size
+        # Pillow rectangles include their end coordinates
+        draw.rectangle(
+            (x1, y1, x1 + pixel_size - 1, y1 + pixel_size - 1),
+            fill=palette.get(color_type, palette["fill"])
+        )
+
+    return image
+
+
+class SpriteCache:
+    """Cache of rendered sprite PhotoImages for one canvas."""
+
+    def __init__(self, master, width: int, height: int):
+        self._master = master
+        self._width = width
+        self._height = height
+        self._images = {}
+        self._palettes = {}
+
+    def get(self, stage: str, base_color: str, pixel_size: int) -> ImageTk.PhotoImage:
+        """Return the PhotoImage for a stage, rendering it on first use."""
+        palette = self._palettes.get(base_color)
+        if palette is None:
+            palette = self._palettes[base_color] = sprite_palette(base_color)
+
+        key = (stage, tuple(sorted(palette.items())), pixel_size)
+        image = self._images.get(key)
+        if image is None:
+            rendered = render_sprite(stage, palette, pixel_size, self._width, self._height)
+            # The cache holds the reference so Tk does not drop the image
+            image = self._images[key] = ImageTk.PhotoImage(rendered, master=self._master)
+        return image
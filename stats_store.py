@@ -0,0 +1,99 @@
+"""
+Productivity statistics for CodePet.
+
+Tasks completed and XP earned are rolled up per local calendar day in the
+``daily_stats`` table. CodePetService keeps the rollup current in the same
+transaction as every completion and reopen, so reading a chart is a range
+seek over at most one row per day shown, however much history exists. The
+rollup covers the completed tasks whether they are live or archived.
+"""
+
+from datetime import date, timedelta
+from database import Database
+
+
+# Adds completions to one day's rollup row; parameters are day, tasks, XP
+RECORD_COMPLETIONS = """
+    INSERT INTO daily_stats (day, tasks_completed, xp_earned) VALUES (?, ?, ?)
+    ON CONFLICT (day) DO UPDATE SET
+        tasks_completed = tasks_completed + excluded.tasks_completed,
+        xp_earned = xp_earned + excluded.xp_earned
+"""
+
+# Local day of a completed_at timestamp (stored in UTC)
+COMPLETION_DAY = "date(completed_at, 'localtime')"
+
+
+def backfill_daily_stats(cursor, table: str = "tasks", where: str = "1", params: tuple = (),
+                         sign: int = 1) -> None:
+    """Add the completed tasks of ``table`` matching ``where`` to the rollup in one grouped pass.
+
+    With ``sign`` -1 the tasks are taken out of the rollup instead.
+    """
+    cursor.execute(f"""
+        INSERT INTO daily_stats (day, tasks_completed, xp_earned)
+        SELECT {COMPLETION_DAY}, {int(sign)} * COUNT(*), {int(sign)} * SUM(xp_value) FROM {table}
+        WHERE completed = 1 AND completed_at IS NOT NULL AND ({where})
+        GROUP BY 1
+        ON CONFLICT (day) DO UPDATE SET
+            tasks_completed = tasks_completed + excluded.tasks_completed,
+            xp_earned = xp_earned + excluded.xp_earned
+    """, params)
+
+
+class StatsStore:
+    """Reads the daily rollup and rebuilds it from task history."""
+
+    DAYS_QUERY = """
+        SELECT day, tasks_completed, xp_earned FROM daily_stats
+        WHERE day BETWEEN ? AND ?
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    def daily(self, days: int, today: date = None) -> list:
+        """Return the last ``days`` days (oldest first), including empty days.
+
+        Returns:
+            list: Dicts with day (ISO date), tasks_completed and xp_earned
+        """
+        today = today or date.today()
+        first = today - timedelta(days=days - 1)
+        rows = {
+            row["day"]: dict(row)
+            for row in self.db.execute(self.DAYS_QUERY, (first.isoformat(), today.isoformat()))
+        }
+        result = []
+        for offset in range(days):
+            day = (first + timedelta(days=offset)).isoformat()
+            result.append(rows.get(day, {"day": day, "tasks_completed": 0, "xp_earned": 0}))
+        return result
+
+    def weekly(self, weeks: int, today: date = None) -> list:
+        """Return totals for the last ``weeks`` weeks (Monday to Sunday, oldest first).
+
+        Returns:
+            list: Dicts with week (ISO date of its Monday), tasks_completed and xp_earned
+        """
+        today = today or date.today()
+        # Starts on the Monday ``weeks - 1`` weeks back, so day i is in week i // 7
+        days = self.daily((weeks - 1) * 7 + today.weekday() + 1, today)
+        totals = []
+        for week in range(weeks):
+            in_week = days[week * 7:(week + 1) * 7]
+            totals.append({
+                "week": in_week[0]["day"],
+                "tasks_completed": sum(day["tasks_completed"] for day in in_week),
+                "xp_earned": sum(day["xp_earned"] for day in in_week),
+            })
+        return totals
+
+    def rebuild(self) -> None:
+        """Recompute the whole rollup from live and archived tasks."""
+        self.db.attach_archive()
+        with self.db.transaction() as connection:
+            cursor = connection.cursor()
+            cursor.execute("DELETE FROM daily_stats")
+            backfill_daily_stats(cursor)
+            backfill_daily_stats(cursor, "archive.tasks_archive")
@@ -0,0 +1,384 @@
+"""
+Offline sync between machines for CodePet.
+
+Triggers append every write to tasks and the XP ledger to the ``changes``
+table, stamped with the database's Lamport clock. Sync goes through a shared
+folder (a USB stick, a network drive, a synced cloud directory); no server is
+involved. Every machine has a device id and writes its own changes into its
+own subfolder, one file per sync holding only the changes since its last
+export, and reads the other subfolders from where it last stopped. A sync
+therefore costs in proportion to the changes made since the last one, not to
+the size of the database.
+
+Merges are deterministic: incoming changes are applied in (clock, device)
+order, and a task ends up as written by its change with the highest
+(clock, device), whichever machine merges in whichever order. Deleting a task
+wins over concurrent edits. XP events are only ever added, so both machines
+end up with the XP earned on either.
+
+Changes are logged with no device until they are first exported, so a
+database file copied to another machine does not carry this machine's id.
+Once exported, an upsert replaced by a newer one is pruned from the log; each
+task keeps its winning upsert and any delete, which is all a merge needs.
+"""
+
+import json
+import os
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+from database import Database, data_dir
+from services import CodePetService
+from stats_store import RECORD_COMPLETIONS
+
+
+# File in the data directory holding this machine's device id
+DEVICE_ID_FILE = "device-id"
+
+# Change files are named <last clock of the device's previous file>-<last
+# clock>.jsonl, zero-padded to sort, so readers can follow each device's
+# files as a chain and wait for any that have not arrived yet
+_CLOCK_WIDTH = 12
+
+# Winning (newest) state logged for a task
+_LATEST_UPSERT = """
+    SELECT clock, device, data FROM changes
+    WHERE entity_id = ? AND entity = 'task' AND op = 'upsert'
+    ORDER BY clock DESC, device DESC
+    LIMIT 1
+"""
+
+
+# Records the last clock read from (or written by) a device
+_SET_LAST_CLOCK = """
+    INSERT INTO sync_peers (device, last_clock) VALUES (?, ?)
+    ON CONFLICT (device) DO UPDATE SET last_clock = excluded.last_clock
+"""
+
+# Exported upserts of the tasks in the JSON array ?1 that a newer logged
+# upsert has replaced; nothing this device still has to send is removed
+_PRUNE_SUPERSEDED = """
+    DELETE FROM changes
+    WHERE entity = 'task' AND op = 'upsert'
+      AND entity_id IN (SELECT value FROM json_each(?1))
+      AND device IS NOT NULL
+      AND (device != ?2 OR clock <= (SELECT last_clock FROM sync_peers WHERE device = ?2))
+      AND EXISTS (
+          SELECT 1 FROM changes newer
+          WHERE newer.entity_id = changes.entity_id AND newer.entity = 'task'
+            AND newer.op = 'upsert'
+            AND (newer.clock, newer.device) > (changes.clock, changes.device)
+      )
+"""
+
+
+def device_id(root: Optional[Path] = None) -> str:
+    """This machine's device id, created on first use."""
+    path = Path(root if root is not None else data_dir()) / DEVICE_ID_FILE
+    if path.exists():
+        return path.read_text().strip()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    device = uuid.uuid4().hex[:16]
+    path.write_text(device + "\n")
+    return device
+
+
+@contextmanager
+def untracked(connection):
+    """Keep writes made inside the block out of the change log.
+
+    Must run inside a transaction, so a rollback also undoes the pause.
+    """
+    connection.execute("UPDATE sync_state SET paused = 1")
+    try:
+        yield connection
+    finally:
+        connection.execute("UPDATE sync_state SET paused = 0")
+
+
+class SyncFolder:
+    """Exchanges change files with other devices through a shared folder."""
+
+    def __init__(self, db: Database, folder, device: Optional[str] = None):
+        self.db = db
+        self.folder = Path(folder)
+        self.device = device or device_id()
+
+    def sync(self) -> dict:
+        """Export local changes, then merge every other device's new changes.
+
+        Returns:
+            dict: exported (changes written), imported (new changes read) and
+                  applied (tasks and XP events that changed this database)
+        """
+        exported = self.export_changes()
+        imported, applied = self.import_changes()
+        return {"exported": exported, "imported": imported, "applied": applied}
+
+    def export_changes(self) -> int:
+        """Write the local changes made since the last export to this device's subfolder.
+
+        Returns:
+            int: Number of changes written
+        """
+        with self.db.transaction() as connection:
+            self._claim_local_changes(connection)
+            since = self._last_clock(connection, self.device)
+            rows = connection.execute("""
+                SELECT clock, entity, entity_id, op, data FROM changes
+                WHERE device = ? AND clock > ?
+                ORDER BY clock
+            """, (self.device, since)).fetchall()
+            if not rows:
+                return 0
+
+            directory = self.folder / self.device
+            directory.mkdir(parents=True, exist_ok=True)
+            name = f"{since:0{_CLOCK_WIDTH}d}-{rows[-1]['clock']:0{_CLOCK_WIDTH}d}.jsonl"
+            # Written under a temporary name so readers never see half a file
+            partial = directory / f".{name}.tmp"
+            with open(partial, "w", encoding="utf-8") as f:
+                for row in rows:
+                    change = dict(row)
+                    change["data"] = json.loads(change["data"]) if change["data"] else None
+                    f.write(json.dumps(change, separators=(",", ":")) + "\n")
+            os.replace(partial, directory / name)
+
+            connection.execute(_SET_LAST_CLOCK, (self.device, rows[-1]["clock"]))
+            self._prune(connection, {row["entity_id"] for row in rows if row["entity"] == "task"})
+        self.db.flush()
+        return len(rows)
+
+    def import_changes(self) -> tuple:
+        """Merge the changes other devices exported since they were last read.
+
+        Returns:
+            tuple: (changes read, tasks and XP events applied)
+        """
+        if not self.folder.is_dir():
+            return 0, 0
+        seen = {
+            row["device"]: row["last_clock"]
+            for row in self.db.execute("SELECT device, last_clock FROM sync_peers")
+        }
+
+        changes = []
+        for directory in sorted(self.folder.iterdir()):
+            if not directory.is_dir() or directory.name == self.device:
+                continue
+            changes.extend(self._read_device(directory, seen.get(directory.name, 0)))
+        if not changes:
+            return 0, 0
+
+        # One total order on every machine, causal thanks to the Lamport clocks
+        changes.sort(key=lambda change: (change["clock"], change["device"]))
+        with self.db.transaction() as connection, untracked(connection):
+            self._claim_local_changes(connection)
+            applied, xp = self._apply(connection, changes)
+            if xp:
+                CodePetService(self.db)._award_xp(connection, xp)
+            connection.execute(
+                "UPDATE sync_state SET clock = MAX(clock, ?)", (changes[-1]["clock"],)
+            )
+            newest = {}
+            for change in changes:
+                newest[change["device"]] = change["clock"]
+            connection.executemany(_SET_LAST_CLOCK, newest.items())
+            self._prune(connection, {
+                change["entity_id"] for change in changes if change["entity"] == "task"
+            })
+        self.db.flush()
+        return len(changes), applied
+
+    @staticmethod
+    def _last_clock(connection, device: str) -> int:
+        """Last clock read from (or, for this device, written by) a device."""
+        row = connection.execute(
+            "SELECT last_clock FROM sync_peers WHERE device = ?", (device,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def _claim_local_changes(self, connection) -> None:
+        """Stamp changes made on this machine with its device id."""
+        connection.execute("UPDATE changes SET device = ? WHERE device IS NULL", (self.device,))
+
+    def _prune(self, connection, uids: set) -> None:
+        """Drop the superseded upserts of tasks that just changed.
+
+        Only a task's winning upsert (and any delete) is needed to merge
+        later changes, so the log grows with the number of tasks, not edits.
+        """
+        if uids:
+            connection.execute(_PRUNE_SUPERSEDED, (json.dumps(sorted(uids)), self.device))
+
+    @staticmethod
+    def _read_device(directory: Path, since: int) -> list:
+        """Changes in one device's subfolder with a clock after ``since``.
+
+        Files are read along the chain from ``since`` and reading stops at the
+        first one missing, so a synced folder delivering them out of order
+        never makes a file be skipped.
+        """
+        files = {}
+        for path in directory.glob("*.jsonl"):
+            previous, last = (int(part) for part in path.stem.split("-"))
+            # An export rolled back after writing its file is redone with
+            # more changes under the same start; the longer file has them all
+            if last > files.get(previous, (None, -1))[1]:
+                files[previous] = (path, last)
+        changes = []
+        while since in files:
+            path, last = files.pop(since)
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    change = json.loads(line)
+                    change["device"] = directory.name
+                    changes.append(change)
+            since = last
+        return changes
+
+    def _apply(self, connection, changes: list) -> tuple:
+        """Log incoming changes and apply those that win over the local state.
+
+        Returns:
+            tuple: (tasks and XP events applied, total XP of the new events)
+        """
+        applied = xp = 0
+        for change in changes:
+            latest = connection.execute(_LATEST_UPSERT, (change["entity_id"],)).fetchone()
+            logged = connection.execute("""
+                INSERT OR IGNORE INTO changes (device, clock, entity, entity_id, op, data)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (
+                change["device"], change["clock"], change["entity"], change["entity_id"],
+                change["op"], json.dumps(change["data"]) if change["data"] is not None else None,
+            )).rowcount
+            if not logged:
+                continue
+
+            if change["entity"] == "xp":
+                self._insert_xp_event(connection, change["data"])
+                xp += change["data"]["amount"]
+                applied += 1
+            elif change["op"] == "delete":
+                # Deletes win whatever their clock; subtasks go with the task
+                applied += connection.execute(
+                    "DELETE FROM tasks WHERE uid = ?", (change["entity_id"],)
+                ).rowcount
+                connection.execute(
+                    "DELETE FROM sync_pending WHERE uid = ?", (change["entity_id"],)
+                )
+            elif latest is None or (change["clock"], change["device"]) > (latest[0], latest[1]):
+                # The rollup follows the winning state even of deleted tasks,
+                # which keep their completions like locally deleted ones do
+                if latest is not None:
+                    self._record_completion(connection, json.loads(latest["data"]), -1)
+                self._record_completion(connection, change["data"], 1)
+                applied += self._upsert_task(connection, change["entity_id"], change["data"],
+                                             known=latest is not None)
+        return applied + self._retry_pending(connection), xp
+
+    @staticmethod
+    def _upsert_task(connection, uid: str, data: dict, known: bool) -> int:
+        """Write a task's winning state.
+
+        Deleted tasks are never brought back, whichever order the delete and
+        the task's other changes arrived in. A task this database knows but no
+        longer has otherwise was archived here and stays archived. A subtask
+        whose parent has not arrived yet waits in ``sync_pending``.
+
+        Returns:
+            int: 1 when the task was written, else 0
+        """
+        pending = connection.execute(
+            "DELETE FROM sync_pending WHERE uid = ?", (uid,)
+        ).rowcount
+        if SyncFolder._is_deleted(connection, uid):
+            return 0
+
+        parent_id = None
+        if data["parent"] is not None:
+            parent = connection.execute(
+                "SELECT id FROM tasks WHERE uid = ?", (data["parent"],)
+            ).fetchone()
+            if parent is None:
+                # Subtasks of a deleted task are deleted with it
+                if not SyncFolder._is_deleted(connection, data["parent"]):
+                    connection.execute(
+                        "INSERT INTO sync_pending (uid, parent) VALUES (?, ?)", (uid, data["parent"])
+                    )
+                return 0
+            parent_id = parent[0]
+
+        values = (data["title"], data["description"], data["completed"], data["xp_value"],
+                  parent_id, data["created_at"], data["completed_at"])
+        updated = connection.execute("""
+            UPDATE tasks SET title = ?, description = ?, completed = ?, xp_value = ?,
+                             parent_id = ?, created_at = ?, completed_at = ?
+            WHERE uid = ?
+        """, values + (uid,)).rowcount
+        if updated or (known and not pending):
+            return updated
+        connection.execute("""
+            INSERT INTO tasks (title, description, completed, xp_value, parent_id,
+                               created_at, completed_at, uid)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, values + (uid,))
+        return 1
+
+    @staticmethod
+    def _retry_pending(connection) -> int:
+        """Write waiting subtasks whose parents have arrived, level by level.
+
+        Returns:
+            int: Number of tasks written
+        """
+        written = 0
+        while True:
+            ready = [row[0] for row in connection.execute("""
+                SELECT p.uid FROM sync_pending p JOIN tasks t ON t.uid = p.parent
+            """)]
+            if not ready:
+                break
+            for uid in ready:
+                latest = connection.execute(_LATEST_UPSERT, (uid,)).fetchone()
+                written += SyncFolder._upsert_task(
+                    connection, uid, json.loads(latest["data"]), known=True
+                )
+        # Drop subtasks whose parent was deleted meanwhile
+        for uid, parent in connection.execute("SELECT uid, parent FROM sync_pending").fetchall():
+            if SyncFolder._is_deleted(connection, parent):
+                connection.execute("DELETE FROM sync_pending WHERE uid = ?", (uid,))
+        return written
+
+    @staticmethod
+    def _is_deleted(connection, uid: str) -> bool:
+        """Whether a delete of this task or of one of its ancestors has been logged here."""
+        while uid is not None:
+            if connection.execute(
+                "SELECT 1 FROM changes WHERE entity_id = ? AND entity = 'task' AND op = 'delete'",
+                (uid,)
+            ).fetchone():
+                return True
+            latest = connection.execute(_LATEST_UPSERT, (uid,)).fetchone()
+            uid = json.loads(latest["data"])["parent"] if latest else None
+        return False
+
+    @staticmethod
+    def _record_completion(connection, data: dict, sign: int) -> None:
+        """Add a task state's completion to the rollup (or take it out with ``sign`` -1)."""
+        if not (data["completed"] and data["completed_at"]):
+            return
+        day = connection.execute(
+            "SELECT date(?, 'localtime')", (data["completed_at"],)
+        ).fetchone()[0]
+        connection.execute(RECORD_COMPLETIONS, (day, sign, sign * data["xp_value"]))
+
+    @staticmethod
+    def _insert_xp_event(connection, data: dict) -> None:
+        """Append another device's XP event to the local ledger."""
+        connection.execute("""
+            INSERT INTO xp_events (task_id, amount, reason, created_at)
+            VALUES ((SELECT id FROM tasks WHERE uid = ?), ?, ?, ?)
+        """, (data["task"], data["amount"], data["reason"], data["created_at"]))
@@ -0,0 +1,344 @@
+"""
+Virtualized task list widget for CodePet.
+
+Instead of building one frame per task, the list keeps a small pool of row
+widgets sized to the visible viewport and rebinds them to task data as the
+user scrolls. Widget count therefore stays constant no matter how many tasks
+exist.
+"""
+
+import sys
+import customtkinter as ctk
+
+
+# Height of a single task row frame (before widget scaling)
+ROW_HEIGHT = 44
+
+# Vertical gap above and below each row
+ROW_PADDING = 5
+
+# Left indentation applied per subtask level
+SUBTASK_INDENT = 30
+
+# Deeper levels share the indentation of this one so rows stay readable
+MAX_INDENT_DEPTH = 6
+
+# Row widgets created per idle callback while the pool fills up
+POOL_CHUNK = 4
+
+# Rows left below the viewport when on_near_end asks for more items
+NEAR_END_ROWS = 10
+
+
+class TaskRow(ctk.CTkFrame):
+    """A pooled task row that can be rebound to any task item."""
+
+    def __init__(self, master, task_list: 'VirtualTaskList'):
+        super().__init__(master, height=ROW_HEIGHT, corner_radius=8,
+                         border_color=("#3B8ED0", "#1F6AA5"))
+        # Keep the fixed row height regardless of child widget sizes
+        self.grid_propagate(False)
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(2, weight=1)  # Title column expands
+
+        self._task_list = task_list
+        self.item = None
+        self._placement = None
+
+        # Expand/collapse button (blank and disabled when there are no children)
+        self.expand_btn = ctk.CTkButton(
+            self,
+            text="",
+            font=task_list.small_font,
+            text_color=("gray50", "gray60"),
+            fg_color="transparent",
+            hover_color=("gray75", "gray30"),
+            width=25,
+            height=25,
+            command=lambda: self._task_list.on_toggle_expand(self.item["task"]["id"])
+        )
+        self.expand_btn.grid(row=0, column=0, padx=(5, 0))
+
+        # Completion toggle button
+        self.status_btn = ctk.CTkButton(
+            self,
+            text="○",
+            font=task_list.status_font,
+            fg_color="transparent",
+            hover_color=("gray75", "gray30"),
+            width=30,
+            height=30,
+            command=lambda: self._task_list.on_toggle_completion(self.item["task"])
+        )
+        self.status_btn.grid(row=0, column=1, padx=(5, 5))
+
+        # Task title
+        self.title_label = ctk.CTkLabel(
+            self,
+            text="",
+            font=task_list.title_font,
+            anchor="w"
+        )
+        self.title_label.grid(row=0, column=2, padx=(0, 10), sticky="w")
+
+        # Clicking the row (outside its buttons) selects it; Shift extends
+        for widget in (self, self.title_label):
+            widget.bind("<Button-1>", self._on_click)
+
+        # Add subtask button (only shown for parent tasks)
+        self.add_subtask_btn = ctk.CTkButton(
+            self,
+            text="+",
+            font=task_list.title_font,
+            text_color=("gray50", "gray60"),
+            fg_color="transparent",
+            hover_color=("gray75", "gray30"),
+            width=25,
+            height=25,
+            command=lambda: self._task_list.on_add_subtask(self.item["task"]["id"])
+        )
+        self.add_subtask_btn.grid(row=0, column=3, padx=(5, 10))
+
+    def _on_click(self, event) -> None:
+        """Report a selection click to the list."""
+        if self.item is not None and self._task_list.on_select is not None:
+            self._task_list.on_select(self.item["task"], bool(event.state & 0x0001))
+
+    def bind_item(self, item: dict) -> None:
+        """Rebind this row to a task item, reconfiguring only what changed."""
+        old = self.item
+        self.item = item
+        task = item["task"]
+        is_completed = bool(task["completed"])
+
+        expand_state = (item["has_children"], item["is_expanded"])
+        if old is None or (old["has_children"], old["is_expanded"]) != expand_state:
+            if item["has_children"]:
+                self.expand_btn.configure(
+                    text="▼" if item["is_expanded"] else "▶",
+                    state="normal"
+                )
+            else:
+                # Blank, disabled button acts as a spacer for alignment
+                self.expand_btn.configure(text="", state="disabled")
+
+        if old is None or old["is_selected"] != item["is_selected"]:
+            self.configure(border_width=2 if item["is_selected"] else 0)
+
+        if old is None or bool(old["task"]["completed"]) != is_completed:
+            self.configure(
+                fg_color=("gray80", "gray25") if is_completed else ("gray85", "gray20")
+            )
+            self.status_btn.configure(
+                text="✓" if is_completed else "○",
+                text_color="#4CAF50" if is_completed else ("gray60", "gray50")
+            )
+            # Strikethrough effect for completed tasks
+            self.title_label.configure(
+                font=self._task_list.done_font if is_completed else self._task_list.title_font,
+                text_color=("gray40", "gray70") if is_completed else ("gray10", "gray90")
+            )
+
+        if old is None or old["task"]["title"] != task["title"]:
+            self.title_label.configure(text=task["title"])
+
+    def move_to(self, x: int, y: int, relwidth: float) -> None:
+        """Place the row, skipping the geometry call if it is already there."""
+        placement = (x, y, relwidth)
+        if placement != self._placement:
+            self.place(x=x, y=y, relwidth=relwidth)
+            self._placement = placement
+
+    def hide(self) -> None:
+        """Hide the row but keep its binding so it can be reused for the same task."""
+        if self._placement is not None:
+            self.place_forget()
+            self._placement = None
+
+
+class VirtualTaskList(ctk.CTkFrame):
+    """Scrollable task list that only builds widgets for visible rows.
+
+    Items are dicts with the keys ``task`` (task row dict), ``depth`` (0 for
+    top-level tasks), ``has_children``, ``is_expanded`` and ``is_selected``. Updates are reconciled by task id:
+    a row that stays visible keeps its widgets and is only patched or moved.
+
+    If ``on_near_end`` is given, it is called once per item count when the
+    user scrolls close to the last item, so callers can append another page.
+    If ``on_select`` is given, clicking a row calls ``on_select(task, extend)``
+    with ``extend`` set when Shift was held.
+    """
+
+    def __init__(self, master, on_toggle_completion, on_toggle_expand, on_add_subtask,
+                 empty_text: str = "", on_near_end=None, on_select=None, **kwargs):
+        super().__init__(master, fg_color="transparent", **kwargs)
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.on_toggle_completion = on_toggle_completion
+        self.on_toggle_expand = on_toggle_expand
+        self.on_add_subtask = on_add_subtask
+        self.on_near_end = on_near_end
+        self.on_select = on_select
+
+        # Fonts are shared by every pooled row
+        self.small_font = ctk.CTkFont(size=12)
+        self.status_font = ctk.CTkFont(size=16)
+        self.title_font = ctk.CTkFont(size=14)
+        self.done_font = ctk.CTkFont(size=14, overstrike=True)
+
+        # Viewport that clips the pooled rows
+        self.viewport = ctk.CTkFrame(self, fg_color="transparent", corner_radius=0)
+        self.viewport.grid(row=0, column=0, sticky="nsew")
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+
+        # Empty state label (shown when there are no items)
+        self.empty_state = ctk.CTkLabel(
+            self.viewport,
+            text=empty_text,
+            font=ctk.CTkFont(size=14),
+            text_color=("gray50", "gray60")
+        )
+
+        self._items = []
+        self._loaded = False
+        self._pool_pending = False
+        self._rows = []
+        self._offset = 0
+        self._row_height = 1
+        self._near_end_count = None
+
+        self.viewport.bind("<Configure>", lambda e: self._render())
+        if "linux" in sys.platform:
+            self.bind_all("<Button-4>", self._on_mousewheel, add=True)
+            self.bind_all("<Button-5>", self._on_mousewheel, add=True)
+        else:
+            self.bind_all("<MouseWheel>", self._on_mousewheel, add=True)
+
+    @property
+    def items(self) -> list:
+        """The items currently in the list, in display order."""
+        return self._items
+
+    def set_items(self, items: list) -> None:
+        """Replace the list contents and reconcile the visible rows by task id."""
+        self._items = items
+        self._loaded = True
+        # New contents may need another page even at the same length
+        self._near_end_count = None
+        self._render()
+
+    def _ensure_pool(self, viewport_height: int) -> None:
+        """Grow the row pool towards the viewport size (rows are never destroyed).
+
+        Rows are created a few at a time; if more are needed, another render
+        is scheduled for when the event loop is idle so the UI stays responsive.
+        """
+        if not self._items:
+            return
+        if not self._rows:
+            self._rows.append(TaskRow(self.viewport, self))
+            self._row_height = self._rows[0].winfo_reqheight() + 2 * ROW_PADDING
+
+        needed = min(viewport_height // self._row_height + 2, len(self._items))
+        for _ in range(min(POOL_CHUNK, needed - len(self._rows))):
+            self._rows.append(TaskRow(self.viewport, self))
+
+        if len(self._rows) < needed and not self._pool_pending:
+            self._pool_pending = True
+            self.after_idle(self._fill_pool)
+
+    def _fill_pool(self) -> None:
+        """Idle callback that adds the next chunk of pooled rows."""
+        self._pool_pending = False
+        self._render()
+
+    def _render(self) -> None:
+        """Bind the pooled rows to the items currently inside the viewport."""
+        view_height = self.viewport.winfo_height()
+        view_width = max(self.viewport.winfo_width(), 1)
+        self._ensure_pool(view_height)
+
+        total_height = len(self._items) * self._row_height
+        self._offset = max(0, min(self._offset, total_height - view_height))
+
+        if self._items or not self._loaded:
+            self.empty_state.place_forget()
+        else:
+            self.empty_state.place(relx=0.5, y=50, anchor="n")
+
+        first = self._offset // self._row_height
+        shift = self._offset % self._row_height
+        visible = self._items[first:first + len(self._rows)]
+        visible_ids = {item["task"]["id"] for item in visible}
+
+        # Keep rows already showing a visible task; everything else is free
+        bound = {}
+        free = []
+        for row in self._rows:
+            task_id = row.item["task"]["id"] if row.item is not None else None
+            if task_id in visible_ids and task_id not in bound:
+                bound[task_id] = row
+            else:
+                free.append(row)
+
+        for i, item in enumerate(visible):
+            row = bound.get(item["task"]["id"])
+            if row is None:
+                row = free.pop()
+            if row.item is not item:
+                row.bind_item(item)
+            indent = SUBTASK_INDENT * min(item["depth"], MAX_INDENT_DEPTH)
+            row.move_to(
+                indent,
+                i * self._row_height - shift + ROW_PADDING,
+                1 - indent / view_width
+            )
+
+        for row in free:
+            row.hide()
+
+        if total_height > 0:
+            self.scrollbar.set(
+                self._offset / total_height,
+                min(1.0, (self._offset + view_height) / total_height)
+            )
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+        # Ask for the next page outside of this render pass
+        if (self.on_near_end is not None and self._items
+                and first + len(visible) + NEAR_END_ROWS >= len(self._items)
+                and self._near_end_count != len(self._items)):
+            self._near_end_count = len(self._items)
+            self.after_idle(self.on_near_end)
+
+    def _scroll_to(self, offset: int) -> None:
+        """Scroll so that the given pixel offset is at the top of the viewport."""
+        self._offset = int(offset)
+        self._render()
+
+    def _on_scrollbar(self, action: str, value, units: str = "units") -> None:
+        """Handle scrollbar drag ("moveto") and step ("scroll") commands."""
+        if action == "moveto":
+            self._scroll_to(float(value) * len(self._items) * self._row_height)
+        elif units == "pages":
+            self._scroll_to(self._offset + int(value) * self.viewport.winfo_height())
+        else:
+            self._scroll_to(self._offset + int(value) * self._row_height)
+
+    def _on_mousewheel(self, event) -> None:
+        """Scroll by whole rows when the wheel is used over the list."""
+        if not str(event.widget).startswith(str(self.viewport)):
+            return
+        if event.num == 4:
+            steps = -1
+        elif event.num == 5:
+            steps = 1
+        elif sys.platform == "darwin":
+            steps = -event.delta
+        else:
+            steps = -int(event.delta / 120)
+        self._scroll_to(self._offset + steps * self._row_height)
@@ -0,0 +1,281 @@
+"""
+Task queries for CodePet.
+
+Loads the task tree with a fixed number of SQLite round trips, independent of
+how many tasks or expanded parents there are, pages through top-level tasks
+with keyset cursors, and runs ranked full-text searches against the
+tasks_fts index. The same reads are available for archived tasks.
+"""
+
+import json
+import re
+from database import MAX_TREE_DEPTH, Database
+
+
+# Words in a search box entry (FTS5 operators and punctuation are dropped)
+_SEARCH_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+# Sort orders for paged top-level tasks: name -> (index, key columns, direction).
+# Open tasks always come first; within each completed state rows are ordered
+# by the key columns, the last of which is the unique id.
+SORT_ORDERS = {
+    "newest": ("idx_tasks_parent_order", ("created_at", "id"), "DESC"),
+    "oldest": ("idx_tasks_parent_order", ("created_at", "id"), "ASC"),
+    "xp": ("idx_tasks_parent_xp", ("xp_value", "created_at", "id"), "DESC"),
+}
+
+
+def _page_query(keys: tuple, direction: str, after: bool) -> str:
+    """Build the page query for one sort order, optionally after a cursor."""
+    columns = ", ".join(f"t.{key}" for key in keys)
+    placeholders = ", ".join("?" for _ in keys)
+    comparison = "<" if direction == "DESC" else ">"
+    seek = f"AND ({columns}) {comparison} ({placeholders})" if after else ""
+    order = ", ".join(f"t.{key} {direction}" for key in keys)
+    return f"""
+        SELECT t.*,
+               (SELECT COUNT(*) FROM tasks c WHERE c.parent_id = t.id) AS child_count
+        FROM tasks t
+        WHERE t.parent_id IS NULL AND t.completed = ? {seek}
+        ORDER BY {order}
+        LIMIT ?
+    """
+
+
+def _subtree_query(table: str, index: str = None) -> str:
+    """Build the visible-subtree query for the live or archived task table.
+
+    Parameters are a JSON array of parent ids whose children are loaded and a
+    JSON array of expanded ids the recursion may descend into (NULL descends
+    into every node). ``index`` pins the parent_id lookups to an index.
+    """
+    pin = f"INDEXED BY {index}" if index else ""
+    return f"""
+        WITH RECURSIVE subtree(id, depth) AS (
+            SELECT id, 1 FROM {table} {pin}
+            WHERE parent_id IN (SELECT value FROM json_each(?1))
+            UNION ALL
+            SELECT c.id, s.depth + 1
+            FROM subtree s
+            JOIN {table} c {pin} ON c.parent_id = s.id
+            WHERE s.depth < {MAX_TREE_DEPTH}
+              AND (?2 IS NULL OR s.id IN (SELECT value FROM json_each(?2)))
+        )
+        SELECT t.*, s.depth,
+               (SELECT COUNT(*) FROM {table} c {pin} WHERE c.parent_id = t.id) AS child_count
+        FROM subtree s
+        JOIN {table} t ON t.id = s.id
+        ORDER BY t.completed ASC, t.created_at DESC, t.id DESC
+    """
+
+
+# Descendant counts and XP rollup of the subtrees of the tasks in the JSON
+# array ?1 (the tasks included); a task inside two of them counts once
+SUBTREE_SUMMARY_QUERY = f"""
+    WITH RECURSIVE subtree(id, depth) AS (
+        SELECT value, 0 FROM json_each(?1)
+        UNION ALL
+        SELECT c.id, s.depth + 1
+        FROM subtree s
+        JOIN tasks c ON c.parent_id = s.id
+        WHERE s.depth < {MAX_TREE_DEPTH}
+    ),
+    nodes(id, depth) AS (
+        SELECT id, MIN(depth) FROM subtree GROUP BY id
+    )
+    SELECT COALESCE(SUM(s.depth > 0), 0) AS descendants,
+           COALESCE(SUM(t.completed = 0), 0) AS open_tasks,
+           COALESCE((SELECT MAX(depth) FROM subtree), 0) AS depth,
+           COALESCE(SUM(t.xp_value), 0) AS total_xp,
+           COALESCE(SUM(CASE WHEN t.completed THEN t.xp_value ELSE 0 END), 0) AS earned_xp
+    FROM nodes s
+    JOIN tasks t ON t.id = s.id
+"""
+
+
+def search_expression(text: str) -> str:
+    """Turn free text into an FTS5 query that prefix-matches every word."""
+    return " ".join(f'"{token}"*' for token in _SEARCH_TOKEN.findall(text))
+
+
+class TaskStore:
+    """Read access to the tasks table."""
+
+    # Top-level tasks with their child counts in a single statement
+    TOP_LEVEL_QUERY = """
+        SELECT t.*,
+               (SELECT COUNT(*) FROM tasks c WHERE c.parent_id = t.id) AS child_count
+        FROM tasks t
+        WHERE t.parent_id IS NULL
+        ORDER BY t.completed ASC, t.created_at DESC
+    """
+
+    # Visible subtrees below a set of parents, in one recursive query. The
+    # parent_id lookups are pinned to the display-order index; the XP index
+    # matches them too and the planner picks it on small tables. Rows leave
+    # the recursion in tree order, so the final ORDER BY always sorts the
+    # (visible, hence small) result.
+    SUBTASKS_QUERY = _subtree_query("tasks", "idx_tasks_parent_order")
+
+    # Ranked full-text matches; titles weigh more than descriptions
+    SEARCH_QUERY = """
+        SELECT t.*,
+               (SELECT COUNT(*) FROM tasks c WHERE c.parent_id = t.id) AS child_count
+        FROM tasks_fts
+        JOIN tasks t ON t.id = tasks_fts.rowid
+        WHERE tasks_fts MATCH ?
+        ORDER BY bm25(tasks_fts, 10.0, 1.0), t.id
+        LIMIT ? OFFSET ?
+    """
+
+    # Archived top-level tasks, most recently archived first
+    ARCHIVE_PAGE_QUERY = """
+        SELECT t.*,
+               (SELECT COUNT(*) FROM archive.tasks_archive c WHERE c.parent_id = t.id) AS child_count
+        FROM archive.tasks_archive t
+        WHERE t.parent_id IS NULL AND (t.archived_at, t.id) < (?, ?)
+        ORDER BY t.archived_at DESC, t.id DESC
+        LIMIT ?
+    """
+
+    ARCHIVE_SUBTASKS_QUERY = _subtree_query("archive.tasks_archive")
+
+    ARCHIVE_SEARCH_QUERY = """
+        SELECT t.*,
+               (SELECT COUNT(*) FROM archive.tasks_archive c WHERE c.parent_id = t.id) AS child_count
+        FROM archive.tasks_archive_fts
+        JOIN archive.tasks_archive t ON t.id = tasks_archive_fts.rowid
+        WHERE tasks_archive_fts MATCH ?
+        ORDER BY bm25(tasks_archive_fts, 10.0, 1.0), t.id
+        LIMIT ? OFFSET ?
+    """
+
+    # Keyset page queries per sort order: (first page, page after a cursor)
+    PAGE_QUERIES = {
+        sort: (_page_query(keys, direction, False), _page_query(keys, direction, True))
+        for sort, (_, keys, direction) in SORT_ORDERS.items()
+    }
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    def load_tree(self, expanded_ids) -> tuple:
+        """Load top-level tasks and the visible subtrees of expanded tasks.
+
+        Issues at most two queries regardless of list size or nesting depth.
+
+        Returns:
+            tuple: (tasks: list of dicts with a ``child_count`` key,
+                    subtasks: dict mapping parent id to its ordered subtasks)
+        """
+        cursor = self.db.execute(self.TOP_LEVEL_QUERY)
+        tasks = [dict(row) for row in cursor.fetchall()]
+
+        expanded = [task["id"] for task in tasks if task["id"] in expanded_ids]
+        return tasks, self.load_subtasks(expanded, expanded_ids)
+
+    def load_page(self, sort: str = "newest", cursor=None, limit: int = 100) -> tuple:
+        """Load one page of top-level tasks after a keyset cursor.
+
+        Each completed state is paged separately, so every query is a single
+        index range seek that stops after ``limit`` rows, however many
+        completed tasks have piled up behind it.
+
+        Returns:
+            tuple: (tasks: list of dicts with a ``child_count`` key,
+                    cursor: opaque value for the next page, or None at the end)
+        """
+        _, keys, _ = SORT_ORDERS[sort]
+        first_query, after_query = self.PAGE_QUERIES[sort]
+        completed, key_values = cursor if cursor is not None else (0, None)
+
+        tasks = []
+        while completed <= 1 and len(tasks) < limit:
+            remaining = limit - len(tasks)
+            if key_values is None:
+                rows = self.db.execute(first_query, (completed, remaining)).fetchall()
+            else:
+                rows = self.db.execute(after_query, (completed, *key_values, remaining)).fetchall()
+            tasks.extend(dict(row) for row in rows)
+
+            if len(rows) == remaining:
+                key_values = tuple(rows[-1][key] for key in keys)
+            else:
+                # This completed state is exhausted; continue with the next one
+                completed, key_values = completed + 1, None
+
+        return tasks, (completed, key_values) if completed <= 1 else None
+
+    def load_archive_page(self, cursor=None, limit: int = 100) -> tuple:
+        """Load one page of archived top-level tasks after a keyset cursor.
+
+        Returns:
+            tuple: (tasks: list of dicts with a ``child_count`` key,
+                    cursor: opaque value for the next page, or None at the end)
+        """
+        # "~" sorts after every timestamp, so the first page starts at the top
+        self.db.attach_archive()
+        archived_at, task_id = cursor if cursor is not None else ("~", 0)
+        rows = self.db.execute(self.ARCHIVE_PAGE_QUERY, (archived_at, task_id, limit)).fetchall()
+        tasks = [dict(row) for row in rows]
+        if len(tasks) < limit:
+            return tasks, None
+        return tasks, (tasks[-1]["archived_at"], tasks[-1]["id"])
+
+    def load_archive_subtasks(self, parent_ids: list, expanded_ids=None) -> dict:
+        """Archived counterpart of load_subtasks.
+
+        Returns:
+            dict: Parent id mapped to its ordered list of archived subtasks
+        """
+        if parent_ids:
+            self.db.attach_archive()
+        return self._load_subtrees(self.ARCHIVE_SUBTASKS_QUERY, parent_ids, expanded_ids)
+
+    def search(self, text: str, limit: int, offset: int = 0, archived: bool = False) -> list:
+        """Return one page of tasks matching ``text``, best matches first.
+
+        With ``archived`` set, the archive is searched instead of live tasks.
+        """
+        expression = search_expression(text)
+        if not expression:
+            return []
+        if archived:
+            self.db.attach_archive()
+        query = self.ARCHIVE_SEARCH_QUERY if archived else self.SEARCH_QUERY
+        cursor = self.db.execute(query, (expression, limit, offset))
+        return [dict(row) for row in cursor.fetchall()]
+
+    def load_subtasks(self, parent_ids: list, expanded_ids=None) -> dict:
+        """Load the visible subtrees below several parents with one query.
+
+        The children of every id in ``parent_ids`` are loaded, and below them
+        the children of every id in ``expanded_ids`` at any depth (all
+        descendants when ``expanded_ids`` is None). Each subtask has a
+        ``depth`` (1 for direct children) and a ``child_count``.
+
+        Returns:
+            dict: Parent id mapped to its ordered list of subtasks
+        """
+        return self._load_subtrees(self.SUBTASKS_QUERY, parent_ids, expanded_ids)
+
+    def _load_subtrees(self, query: str, parent_ids: list, expanded_ids) -> dict:
+        """Run a subtree query and group its rows by parent id."""
+        subtasks = {}
+        if parent_ids:
+            expanded = None if expanded_ids is None else json.dumps(list(expanded_ids))
+            cursor = self.db.execute(query, (json.dumps(list(parent_ids)), expanded))
+            for row in cursor.fetchall():
+                subtasks.setdefault(row["parent_id"], []).append(dict(row))
+        return subtasks
+
+    def subtree_summary(self, task_ids) -> dict:
+        """Count the descendants of some tasks and roll up their XP in one query.
+
+        Returns:
+            dict: descendants, open_tasks, depth (levels below the tasks),
+                  total_xp and earned_xp, all covering the tasks themselves
+                  too except ``descendants`` and ``depth``
+        """
+        return dict(self.db.execute(SUBTREE_SUMMARY_QUERY, (json.dumps(list(task_ids)),)).fetchone())
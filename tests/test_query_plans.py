@@ -0,0 +1,140 @@
+"""
+Query plan checks for the hot task queries.
+
+Every query in QUERY_INDEXES must be served by its index, both on a freshly
+created database and on a file created before migrations existed
+(user_version 0) and upgraded in place. The keyset page queries behind the
+task list must also read their rows in order, without sorting them.
+"""
+
+import re
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from database import MIGRATIONS, Database
+from task_store import SORT_ORDERS, TaskStore
+
+
+# Index each hot query is expected to use
+QUERY_INDEXES = {
+    TaskStore.TOP_LEVEL_QUERY: "idx_tasks_parent_order",
+    TaskStore.SUBTASKS_QUERY: "idx_tasks_parent_order",
+    **{
+        query: SORT_ORDERS[sort][0]
+        for sort, queries in TaskStore.PAGE_QUERIES.items()
+        for query in queries
+    },
+}
+
+
+def explain(db, query: str) -> list:
+    """Detail lines of SQLite's plan for a query, with placeholder parameters."""
+    numbered = [int(n) for n in re.findall(r"\?(\d+)", query)]
+    params = ("[]",) * (max(numbered) if numbered else query.count("?"))
+    cursor = db.connection.execute(f"EXPLAIN QUERY PLAN {query}", params)
+    return [row["detail"] for row in cursor.fetchall()]
+
+
+def plan_problems(db) -> list:
+    """(query, plan) pairs for hot queries that scan the table or miss their index."""
+    problems = []
+    for query, index_name in QUERY_INDEXES.items():
+        plan = explain(db, query)
+        uses_index = any(index_name in detail for detail in plan)
+        # JSON parameters and the recursive subtree CTE are meant to be scanned
+        scans_table = any(detail.startswith("SCAN") and index_name not in detail
+                          and detail.split()[1] not in ("json_each", "s")
+                          for detail in plan)
+        if not uses_index or scans_table:
+            problems.append((query, plan))
+    return problems
+
+
+# Schema written by the original app, before user_version migrations
+BASELINE_SCHEMA = """
+    CREATE TABLE tasks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        description TEXT DEFAULT '',
+        completed INTEGER DEFAULT 0,
+        xp_value INTEGER DEFAULT 10,
+        parent_id INTEGER DEFAULT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        completed_at TIMESTAMP DEFAULT NULL,
+        FOREIGN KEY (parent_id) REFERENCES tasks(id) ON DELETE CASCADE
+    );
+    CREATE TABLE user_profile (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        username TEXT DEFAULT 'User',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE pet_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        name TEXT DEFAULT 'Pet',
+        level INTEGER DEFAULT 1,
+        current_xp INTEGER DEFAULT 0,
+        evolution_stage TEXT DEFAULT 'egg',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    INSERT INTO user_profile (id, username) VALUES (1, 'User');
+    INSERT INTO pet_state (id, name, level, current_xp, evolution_stage)
+    VALUES (1, 'Pet', 2, 30, 'baby');
+    INSERT INTO tasks (id, title) VALUES (1, 'Write report');
+    INSERT INTO tasks (id, title, parent_id, xp_value, completed, completed_at)
+    VALUES (2, 'Outline', 1, 5, 1, '2024-01-02 10:00:00');
+"""
+
+
+class QueryPlanTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_fresh_database(self):
+        db = Database(self.directory / "fresh.db")
+        try:
+            self.assertEqual(plan_problems(db), [])
+        finally:
+            db.close()
+
+    def test_pages_read_in_index_order(self):
+        db = Database(self.directory / "pages.db")
+        try:
+            for sort, (index_name, _, _) in SORT_ORDERS.items():
+                for query in TaskStore.PAGE_QUERIES[sort]:
+                    plan = explain(db, query)
+                    self.assertIn(f"USING INDEX {index_name}", plan[0], sort)
+                    self.assertFalse(any("TEMP B-TREE" in detail for detail in plan), (sort, plan))
+        finally:
+            db.close()
+
+    def test_baseline_file_migrated_in_place(self):
+        path = self.directory / "baseline.db"
+        connection = sqlite3.connect(path)
+        connection.executescript(BASELINE_SCHEMA)
+        connection.close()
+
+        db = Database(path)
+        try:
+            version = db.execute("PRAGMA user_version").fetchone()[0]
+            self.assertEqual(version, len(MIGRATIONS))
+            self.assertEqual(plan_problems(db), [])
+
+            # Existing data survives the upgrade
+            tasks, subtasks = TaskStore(db).load_tree({1})
+            self.assertEqual([task["title"] for task in tasks], ["Write report"])
+            self.assertEqual([task["title"] for task in subtasks[1]], ["Outline"])
+            pet = db.execute("SELECT level, current_xp FROM pet_state").fetchone()
+            self.assertEqual(tuple(pet), (2, 30))
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+"""
+Merge checks for offline sync.
+
+Every device gets its own copy of the shared folder, and files are copied
+between the copies by hand, the way a synced cloud directory may deliver
+them late and in any order. Whatever the order, every device must end up
+with the same tasks.
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from database import Database
+from services import CodePetService
+from sync import SyncFolder
+
+
+class SyncTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.devices = {}
+        for device in ("a", "b", "c"):
+            db = Database(self.directory / f"{device}.db")
+            self.addCleanup(db.close)
+            self.devices[device] = (
+                db, CodePetService(db), SyncFolder(db, self.directory / device, device)
+            )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def deliver(self, source, target, name=None):
+        """Copy the change files ``source`` exported (or just ``name``) to ``target``'s folder."""
+        exported = self.directory / source / source
+        received = self.directory / target / source
+        received.mkdir(parents=True, exist_ok=True)
+        for path in exported.glob(name or "*.jsonl"):
+            shutil.copy(path, received / path.name)
+
+    def sync_everything(self):
+        for _, _, folder in self.devices.values():
+            folder.sync()
+        for source in self.devices:
+            for target in self.devices:
+                if source != target:
+                    self.deliver(source, target)
+        for _, _, folder in self.devices.values():
+            folder.sync()
+
+    def titles(self, device):
+        db = self.devices[device][0]
+        return sorted(row[0] for row in db.execute("SELECT title FROM tasks"))
+
+    def test_delete_read_before_the_create(self):
+        db_a, service_a, folder_a = self.devices["a"]
+        _, service_b, folder_b = self.devices["b"]
+        service_b.add_task("Water plants")
+        folder_b.sync()
+        self.deliver("b", "a")
+        folder_a.sync()
+        task_id = db_a.execute("SELECT id FROM tasks WHERE title = 'Water plants'").fetchone()[0]
+        service_a.delete_tasks([task_id])
+        folder_a.sync()
+
+        # C hears of the delete first, then of the task it deletes
+        folder_c = self.devices["c"][2]
+        self.deliver("a", "c")
+        folder_c.sync()
+        self.deliver("b", "c")
+        folder_c.sync()
+        self.assertEqual(self.titles("c"), [])
+
+        self.sync_everything()
+        for device in self.devices:
+            self.assertEqual(self.titles(device), [], device)
+
+    def test_subtask_read_before_its_parent(self):
+        db_a, service_a, folder_a = self.devices["a"]
+        db_b, service_b, folder_b = self.devices["b"]
+        service_a.add_task("Move house")
+        folder_a.sync()
+        self.deliver("a", "b")
+        folder_b.sync()
+        parent_id = db_b.execute("SELECT id FROM tasks WHERE title = 'Move house'").fetchone()[0]
+        service_b.add_subtask(parent_id, "Pack books")
+        folder_b.sync()
+
+        db_c, _, folder_c = self.devices["c"]
+        self.deliver("b", "c")
+        folder_c.sync()
+        self.assertEqual(self.titles("c"), [])
+        self.deliver("a", "c")
+        folder_c.sync()
+        self.assertEqual(self.titles("c"), ["Move house", "Pack books"])
+        parent = db_c.execute("""
+            SELECT p.title FROM tasks t JOIN tasks p ON p.id = t.parent_id
+            WHERE t.title = 'Pack books'
+        """).fetchone()
+        self.assertEqual(parent[0], "Move house")
+        self.assertEqual(db_c.execute("SELECT COUNT(*) FROM sync_pending").fetchone()[0], 0)
+
+    def test_files_of_one_device_read_out_of_order(self):
+        _, service_a, folder_a = self.devices["a"]
+        service_a.add_task("First")
+        folder_a.sync()
+        first = [path.name for path in (self.directory / "a" / "a").glob("*.jsonl")]
+        service_a.add_task("Second")
+        folder_a.sync()
+
+        # The second file arrives first and waits until the first one is in
+        folder_c = self.devices["c"][2]
+        second = [path.name for path in (self.directory / "a" / "a").glob("*.jsonl")
+                  if path.name not in first]
+        self.deliver("a", "c", second[0])
+        folder_c.sync()
+        self.assertEqual(self.titles("c"), [])
+        self.deliver("a", "c", first[0])
+        folder_c.sync()
+        self.assertEqual(self.titles("c"), ["First", "Second"])
+
+    def test_superseded_upserts_are_pruned(self):
+        db_a, service_a, folder_a = self.devices["a"]
+        task_id = service_a.add_task("Stretch")
+        for _ in range(3):
+            service_a.complete_task(task_id)
+            service_a.reopen_task(task_id)
+            folder_a.sync()
+        upserts = db_a.execute(
+            "SELECT COUNT(*) FROM changes WHERE entity = 'task' AND op = 'upsert'"
+        ).fetchone()[0]
+        self.assertEqual(upserts, 1)
+
+        self.sync_everything()
+        for device in self.devices:
+            self.assertEqual(self.titles(device), ["Stretch"], device)
+            completed = self.devices[device][0].execute("SELECT completed FROM tasks").fetchone()
+            self.assertEqual(completed[0], 0, device)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+"""
+Checks for the recursive task tree queries.
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from database import Database
+from services import CodePetService
+from task_store import TaskStore
+
+
+class SubtreeSummaryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.db = Database(self.directory / "tree.db")
+        service = CodePetService(self.db)
+        # Trip > Pack > Socks, Trip > Book; Trip and Socks are done
+        self.trip = service.add_task("Trip")
+        self.pack = service.add_subtask(self.trip, "Pack")
+        self.socks = service.add_subtask(self.pack, "Socks")
+        service.add_subtask(self.trip, "Book")
+        self.other = service.add_task("Other")
+        service.complete_task(self.socks)
+        self.db.execute("UPDATE tasks SET completed = 1 WHERE id = ?", (self.trip,))
+        self.store = TaskStore(self.db)
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_one_tree(self):
+        summary = self.store.subtree_summary([self.trip])
+        xp = self.db.execute(
+            "SELECT SUM(xp_value), SUM(CASE WHEN completed THEN xp_value END) FROM tasks WHERE id != ?",
+            (self.other,)
+        ).fetchone()
+        self.assertEqual(summary, {
+            "descendants": 3, "open_tasks": 2, "depth": 2,
+            "total_xp": xp[0], "earned_xp": xp[1],
+        })
+
+    def test_overlapping_selection_counts_tasks_once(self):
+        summary = self.store.subtree_summary([self.trip, self.pack, self.other])
+        self.assertEqual(summary["descendants"], 2)
+        self.assertEqual(summary["open_tasks"], 3)
+        self.assertEqual(summary["depth"], 2)
+
+    def test_leaf(self):
+        summary = self.store.subtree_summary([self.socks])
+        self.assertEqual((summary["descendants"], summary["open_tasks"], summary["depth"]), (0, 0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
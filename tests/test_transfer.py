@@ -0,0 +1,66 @@
+"""
+Checks for streaming task import.
+"""
+
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from database import Database
+from transfer import import_tasks
+
+
+class ImportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.db = Database(self.directory / "import.db")
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def import_rows(self, rows, chunk_size=2):
+        path = self.directory / "tasks.jsonl"
+        path.write_text("".join(json.dumps(row) + "\n" for row in rows), encoding="utf-8")
+        return import_tasks(self.db, path, chunk_size=chunk_size)
+
+    def parents(self):
+        return dict(self.db.execute("""
+            SELECT t.title, p.title FROM tasks t LEFT JOIN tasks p ON p.id = t.parent_id
+        """).fetchall())
+
+    def test_parents_after_subtasks(self):
+        self.import_rows([
+            {"id": "b", "title": "Outline", "parent_id": "a"},
+            {"id": "c", "title": "Sources", "parent_id": "b"},
+            {"id": "a", "title": "Report"},
+        ])
+        self.assertEqual(self.parents(), {"Outline": "Report", "Sources": "Outline", "Report": None})
+
+    def test_parent_cycle_is_cut_and_logged(self):
+        count = self.import_rows([
+            {"id": 1, "title": "Root"},
+            {"id": 2, "title": "Child", "parent_id": 1},
+            {"id": 3, "title": "Loop A", "parent_id": 4},
+            {"id": 4, "title": "Loop B", "parent_id": 3},
+            {"id": 5, "title": "Hanging", "parent_id": 4},
+        ])
+        self.assertEqual(count, 5)
+        self.assertEqual(self.parents(), {
+            "Root": None, "Child": "Root",
+            "Loop A": None, "Loop B": "Loop A", "Hanging": "Loop B",
+        })
+
+        # Every imported task is logged for sync, parents before subtasks
+        logged = [row[0] for row in self.db.execute("""
+            SELECT t.title FROM changes c JOIN tasks t ON t.uid = c.entity_id ORDER BY c.clock
+        """)]
+        self.assertEqual(sorted(logged), sorted(self.parents()))
+        self.assertLess(logged.index("Loop A"), logged.index("Loop B"))
+        self.assertLess(logged.index("Loop B"), logged.index("Hanging"))
+
+
+if __name__ == "__main__":
+    unittest.main()
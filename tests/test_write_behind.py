@@ -0,0 +1,65 @@
+"""
+Group commit checks for write-behind mode.
+
+Writes queued together must share one transaction and one COMMIT, and a
+failing write must be undone without taking the rest of its batch with it.
+"""
+
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from database import Database
+
+
+class WriteBehindTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.db = Database(self.directory / "write-behind.db")
+        self.statements = []
+        self.db.connection.set_trace_callback(self.statements.append)
+        # A wide window so everything submitted below lands in one batch
+        self.db.start_write_behind(window=0.3)
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def add(self, title):
+        return lambda connection: connection.execute(
+            "INSERT INTO tasks (title) VALUES (?)", (title,)
+        ).lastrowid
+
+    def commits(self):
+        return [s for s in self.statements if s.split()[0].upper() in ("BEGIN", "COMMIT")]
+
+    def test_batch_shares_one_commit(self):
+        futures = [self.db.submit(self.add(f"Task {n}")) for n in range(5)]
+        for future in futures:
+            future.result()
+
+        self.assertEqual(self.commits(), ["BEGIN", "COMMIT"])
+        titles = [row[0] for row in self.db.execute("SELECT title FROM tasks ORDER BY id")]
+        self.assertEqual(titles, [f"Task {n}" for n in range(5)])
+
+    def test_failed_item_is_undone_alone(self):
+        def fail(connection):
+            connection.execute("INSERT INTO tasks (title) VALUES ('Half written')")
+            connection.execute("INSERT INTO tasks (title) VALUES (NULL)")
+
+        futures = [self.db.submit(self.add("Before")), self.db.submit(fail),
+                   self.db.submit(self.add("After"))]
+        futures[0].result()
+        with self.assertRaises(sqlite3.IntegrityError):
+            futures[1].result()
+        futures[2].result()
+
+        self.assertEqual(self.commits(), ["BEGIN", "COMMIT"])
+        titles = [row[0] for row in self.db.execute("SELECT title FROM tasks ORDER BY id")]
+        self.assertEqual(titles, ["Before", "After"])
+
+
+if __name__ == "__main__":
+    unittest.main()
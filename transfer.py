@@ -0,0 +1,241 @@
+"""
+Bulk task import and export for CodePet.
+
+Tasks stream to and from CSV or JSONL files one row at a time, so memory use
+stays bounded regardless of file size. Imports are written in chunked
+``executemany`` transactions and keep ``parent_id`` hierarchies intact by
+mapping the ids in the file to newly assigned task ids.
+"""
+
+import csv
+import json
+from itertools import islice
+from pathlib import Path
+from typing import Iterator, Optional
+from database import Database, log_task_upserts
+from stats_store import backfill_daily_stats
+from sync import untracked
+
+
+# Columns written on export and understood on import
+TASK_FIELDS = [
+    "id", "parent_id", "title", "description", "completed",
+    "xp_value", "created_at", "completed_at",
+]
+
+# Rows written per import transaction
+DEFAULT_CHUNK_SIZE = 5000
+
+# Rows fetched from SQLite at a time while exporting
+EXPORT_FETCH_SIZE = 1000
+
+
+def _detect_format(path: Path, fmt: Optional[str]) -> str:
+    """Resolve the file format from an explicit name or the file suffix."""
+    fmt = (fmt or path.suffix.lstrip(".")).lower()
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError(f"Unsupported task file format: {fmt!r} (use csv or jsonl)")
+    return fmt
+
+
+def _read_rows(path: Path, fmt: str) -> Iterator[dict]:
+    """Lazily yield task dicts from a CSV or JSONL file."""
+    with open(path, newline="", encoding="utf-8") as handle:
+        if fmt == "csv":
+            yield from csv.DictReader(handle)
+        else:
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _optional(value):
+    """Treat empty CSV cells and JSON nulls alike."""
+    return None if value in (None, "") else value
+
+
+def _xp_value(value, number: int, path: Path) -> int:
+    """Parse an XP value from CSV text or JSON (10 when missing)."""
+    value = _optional(value)
+    if value is None:
+        return 10
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Task #{number} in {path} has an invalid xp_value {value!r}") from None
+
+
+def _flag(value) -> int:
+    """Parse a completed flag from CSV text or JSON."""
+    if isinstance(value, str):
+        return 1 if value.strip().lower() in ("1", "true", "yes") else 0
+    return 1 if value else 0
+
+
+def export_tasks(db: Database, path, fmt: Optional[str] = None) -> int:
+    """Stream every task to a CSV or JSONL file and return the row count.
+
+    Rows are written in id order, so parents normally precede their subtasks.
+    """
+    path = Path(path)
+    fmt = _detect_format(path, fmt)
+    cursor = db.execute(f"SELECT {', '.join(TASK_FIELDS)} FROM tasks ORDER BY id")
+
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle) if fmt == "csv" else None
+        if writer:
+            writer.writerow(TASK_FIELDS)
+
+        while True:
+            rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                if writer:
+                    writer.writerow(tuple(row))
+                else:
+                    handle.write(json.dumps(dict(row)) + "\n")
+            count += len(rows)
+
+    return count
+
+
+def _break_parent_cycles(connection, first_id: int, last_id: int) -> None:
+    """Make the first task of every parent cycle among imported tasks top-level.
+
+    Tasks in a cycle have no top-level ancestor, so they would never be shown
+    or synced. Existing tasks never point at imported ones, so every cycle
+    lies within the imported id range.
+    """
+    connection.execute("""
+        WITH RECURSIVE reached(id) AS (
+            SELECT id FROM tasks
+            WHERE id BETWEEN ?1 AND ?2
+              AND (parent_id IS NULL OR parent_id NOT BETWEEN ?1 AND ?2)
+            UNION ALL
+            SELECT c.id FROM reached r JOIN tasks c ON c.parent_id = r.id
+        ),
+        -- Ancestors of every task no top-level task leads to
+        ancestors(task, id) AS (
+            SELECT id, parent_id FROM tasks
+            WHERE id BETWEEN ?1 AND ?2 AND id NOT IN (SELECT id FROM reached)
+            UNION
+            SELECT a.task, t.parent_id FROM ancestors a JOIN tasks t ON t.id = a.id
+        )
+        UPDATE tasks SET parent_id = NULL
+        WHERE id IN (
+            -- A task in a cycle is its own ancestor, and its ancestors are the cycle
+            SELECT task FROM ancestors
+            GROUP BY task
+            HAVING SUM(id = task) > 0 AND task = MIN(id)
+        )
+    """, (first_id, last_id))
+
+
+def import_tasks(db: Database, path, fmt: Optional[str] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Stream tasks from a CSV or JSONL file into the database.
+
+    Every task gets a new id. The ``id``/``parent_id`` values in the file are
+    only used to rebuild the hierarchy, so parents may appear before or after
+    their subtasks. Imported tasks do not award XP.
+
+    A row without a title or with an invalid xp_value raises ValueError. The
+    chunks committed before it stay imported, linked to their parents.
+    Parent links that form a cycle are cut at the cycle's first task, which
+    becomes a top-level task.
+
+    Returns:
+        int: Number of tasks imported
+    """
+    path = Path(path)
+    rows = _read_rows(path, _detect_format(path, fmt))
+
+    # File id -> new task id mapping lives in SQLite, not in Python memory
+    db.execute("DROP TABLE IF EXISTS temp.import_map")
+    db.execute("""
+        CREATE TEMP TABLE import_map (
+            source_id TEXT PRIMARY KEY,
+            task_id INTEGER NOT NULL,
+            source_parent TEXT
+        )
+    """)
+
+    # Imported tasks are logged for sync once linked, not row by row
+    count = 0
+    first_id = None
+    try:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+
+            with db.transaction() as connection, untracked(connection):
+                # Assign ids explicitly so the mapping needs no per-row round trip
+                base_id = connection.execute("""
+                    SELECT MAX(COALESCE((SELECT MAX(id) FROM tasks), 0),
+                               COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'tasks'), 0))
+                """).fetchone()[0]
+                if first_id is None:
+                    first_id = base_id + 1
+
+                task_rows = []
+                map_rows = []
+                for offset, row in enumerate(chunk, start=1):
+                    title = (row.get("title") or "").strip()
+                    if not title:
+                        raise ValueError(f"Task #{count + offset} in {path} has no title")
+                    task_id = base_id + offset
+                    completed = _flag(row.get("completed"))
+                    task_rows.append((
+                        task_id,
+                        title,
+                        row.get("description") or "",
+                        completed,
+                        _xp_value(row.get("xp_value"), count + offset, path),
+                        _optional(row.get("created_at")),
+                        _optional(row.get("completed_at")) if completed else None,
+                    ))
+                    source_id = _optional(row.get("id"))
+                    if source_id is not None:
+                        map_rows.append((str(source_id), task_id, _optional(row.get("parent_id"))))
+
+                connection.executemany(
+                    "INSERT INTO tasks (id, title, description, completed, xp_value, created_at, completed_at, uid) "
+                    "VALUES (?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?, lower(hex(randomblob(16))))",
+                    task_rows
+                )
+                connection.executemany(
+                    "INSERT OR REPLACE INTO import_map (source_id, task_id, source_parent) VALUES (?, ?, ?)",
+                    ((source_id, task_id, None if parent is None else str(parent))
+                     for source_id, task_id, parent in map_rows)
+                )
+                # Completed imports count towards the day they were completed on
+                backfill_daily_stats(
+                    connection.cursor(), where="id BETWEEN ? AND ?",
+                    params=(base_id + 1, base_id + len(chunk))
+                )
+            count += len(chunk)
+    finally:
+        # Re-link subtasks to their parents in one set-based statement. Runs
+        # even when a bad row stops the import, so the chunks already
+        # committed keep their hierarchy and are logged for sync
+        with db.transaction() as connection, untracked(connection):
+            connection.execute("CREATE INDEX temp.idx_import_map_task ON import_map (task_id)")
+            connection.execute("""
+                UPDATE tasks
+                SET parent_id = (
+                    SELECT parent.task_id
+                    FROM import_map child
+                    JOIN import_map parent ON parent.source_id = child.source_parent
+                    WHERE child.task_id = tasks.id
+                )
+                WHERE id IN (SELECT task_id FROM import_map WHERE source_parent IS NOT NULL)
+            """)
+            connection.execute("DROP TABLE temp.import_map")
+            if count:
+                _break_parent_cycles(connection, first_id, first_id + count - 1)
+                log_task_upserts(connection.cursor(), first_id, first_id + count - 1)
+
+    return count
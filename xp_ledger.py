@@ -0,0 +1,151 @@
+"""
+Append-only XP ledger for CodePet.
+
+Every XP change is appended to ``xp_events`` in the same transaction that
+updates ``pet_state``: one event per task completed, so the XP a task earned
+can be looked up and taken back when it is reopened. Events are never updated
+or deleted; a reversal is a negative event.
+
+Every SNAPSHOT_INTERVAL events the pet's total XP is written to
+``xp_snapshots``. Pet state at any moment is the latest snapshot taken before
+it plus the events after that snapshot, so deriving it reads a bounded number
+of events instead of the whole history.
+
+The first snapshot holds the XP earned before the ledger existed. Tasks
+completed back then have no events, so reopening them takes no XP back.
+"""
+
+from typing import Optional
+from database import Database
+from progression import evolution_stage_for_level, level_progress
+
+
+# Events between two snapshots
+SNAPSHOT_INTERVAL = 500
+
+# Upper bound for event ids when no later snapshot limits a replay
+_LAST_EVENT = 2 ** 62
+
+
+def record_task_awards(connection, task_ids_query: str, params: tuple) -> None:
+    """Append one 'complete' event per task selected by ``task_ids_query``."""
+    connection.execute(f"""
+        INSERT INTO xp_events (task_id, amount, reason)
+        SELECT id, xp_value, 'complete' FROM tasks WHERE id IN ({task_ids_query})
+    """, params)
+
+
+def record_event(connection, amount: int, reason: str, task_id: Optional[int] = None) -> None:
+    """Append a single event, e.g. an award not tied to a task."""
+    connection.execute(
+        "INSERT INTO xp_events (task_id, amount, reason) VALUES (?, ?, ?)",
+        (task_id, amount, reason)
+    )
+
+
+def reverse_task_awards(connection, task_ids_query: str, params: tuple) -> int:
+    """Append a 'reopen' event taking back the net XP of each selected task.
+
+    Tasks whose awards were already reversed (or never recorded) are skipped.
+
+    Returns:
+        int: Total XP taken back
+    """
+    net_awards = f"""
+        SELECT task_id, SUM(amount) AS net FROM xp_events
+        WHERE task_id IN ({task_ids_query})
+        GROUP BY task_id
+        HAVING net > 0
+    """
+    total = connection.execute(
+        f"SELECT COALESCE(SUM(net), 0) FROM ({net_awards})", params
+    ).fetchone()[0]
+    if total:
+        connection.execute(f"""
+            INSERT INTO xp_events (task_id, amount, reason)
+            SELECT task_id, -net, 'reopen' FROM ({net_awards})
+        """, params)
+    return total
+
+
+def snapshot_if_due(connection, total_xp: int) -> bool:
+    """Snapshot ``total_xp`` when SNAPSHOT_INTERVAL events have passed since the last one.
+
+    Must run in the transaction that appended the events, after pet_state
+    was updated, so the snapshot matches the ledger exactly.
+    """
+    last_snapshot, last_event = connection.execute("""
+        SELECT (SELECT COALESCE(MAX(event_id), 0) FROM xp_snapshots),
+               (SELECT COALESCE(MAX(id), 0) FROM xp_events)
+    """).fetchone()
+    if last_event - last_snapshot < SNAPSHOT_INTERVAL:
+        return False
+    connection.execute(
+        "INSERT INTO xp_snapshots (event_id, total_xp) VALUES (?, ?)", (last_event, total_xp)
+    )
+    return True
+
+
+def pet_values(total_xp: int) -> dict:
+    """Level, in-level XP and evolution stage derived from total XP."""
+    level, current_xp, _ = level_progress(total_xp)
+    return {
+        "total_xp": total_xp,
+        "level": level,
+        "current_xp": current_xp,
+        "evolution_stage": evolution_stage_for_level(level),
+    }
+
+
+class XpLedger:
+    """Derives pet XP state from the latest snapshot and the events after it."""
+
+    # Latest snapshot taken at or before a UTC timestamp
+    SNAPSHOT_QUERY = """
+        SELECT event_id, total_xp FROM xp_snapshots
+        WHERE created_at <= ?
+        ORDER BY event_id DESC
+        LIMIT 1
+    """
+
+    # Events after a snapshot, up to the next snapshot and a UTC timestamp
+    REPLAY_QUERY = """
+        SELECT COALESCE(SUM(amount), 0) FROM xp_events
+        WHERE id > ? AND id <= ? AND created_at <= ?
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    def current_state(self) -> dict:
+        """Pet XP state replayed from the ledger (matches pet_state when intact)."""
+        return self._state_at("9999-12-31 23:59:59")
+
+    def state_as_of(self, moment: str) -> Optional[dict]:
+        """Pet XP state at a local date or datetime ('YYYY-MM-DD[ HH:MM:SS]').
+
+        A bare date means the end of that day.
+
+        Returns:
+            dict: total_xp, level, current_xp and evolution_stage, or None
+                  when ``moment`` is before the ledger began
+        """
+        local = moment + " 23:59:59" if len(moment) == 10 else moment
+        utc = self.db.execute("SELECT datetime(?, 'utc')", (local,)).fetchone()[0]
+        if utc is None:
+            raise ValueError(f"Not a date: {moment!r}")
+        return self._state_at(utc)
+
+    def _state_at(self, utc: str) -> Optional[dict]:
+        """Replay the events between the latest snapshot before ``utc`` and ``utc``."""
+        snapshot = self.db.execute(self.SNAPSHOT_QUERY, (utc,)).fetchone()
+        if snapshot is None:
+            return None
+        event_id, total_xp = snapshot
+        next_snapshot = self.db.execute(
+            "SELECT MIN(event_id) FROM xp_snapshots WHERE event_id > ?", (event_id,)
+        ).fetchone()[0]
+        total_xp += self.db.execute(
+            self.REPLAY_QUERY, (event_id, next_snapshot or _LAST_EVENT, utc)
+        ).fetchone()[0]
+        return pet_values(total_xp)